@@ -78,6 +78,78 @@ CRAWLER_SETTINGS = {
     
     # 是否显示限速统计
     'autothrottle_debug': False,
+    
+    # 是否跳过已入库的新闻URL
+    'seen_filter_enabled': True,
+    
+    # 已爬取URL哈希存储路径
+    'seen_store_path': os.path.join(BASE_DIR, 'data', 'seen_urls.npy'),
+    
+    # 是否启用增量爬取（条件请求及内容指纹比较）
+    'incremental_enabled': False,
+    
+    # 增量爬取状态存储路径
+    'crawl_state_path': os.path.join(BASE_DIR, 'data', 'crawl_state.db'),
+    
+    # 选择器学习缓存路径
+    'selector_cache_path': os.path.join(BASE_DIR, 'data', 'selector_cache.json'),
+}
+
+# 数据管道设置
+PIPELINE_SETTINGS = {
+    # 批量写入条数（1表示逐条写入）
+    'batch_size': 50,
+    
+    # 批量写入最大等待时间（毫秒）
+    'flush_interval': 2000,
+    
+    # 数据库写入队列最大长度
+    'queue_size': 100,
+    
+    # 标签ID缓存最大条数
+    'tag_cache_size': 10000,
+    
+    # 近似重复新闻判定的最大汉明距离（SimHash，需小于4）
+    'near_duplicate_distance': 3,
+    
+    # 近似重复新闻的处理方式：link-写入并关联原始新闻，skip-不写入
+    'near_duplicate_action': 'link',
+}
+
+# 关键词提取设置
+KEYWORD_SETTINGS = {
+    # 文档频率统计文件
+    'df_path': os.path.join(BASE_DIR, 'data', 'keyword_df.npz'),
+    
+    # 每篇文章提取的关键词数量
+    'top_n': 10,
+    
+    # 每批处理的文章数
+    'batch_size': 1000,
+    
+    # 文档频率统计保留的最大词数（运行中超过2倍时裁剪低频词）
+    'max_terms': 500000,
+}
+
+# 摘要设置
+SUMMARY_SETTINGS = {
+    # 摘要最大长度
+    'max_length': 200,
+    
+    # 参与打分的最大句子数
+    'max_sentences': 200,
+    
+    # 每篇文章摘要计算的CPU时间上限（毫秒，包含切分句子、构建向量和迭代打分）
+    'cpu_budget': 50,
+    
+    # 摘要生成线程数（独立线程池，不占用反应器线程池中的DNS解析线程）
+    'threads': 2,
+    
+    # 摘要缓存文件（按正文内容哈希）
+    'cache_path': os.path.join(BASE_DIR, 'data', 'summary_cache.db'),
+    
+    # 内存中缓存的摘要条数
+    'cache_size': 10000,
 }
 
 # 图片设置
@@ -129,8 +201,46 @@ PROXY_SETTINGS = {
     # 代理检查超时（秒）
     'check_timeout': 10,
     
-    # 代理最大失败次数
+    # 代理检查测试地址，通过环境变量 PROXY_CHECK_URL 配置为代理可访问的地址
+    # http地址通过代理直接请求，https地址只检查代理能否建立CONNECT隧道
+    # 未配置时不做健康检查，保留全部代理，由熔断器剔除故障代理
+    'check_url': os.getenv('PROXY_CHECK_URL', ''),
+    
+    # 同时进行的代理检查数
+    'check_concurrency': 20,
+    
+    # 代理定时检查间隔（秒），0表示不定时检查
+    'check_interval': 300,
+    
+    # 代理最大连续失败次数，达到后触发熔断
     'max_fail_times': 3,
+    
+    # 代理参考延迟（秒），平均延迟等于该值时选择权重减半
+    'latency_reference': 2.0,
+    
+    # 代理最小选择权重
+    'min_weight': 0.01,
+    
+    # 代理熔断：滑动窗口大小（最近的请求数）
+    'breaker_window': 50,
+    
+    # 代理熔断：窗口内至少有多少个请求才按错误率和延迟判断
+    'breaker_min_requests': 10,
+    
+    # 代理熔断：触发熔断的错误率
+    'breaker_error_rate': 0.5,
+    
+    # 代理熔断：触发熔断的P95延迟（秒）
+    'breaker_p95_latency': 10.0,
+    
+    # 代理熔断：熔断后多久发送试探请求（秒）
+    'breaker_open_timeout': 60,
+    
+    # 代理熔断：半开状态下的试探请求数
+    'breaker_half_open_requests': 3,
+    
+    # 代理熔断：试探请求超过该时间（秒）仍无结果时释放名额（应大于下载超时）
+    'breaker_trial_timeout': 60,
 }
 
 # User-Agent设置
@@ -149,6 +259,12 @@ USER_AGENT_SETTINGS = {
         'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36 Edg/91.0.864.59',
         'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/14.1.1 Safari/605.1.15',
     ],
+    
+    # 每个URL最大尝试次数
+    'max_attempts_per_url': 20,
+    
+    # 尝试次数记录的最大URL数（超出后淘汰最久未请求的URL）
+    'attempts_cache_size': 100000,
 }
 
 # Selenium设置
@@ -213,7 +329,7 @@ SCHEDULE_SETTINGS = {
 
 # 导出设置
 EXPORT_SETTINGS = {
-    # 导出格式（json, xml, csv）
+    # 导出格式（json, xml, csv, parquet），parquet 需要安装 pyarrow
     'formats': ['json', 'xml', 'csv'],
     
     # 导出路径
@@ -222,9 +338,15 @@ EXPORT_SETTINGS = {
     # 是否压缩导出文件
     'compress': True,
     
-    # 压缩格式（zip, gz, bz2）
+    # 压缩格式（zip, gz, bz2, zstd），zstd 需要安装 zstandard
     'compress_format': 'zip',
     
+    # 压缩线程数，大于1时 gz、bz2 分块并行压缩，zstd 使用多线程压缩
+    'compress_workers': 4,
+    
+    # 是否在子进程中压缩（每种导出格式一个进程，可利用多核）
+    'compress_processes': False,
+    
     # 是否包含时间戳
     'include_timestamp': True,
     
@@ -236,6 +358,39 @@ EXPORT_SETTINGS = {
     
     # 是否包含表头
     'include_header': True,
+    
+    # 流式导出时每次查询的新闻条数
+    'chunk_size': 1000,
+    
+    # Parquet每个行组的新闻条数
+    'parquet_row_group_size': 10000,
+    
+    # Parquet列压缩算法（snappy, gzip, zstd）
+    'parquet_compression': 'zstd',
+    
+    # 增量导出目录（增量文件及清单 manifest.json）
+    'delta_path': os.path.join(BASE_DIR, 'data', 'exports', 'delta'),
+    
+    # 增量导出时暂不导出最近多少秒内更新的新闻（避免遗漏尚未提交的事务）
+    'delta_safety_seconds': 60,
+    
+    # 分片导出目录（分片文件及索引 index.json）
+    'shard_path': os.path.join(BASE_DIR, 'data', 'exports', 'shards'),
+    
+    # 分片方式（day: 按发布日期，category_day: 按分类和发布日期）
+    'shard_by': 'day',
+    
+    # 分片导出进程数
+    'shard_workers': 4,
+    
+    # 静态导出目录（每篇文章的JSON文件及sitemap，可由nginx直接提供）
+    'static_path': os.path.join(BASE_DIR, 'data', 'static'),
+    
+    # 前端站点地址（用于生成sitemap）
+    'site_url': os.getenv('SITE_URL', 'http://localhost'),
+    
+    # 前端文章页面路径模板
+    'article_url_path': '/news/{id}.html',
 }
 
 # 新闻分类
@@ -14,6 +14,8 @@ class NewsItem(scrapy.Item):
     title = scrapy.Field()  # 标题
     subtitle = scrapy.Field()  # 副标题
     url = scrapy.Field()  # 新闻URL
+    request_url = scrapy.Field()  # 重定向前的请求URL（写入成功后记入已爬取URL）
+    crawl_validators = scrapy.Field()  # 条件请求验证信息（写入成功后保存）
     source = scrapy.Field()  # 来源
     author = scrapy.Field()  # 作者
     publish_time = scrapy.Field()  # 发布时间
@@ -25,6 +27,8 @@ class NewsItem(scrapy.Item):
     content_html = scrapy.Field()  # HTML内容
     summary = scrapy.Field()  # 摘要
     keywords = scrapy.Field()  # 关键词
+    simhash = scrapy.Field()  # 正文SimHash指纹
+    duplicate_of = scrapy.Field()  # 近似重复的原始新闻ID
     
     # 统计信息
     view_count = scrapy.Field()  # 浏览量
@@ -0,0 +1,108 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+增量爬取中间件
+对已访问过的URL发送条件请求，并标记内容未变化的页面；
+新的验证信息通过 request.meta 传给解析回调，新闻页写入成功后由数据管道保存，
+列表页和专题页解析完成后由爬虫保存
+"""
+
+import logging
+from scrapy import signals
+from scrapy.exceptions import IgnoreRequest
+
+from config.settings import CRAWLER_SETTINGS
+from utils.crawl_state import CrawlStateStore
+
+logger = logging.getLogger(__name__)
+
+
+class ConditionalGetMiddleware:
+    """条件请求中间件"""
+
+    def __init__(self, enabled, state_path, stats=None):
+        """初始化"""
+        self.enabled = enabled
+        self.store = CrawlStateStore(state_path)
+        self.stats = stats
+        self.not_modified_count = 0
+        self.unchanged_count = 0
+        logger.info(f"条件请求中间件初始化，启用状态: {self.enabled}")
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        """从爬虫创建中间件"""
+        enabled = crawler.settings.getbool('INCREMENTAL_ENABLED', CRAWLER_SETTINGS['incremental_enabled'])
+        middleware = cls(enabled, CRAWLER_SETTINGS['crawl_state_path'], crawler.stats)
+        crawler.signals.connect(middleware.spider_opened, signal=signals.spider_opened)
+        crawler.signals.connect(middleware.spider_closed, signal=signals.spider_closed)
+        return middleware
+
+    def process_request(self, request, spider):
+        """处理请求，附加 If-None-Match / If-Modified-Since 请求头"""
+        if not self.enabled or request.method != 'GET':
+            return None
+
+        state = self.store.get(request.url)
+        if not state:
+            return None
+
+        request.meta['crawl_state'] = state
+        if state['etag']:
+            request.headers.setdefault('If-None-Match', state['etag'])
+        if state['last_modified']:
+            request.headers.setdefault('If-Modified-Since', state['last_modified'])
+        return None
+
+    def process_response(self, request, response, spider):
+        """处理响应，计算验证信息和内容指纹"""
+        if not self.enabled or request.method != 'GET':
+            return response
+
+        # 服务器确认内容未修改，直接丢弃请求
+        if response.status == 304:
+            self.not_modified_count += 1
+            if self.stats:
+                self.stats.inc_value('incremental/not_modified')
+            raise IgnoreRequest(f"页面未修改: {request.url}")
+
+        if response.status != 200:
+            return response
+
+        etag = response.headers.get('ETag')
+        last_modified = response.headers.get('Last-Modified')
+        validators = {
+            'url': request.url,
+            'etag': etag.decode('latin-1') if etag else None,
+            'last_modified': last_modified.decode('latin-1') if last_modified else None,
+            'fingerprint': self.store.fingerprint(response.body),
+        }
+
+        # 比较内容指纹，供解析回调跳过未变化的页面
+        state = request.meta.get('crawl_state')
+        if state and state['fingerprint'] == validators['fingerprint']:
+            request.meta['content_unchanged'] = True
+            self.unchanged_count += 1
+            if self.stats:
+                self.stats.inc_value('incremental/unchanged')
+            # 内容与已入库的版本相同，可直接更新验证信息
+            self.store.set(**validators)
+        else:
+            # 新闻写入成功或列表页解析完成后才保存，失败时下次运行重新爬取
+            request.meta['crawl_validators'] = validators
+        return response
+
+    def spider_opened(self, spider):
+        """爬虫开始时的回调"""
+        if self.enabled:
+            self.store.open()
+            # 供数据管道在新闻写入成功后保存验证信息
+            spider.crawl_state = self.store
+        logger.info("条件请求中间件启动")
+
+    def spider_closed(self, spider):
+        """爬虫结束时的回调"""
+        if self.enabled:
+            self.store.close()
+        logger.info(f"条件请求中间件关闭，未修改页面数: {self.not_modified_count}，内容未变化页面数: {self.unchanged_count}")
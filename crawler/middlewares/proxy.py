@@ -5,57 +5,138 @@
 代理中间件
 """
 
-import logging
+import base64
 import random
+import logging
+from functools import partial
 import requests
 import json
-from urllib.parse import urlparse
+from urllib.parse import urlparse, unquote
 from scrapy import signals
 from scrapy.exceptions import IgnoreRequest
+from twisted.internet import defer, reactor, task, threads
+from twisted.internet.endpoints import TCP4ClientEndpoint, connectProtocol, wrapClientTLS
+from twisted.internet.protocol import Protocol
+from twisted.internet.ssl import CertificateOptions
+from twisted.web.client import ProxyAgent, readBody
+from twisted.web.http_headers import Headers
 
 from config.settings import PROXY_SETTINGS
+from utils.proxy_pool import ProxyPool, proxy_label
+from utils.circuit_breaker import CircuitBreaker, OPEN, HALF_OPEN
 
 logger = logging.getLogger(__name__)
 
+# 视为代理故障的响应状态码（其余4xx为目标站点的正常响应）
+PROXY_FAILURE_STATUSES = {403, 407, 429}
+
+# 请求占用了半开状态试探名额时，在meta中记录所用代理的键
+TRIAL_META_KEY = 'proxy_trial'
+
+# 下载器支持的代理类型（不支持socks代理）
+SUPPORTED_PROXY_SCHEMES = ('http', 'https')
+
+
+class TunnelCheckProtocol(Protocol):
+    """发送CONNECT请求，按代理的响应状态判断隧道能否建立"""
+    
+    def __init__(self, request):
+        self.request = request
+        self.buffer = b''
+        self.finished = defer.Deferred()
+    
+    def connectionMade(self):
+        self.transport.write(self.request)
+    
+    def dataReceived(self, data):
+        self.buffer += data
+        if b'\r\n' in self.buffer and not self.finished.called:
+            status = self.buffer.split(b'\r\n', 1)[0].split()
+            self.finished.callback(len(status) >= 2 and status[1] == b'200')
+            self.transport.loseConnection()
+    
+    def connectionLost(self, reason):
+        if not self.finished.called:
+            self.finished.callback(False)
+
 
 class RandomProxyMiddleware:
     """随机代理中间件"""
     
-    def __init__(self):
+    def __init__(self, stats=None):
         """初始化"""
         self.enabled = PROXY_SETTINGS['enabled']
         self.proxy_type = PROXY_SETTINGS['type']
-        self.proxies = PROXY_SETTINGS['proxies']
+        self.stats = stats
         self.proxy_api = PROXY_SETTINGS['proxy_api']
         self.proxy_api_key = PROXY_SETTINGS['proxy_api_key']
         self.check_timeout = PROXY_SETTINGS['check_timeout']
+        self.check_url = PROXY_SETTINGS['check_url']
+        self.check_concurrency = PROXY_SETTINGS['check_concurrency']
+        self.check_interval = PROXY_SETTINGS['check_interval']
         self.max_fail_times = PROXY_SETTINGS['max_fail_times']
         
-        # 代理状态
-        self.proxy_stats = {}
+        # 代理池（按成功率和响应延迟加权）
+        self.pool = ProxyPool(
+            PROXY_SETTINGS['proxies'],
+            latency_reference=PROXY_SETTINGS['latency_reference'],
+            min_weight=PROXY_SETTINGS['min_weight']
+        )
         self.count = 0
         
-        logger.info(f"随机代理中间件初始化，启用状态: {self.enabled}")
+        # 参与健康检查的全部代理（包括已移除、等待恢复的代理）
+        self.candidates = set(self.pool.proxies())
+        self.check_task = None
+        self.refreshing = False
+        
+        # 各代理的熔断器及等待进入半开状态的定时任务
+        self.breakers = {}
+        self.half_open_calls = {}
         
-        # 如果启用了代理API，则从API获取代理列表
-        if self.enabled and self.proxy_api:
-            self._fetch_proxies_from_api()
+        logger.info(f"随机代理中间件初始化，启用状态: {self.enabled}")
+        if self.enabled and not self.check_url:
+            logger.warning("未配置代理检查地址 PROXY_CHECK_URL，跳过代理健康检查")
     
     @classmethod
     def from_crawler(cls, crawler):
         """从爬虫创建中间件"""
-        middleware = cls()
+        middleware = cls(stats=crawler.stats)
         crawler.signals.connect(middleware.spider_opened, signal=signals.spider_opened)
         crawler.signals.connect(middleware.spider_closed, signal=signals.spider_closed)
         return middleware
     
     def process_request(self, request, spider):
         """处理请求"""
-        if not self.enabled or not self.proxies:
+        if not self.enabled:
+            return None
+        
+        # 重定向或重试产生的请求带有上一次的试探名额，结果没有经过本中间件，释放该名额
+        trial_proxy = request.meta.pop(TRIAL_META_KEY, None)
+        if trial_proxy:
+            self._get_breaker(trial_proxy).release()
+        
+        if not self.pool:
             return None
             
-        # 随机选择一个代理
-        proxy = self._get_random_proxy()
+        # 按权重随机选择一个代理，半开状态的代理试探名额用完时重新选择
+        proxy = None
+        for _ in range(3):
+            candidate = self._get_random_proxy()
+            if candidate is None:
+                break
+            if self._try_proxy(candidate, request):
+                proxy = candidate
+                break
+        else:
+            # 随机选中的都是试探名额已用完的半开代理，依次尝试池中其余代理
+            proxy = next((candidate for candidate in random.sample(self.pool.proxies(), len(self.pool))
+                          if self._try_proxy(candidate, request)), None)
+            if not proxy:
+                # 池中代理暂时都不能接受请求，重新调度而不是直连
+                if self.stats:
+                    self.stats.inc_value('proxy/rescheduled')
+                logger.debug(f"没有可接受请求的代理，重新调度: {request.url}")
+                return request.replace(dont_filter=True)
         if not proxy:
             logger.warning("没有可用的代理")
             return None
@@ -69,19 +150,39 @@ class RandomProxyMiddleware:
         
         return None
     
+    def _try_proxy(self, proxy, request):
+        """
+        由熔断器判断代理能否接受请求，占用半开状态的试探名额时记录在请求中
+        
+        Args:
+            proxy: 代理地址
+            request: 请求
+            
+        Returns:
+            bool: 是否可以使用该代理
+        """
+        breaker = self._get_breaker(proxy)
+        if not breaker.allow():
+            return False
+        if breaker.state == HALF_OPEN:
+            request.meta[TRIAL_META_KEY] = proxy
+        return True
+    
     def process_response(self, request, response, spider):
         """处理响应"""
         if not self.enabled or 'proxy' not in request.meta:
             return response
             
         proxy = request.meta['proxy']
+        request.meta.pop(TRIAL_META_KEY, None)
         
         # 检查响应状态
-        if response.status >= 400:
-            self._mark_proxy_fail(proxy)
-            logger.warning(f"代理 {proxy} 返回状态码 {response.status}")
+        latency = request.meta.get('download_latency')
+        if response.status >= 500 or response.status in PROXY_FAILURE_STATUSES:
+            self._mark_proxy_fail(proxy, latency)
+            logger.warning(f"代理 {proxy_label(proxy)} 返回状态码 {response.status}")
         else:
-            self._mark_proxy_success(proxy)
+            self._mark_proxy_success(proxy, latency)
         
         return response
     
@@ -91,103 +192,154 @@ class RandomProxyMiddleware:
             return None
             
         proxy = request.meta['proxy']
+        request.meta.pop(TRIAL_META_KEY, None)
         self._mark_proxy_fail(proxy)
-        logger.warning(f"代理 {proxy} 发生异常: {str(exception)}")
-        
-        # 如果代理失败次数过多，则从列表中移除
-        if self.proxy_stats.get(proxy, {}).get('fail_times', 0) >= self.max_fail_times:
-            self._remove_proxy(proxy)
-            logger.warning(f"代理 {proxy} 失败次数过多，已移除")
-            
-            # 如果没有可用代理，则尝试重新获取
-            if not self.proxies and self.proxy_api:
-                self._fetch_proxies_from_api()
-        
+        logger.warning(f"代理 {proxy_label(proxy)} 发生异常: {str(exception)}")
         return None
     
     def _get_random_proxy(self):
-        """获取随机代理"""
-        if not self.proxies:
-            return None
-            
-        # 按照成功率排序，优先选择成功率高的代理
-        sorted_proxies = sorted(
-            self.proxies,
-            key=lambda p: self.proxy_stats.get(p, {}).get('success_rate', 0),
-            reverse=True
-        )
-        
-        # 从前80%的代理中随机选择
-        top_count = max(1, int(len(sorted_proxies) * 0.8))
-        return random.choice(sorted_proxies[:top_count])
+        """按权重随机获取代理"""
+        return self.pool.choose()
     
-    def _mark_proxy_success(self, proxy):
+    def _mark_proxy_success(self, proxy, latency=None):
         """标记代理成功"""
-        if proxy not in self.proxy_stats:
-            self.proxy_stats[proxy] = {'success': 0, 'fail': 0, 'success_rate': 0, 'fail_times': 0}
-            
-        self.proxy_stats[proxy]['success'] += 1
-        self.proxy_stats[proxy]['fail_times'] = 0
-        
-        # 计算成功率
-        total = self.proxy_stats[proxy]['success'] + self.proxy_stats[proxy]['fail']
-        self.proxy_stats[proxy]['success_rate'] = self.proxy_stats[proxy]['success'] / total if total > 0 else 0
+        stats = self.pool.record(proxy, True, latency)
+        self._get_breaker(proxy).record(True, latency)
+        return stats
     
-    def _mark_proxy_fail(self, proxy):
+    def _mark_proxy_fail(self, proxy, latency=None):
         """标记代理失败"""
-        if proxy not in self.proxy_stats:
-            self.proxy_stats[proxy] = {'success': 0, 'fail': 0, 'success_rate': 0, 'fail_times': 0}
-            
-        self.proxy_stats[proxy]['fail'] += 1
-        self.proxy_stats[proxy]['fail_times'] += 1
+        stats = self.pool.record(proxy, False, latency)
+        self._get_breaker(proxy).record(False, latency)
+        return stats
+    
+    def _get_breaker(self, proxy):
+        """获取代理的熔断器"""
+        breaker = self.breakers.get(proxy)
+        if breaker is None:
+            breaker = CircuitBreaker(
+                window=PROXY_SETTINGS['breaker_window'],
+                min_requests=PROXY_SETTINGS['breaker_min_requests'],
+                error_rate=PROXY_SETTINGS['breaker_error_rate'],
+                p95_latency=PROXY_SETTINGS['breaker_p95_latency'],
+                max_consecutive_failures=self.max_fail_times,
+                open_timeout=PROXY_SETTINGS['breaker_open_timeout'],
+                half_open_requests=PROXY_SETTINGS['breaker_half_open_requests'],
+                trial_timeout=PROXY_SETTINGS['breaker_trial_timeout'],
+                on_transition=partial(self._breaker_transition, proxy)
+            )
+            self.breakers[proxy] = breaker
+        return breaker
+    
+    def _breaker_transition(self, proxy, previous, state, reason):
+        """熔断器状态变化：打开时移出代理池，超时后重新加入以发送试探请求"""
+        label = proxy_label(proxy)
+        logger.warning(f"代理 {label} 熔断器状态 {previous} -> {state}，原因: {reason}")
+        if self.stats:
+            self.stats.inc_value(f"proxy/breaker/{state}")
+            self.stats.inc_value(f"proxy/{label}/breaker/{state}")
         
-        # 计算成功率
-        total = self.proxy_stats[proxy]['success'] + self.proxy_stats[proxy]['fail']
-        self.proxy_stats[proxy]['success_rate'] = self.proxy_stats[proxy]['success'] / total if total > 0 else 0
+        if state == OPEN:
+            self._remove_proxy(proxy)
+            self._cancel_half_open(proxy)
+            self.half_open_calls[proxy] = reactor.callLater(
+                PROXY_SETTINGS['breaker_open_timeout'], self._readmit_for_trial, proxy
+            )
+            
+            # 如果没有可用代理，则尝试重新获取
+            if not self.pool and self.proxy_api:
+                self._refresh_proxies()
+    
+    def _readmit_for_trial(self, proxy):
+        """熔断超时后将代理重新加入代理池，由熔断器限制试探请求数"""
+        self.half_open_calls.pop(proxy, None)
+        if proxy in self.candidates or proxy in PROXY_SETTINGS['proxies']:
+            self.pool.add(proxy)
+    
+    def _cancel_half_open(self, proxy):
+        """取消等待中的半开定时任务"""
+        call = self.half_open_calls.pop(proxy, None)
+        if call and call.active():
+            call.cancel()
     
     def _remove_proxy(self, proxy):
         """移除代理"""
-        if proxy in self.proxies:
-            self.proxies.remove(proxy)
-        if proxy in self.proxy_stats:
-            del self.proxy_stats[proxy]
+        self.pool.remove(proxy)
     
     def _fetch_proxies_from_api(self):
-        """从API获取代理列表"""
+        """
+        从API获取代理列表，请求在线程池中执行，不阻塞反应器
+        
+        Returns:
+            Deferred: 以代理地址列表触发
+        """
         if not self.proxy_api:
-            return
+            return defer.succeed([])
+        
+        # 构建API请求
+        params = {}
+        if self.proxy_api_key:
+            params['key'] = self.proxy_api_key
+        
+        # 发送请求
+        d = threads.deferToThread(requests.get, self.proxy_api, params=params, timeout=self.check_timeout)
+        d.addCallback(self._parse_proxy_api_response)
+        d.addErrback(self._proxy_api_failed)
+        return d
+    
+    def _parse_proxy_api_response(self, response):
+        """解析代理API响应"""
+        if response.status_code != 200:
+            logger.error(f"获取代理API返回状态码 {response.status_code}")
+            return []
             
+        # 解析响应
         try:
-            # 构建API请求
-            params = {}
-            if self.proxy_api_key:
-                params['key'] = self.proxy_api_key
-            
-            # 发送请求
-            response = requests.get(self.proxy_api, params=params, timeout=self.check_timeout)
-            if response.status_code != 200:
-                logger.error(f"获取代理API返回状态码 {response.status_code}")
-                return
-                
-            # 解析响应
-            try:
-                data = response.json()
-                if isinstance(data, list):
-                    self.proxies = data
-                elif isinstance(data, dict) and 'data' in data:
-                    self.proxies = data['data']
-                else:
-                    logger.error(f"无法解析代理API响应: {response.text}")
-                    return
-            except json.JSONDecodeError:
-                # 尝试按行解析
-                self.proxies = [line.strip() for line in response.text.split('\n') if line.strip()]
-            
-            # 格式化代理
-            self.proxies = [self._format_proxy(p) for p in self.proxies if p]
-            logger.info(f"从API获取到 {len(self.proxies)} 个代理")
-        except Exception as e:
-            logger.error(f"获取代理API异常: {str(e)}")
+            data = response.json()
+            if isinstance(data, list):
+                proxies = data
+            elif isinstance(data, dict) and 'data' in data:
+                proxies = data['data']
+            else:
+                logger.error(f"无法解析代理API响应: {response.text}")
+                return []
+        except json.JSONDecodeError:
+            # 尝试按行解析
+            proxies = [line.strip() for line in response.text.split('\n') if line.strip()]
+        
+        # 格式化代理
+        proxies = [proxy for proxy in (self._format_proxy(p) for p in proxies if p) if proxy]
+        logger.info(f"从API获取到 {len(proxies)} 个代理")
+        return proxies
+    
+    def _proxy_api_failed(self, failure):
+        """代理API请求异常"""
+        logger.error(f"获取代理API异常: {failure.getErrorMessage()}")
+        return []
+    
+    def _refresh_proxies(self):
+        """
+        从API重新获取代理，检查后加入代理池
+        
+        Returns:
+            Deferred: 检查完成后触发
+        """
+        if self.refreshing:
+            return defer.succeed(None)
+        self.refreshing = True
+        
+        def add_candidates(proxies):
+            self.candidates = set(PROXY_SETTINGS['proxies']) | set(self.pool.proxies()) | set(proxies)
+            return self._revalidate()
+        
+        def done(result):
+            self.refreshing = False
+            return result
+        
+        d = self._fetch_proxies_from_api()
+        d.addCallback(add_candidates)
+        d.addBoth(done)
+        return d
     
     def _format_proxy(self, proxy):
         """格式化代理"""
@@ -216,42 +368,177 @@ class RandomProxyMiddleware:
         return None
     
     def _check_proxy(self, proxy):
-        """检查代理是否可用"""
-        try:
-            # 构建测试URL
-            test_url = 'http://httpbin.org/ip'
+        """
+        检查代理是否可用
+        
+        测试地址为http时通过代理请求该地址；为https时向代理发送CONNECT请求，
+        只检查隧道能否建立。socks代理不受下载器支持，视为不可用
+        
+        Args:
+            proxy: 代理地址
             
-            # 设置代理
-            proxies = {
-                'http': proxy,
-                'https': proxy
-            }
+        Returns:
+            Deferred: 以是否可用触发
+        """
+        parsed = urlparse(proxy)
+        if not parsed.hostname:
+            return defer.succeed(False)
+        if parsed.scheme not in SUPPORTED_PROXY_SCHEMES:
+            logger.warning(f"代理 {proxy_label(proxy)} 的类型 {parsed.scheme} 不受支持，视为不可用")
+            return defer.succeed(False)
+        
+        target = urlparse(self.check_url)
+        if target.scheme == 'https' and parsed.scheme == 'https':
+            logger.warning(f"HTTPS代理 {proxy_label(proxy)} 不支持访问https地址，视为不可用")
+            return defer.succeed(False)
+        
+        default_port = 443 if parsed.scheme == 'https' else 80
+        endpoint = TCP4ClientEndpoint(reactor, parsed.hostname, parsed.port or default_port, timeout=self.check_timeout)
+        if parsed.scheme == 'https':
+            endpoint = wrapClientTLS(CertificateOptions(), endpoint)
+        authorization = None
+        if parsed.username:
+            credentials = f"{unquote(parsed.username)}:{unquote(parsed.password or '')}"
+            authorization = b'Basic ' + base64.b64encode(credentials.encode('utf-8'))
+        
+        if target.scheme == 'https':
+            d = self._check_tunnel(endpoint, target, authorization)
+        else:
+            headers = Headers()
+            if authorization:
+                headers.addRawHeader(b'Proxy-Authorization', authorization)
+            d = ProxyAgent(endpoint).request(b'GET', self.check_url.encode('utf-8'), headers)
+            d.addCallback(lambda response: readBody(response).addCallback(lambda _: response.code == 200))
+        d.addTimeout(self.check_timeout, reactor)
+        d.addErrback(lambda _: False)
+        return d
+    
+    def _check_tunnel(self, endpoint, target, authorization=None):
+        """
+        检查代理能否建立到测试地址的CONNECT隧道
+        
+        Args:
+            endpoint: 代理连接端点
+            target: 解析后的测试地址
+            authorization: Proxy-Authorization 头的值
             
-            # 发送请求
-            response = requests.get(test_url, proxies=proxies, timeout=self.check_timeout)
-            if response.status_code == 200:
-                return True
-            return False
-        except Exception:
-            return False
+        Returns:
+            Deferred: 以隧道是否建立触发
+        """
+        address = f"{target.hostname}:{target.port or 443}".encode('utf-8')
+        request = b'CONNECT ' + address + b' HTTP/1.1\r\nHost: ' + address + b'\r\n'
+        if authorization:
+            request += b'Proxy-Authorization: ' + authorization + b'\r\n'
+        protocol = TunnelCheckProtocol(request + b'\r\n')
+        
+        def close(result):
+            if protocol.transport:
+                protocol.transport.loseConnection()
+            return result
+        
+        d = connectProtocol(endpoint, protocol)
+        d.addCallback(lambda _: protocol.finished)
+        d.addBoth(close)
+        return d
+    
+    def _check_proxies(self, proxies):
+        """
+        并发检查代理，同时进行的检查数不超过上限
+        
+        Args:
+            proxies: 代理地址列表
+            
+        Returns:
+            Deferred: 以 {代理地址: 是否可用} 触发
+        """
+        semaphore = defer.DeferredSemaphore(self.check_concurrency)
+        d = defer.gatherResults([semaphore.run(self._check_proxy, proxy) for proxy in proxies])
+        d.addCallback(lambda results: dict(zip(proxies, results)))
+        return d
+    
+    def _revalidate(self):
+        """
+        检查全部候选代理：移除不可用的代理，恢复可用的代理
+        
+        Returns:
+            Deferred: 检查完成后触发
+        """
+        proxies = sorted(self.candidates)
+        if not proxies:
+            return defer.succeed(None)
+        if not self.check_url:
+            # 未配置检查地址时视为全部可用，熔断中的代理仍由熔断器决定何时恢复
+            self._apply_check_results(dict.fromkeys(proxies, True))
+            return defer.succeed(None)
+        d = self._check_proxies(proxies)
+        d.addCallback(self._apply_check_results)
+        return d
+    
+    def _apply_check_results(self, results):
+        """根据检查结果更新代理池"""
+        added = 0
+        removed = 0
+        for proxy, available in results.items():
+            breaker = self.breakers.get(proxy)
+            if breaker and breaker.state == OPEN:
+                # 熔断中的代理由熔断器决定何时恢复
+                continue
+            if breaker and breaker.expire_trials():
+                logger.warning(f"代理 {proxy_label(proxy)} 有试探请求超时无结果，已释放试探名额")
+            if available and proxy not in self.pool:
+                self.pool.add(proxy)
+                added += 1
+                logger.info(f"代理 {proxy_label(proxy)} 可用，已加入代理池")
+            elif not available and proxy in self.pool:
+                self.pool.remove(proxy)
+                removed += 1
+                logger.warning(f"代理 {proxy_label(proxy)} 不可用，已移出代理池")
+        
+        if self.stats:
+            self.stats.inc_value('proxy/check/admitted', added)
+            self.stats.inc_value('proxy/check/ejected', removed)
+        logger.info(f"代理检查完成，检查 {len(results)} 个，加入 {added} 个，移除 {removed} 个，"
+                    f"共有 {len(self.pool)} 个可用代理")
     
     def spider_opened(self, spider):
         """爬虫开始时的回调"""
         logger.info("随机代理中间件启动")
         
-        # 检查代理可用性
-        if self.enabled and self.proxies:
-            valid_proxies = []
-            for proxy in self.proxies:
-                if self._check_proxy(proxy):
-                    valid_proxies.append(proxy)
-                    logger.info(f"代理 {proxy} 可用")
-                else:
-                    logger.warning(f"代理 {proxy} 不可用")
-            
-            self.proxies = valid_proxies
-            logger.info(f"检查完成，共有 {len(self.proxies)} 个可用代理")
+        if not self.enabled:
+            return None
+        
+        # 获取并并发检查代理，完成后再开始爬取
+        d = self._refresh_proxies() if self.proxy_api else self._revalidate()
+        
+        # 定时重新检查，恢复已可用的代理
+        if self.check_interval:
+            def start_check_task(_):
+                self.check_task = task.LoopingCall(self._periodic_check)
+                self.check_task.start(self.check_interval, now=False)
+            d.addCallback(start_check_task)
+        return d
+    
+    def _periodic_check(self):
+        """定时检查代理（代理池为空且配置了API时重新获取）"""
+        if not self.pool and self.proxy_api:
+            return self._refresh_proxies()
+        return self._revalidate()
     
     def spider_closed(self, spider):
         """爬虫结束时的回调"""
-        logger.info(f"随机代理中间件关闭，共使用代理 {self.count} 次") 
\ No newline at end of file
+        if self.check_task and self.check_task.running:
+            self.check_task.stop()
+        for proxy in list(self.half_open_calls):
+            self._cancel_half_open(proxy)
+        logger.info(f"随机代理中间件关闭，共使用代理 {self.count} 次")
+        
+        # 输出并导出各代理统计
+        for label, proxy_stats in self.pool.get_stats().items():
+            latency = f"{proxy_stats['latency']:.2f}秒" if proxy_stats['latency'] is not None else '-'
+            logger.info(f"代理 {label} 选中: {proxy_stats['selected']}，成功: {proxy_stats['success']}，"
+                        f"失败: {proxy_stats['fail']}，平均延迟: {latency}，权重: {proxy_stats['weight']:.3f}")
+            if self.stats:
+                for key in ('selected', 'success', 'fail'):
+                    self.stats.set_value(f"proxy/{label}/{key}", proxy_stats[key])
+                if proxy_stats['latency'] is not None:
+                    self.stats.set_value(f"proxy/{label}/latency", proxy_stats['latency']) 
\ No newline at end of file
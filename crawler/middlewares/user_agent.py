@@ -7,11 +7,12 @@ User-Agent中间件
 
 import logging
 import random
-from collections import defaultdict
+from collections import OrderedDict
 from scrapy import signals
 from scrapy.exceptions import IgnoreRequest
 
 from config.settings import USER_AGENT_SETTINGS
+from utils.url_filter import UrlSeenStore
 
 logger = logging.getLogger(__name__)
 
@@ -24,10 +25,13 @@ class RandomUserAgentMiddleware:
         self.enabled = USER_AGENT_SETTINGS['enabled']
         self.user_agents = USER_AGENT_SETTINGS['user_agents']
         self.count = 0
-        # 添加URL计数器，记录每个URL的尝试次数
-        self.url_attempts = defaultdict(int)
+        # URL尝试次数（按URL哈希记录，LRU淘汰，内存占用有上限）
+        self.url_attempts = OrderedDict()
+        self.attempts_cache_size = USER_AGENT_SETTINGS['attempts_cache_size']
+        # 新建的尝试次数记录数（被淘汰的URL再次请求时重新计数，不等于不同URL数）
+        self.attempt_entries = 0
         # 设置最大尝试次数
-        self.max_attempts_per_url = 20
+        self.max_attempts_per_url = USER_AGENT_SETTINGS['max_attempts_per_url']
         logger.info(f"随机User-Agent中间件初始化，启用状态: {self.enabled}，每个URL最大尝试次数: {self.max_attempts_per_url}")
     
     @classmethod
@@ -47,11 +51,11 @@ class RandomUserAgentMiddleware:
         url = request.url
         
         # 增加URL尝试次数
-        self.url_attempts[url] += 1
+        attempts = self._add_attempt(url)
         
         # 如果超过最大尝试次数，放弃请求
-        if self.url_attempts[url] > self.max_attempts_per_url:
-            logger.warning(f"URL {url} 已尝试 {self.url_attempts[url]-1} 次，超过最大尝试次数，放弃请求")
+        if attempts > self.max_attempts_per_url:
+            logger.warning(f"URL {url} 已尝试 {attempts - 1} 次，超过最大尝试次数，放弃请求")
             raise IgnoreRequest(f"超过最大尝试次数 {self.max_attempts_per_url}")
             
         # 随机选择一个User-Agent
@@ -64,10 +68,29 @@ class RandomUserAgentMiddleware:
         
         return None
     
+    def _add_attempt(self, url):
+        """
+        增加URL尝试次数
+        
+        Args:
+            url: 请求URL
+            
+        Returns:
+            int: 包含本次在内的尝试次数
+        """
+        url_hash = UrlSeenStore.url_hash(url)
+        attempts = self.url_attempts.pop(url_hash, 0) + 1
+        if attempts == 1:
+            self.attempt_entries += 1
+        self.url_attempts[url_hash] = attempts
+        if len(self.url_attempts) > self.attempts_cache_size:
+            self.url_attempts.popitem(last=False)
+        return attempts
+    
     def spider_opened(self, spider):
         """爬虫开始时的回调"""
         logger.info("随机User-Agent中间件启动")
     
     def spider_closed(self, spider):
         """爬虫结束时的回调"""
-        logger.info(f"随机User-Agent中间件关闭，共切换User-Agent {self.count} 次，处理URL数: {len(self.url_attempts)}") 
\ No newline at end of file
+        logger.info(f"随机User-Agent中间件关闭，共切换User-Agent {self.count} 次，新建尝试次数记录: {self.attempt_entries}") 
\ No newline at end of file
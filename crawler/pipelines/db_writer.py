@@ -0,0 +1,161 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+数据库写入线程
+将阻塞的数据库写入操作移出Twisted反应器线程
+"""
+
+import time
+import queue
+import logging
+import threading
+
+from twisted.internet import defer, reactor, threads
+from twisted.python.failure import Failure
+
+logger = logging.getLogger(__name__)
+
+
+class DatabaseWriter:
+    """数据库写入线程，通过有界队列接收写入任务，队列已满时提交方等待"""
+
+    def __init__(self, queue_size=100, stats=None):
+        """
+        初始化
+
+        Args:
+            queue_size: 写入队列最大长度
+            stats: Scrapy统计收集器
+        """
+        self.queue_size = queue_size
+        self.queue = queue.Queue()
+        # 队列名额，名额用完时提交方等待，直到写入线程完成任务后释放
+        self.slots = defer.DeferredSemaphore(queue_size)
+        self.stats = stats
+        self.thread = None
+
+        # 统计信息
+        self.write_count = 0
+        self.total_latency = 0.0
+        self.max_latency = 0.0
+        self.max_queue_depth = 0
+
+    def start(self):
+        """启动写入线程"""
+        if self.thread and self.thread.is_alive():
+            return
+        self.thread = threading.Thread(target=self._run, name='db-writer', daemon=True)
+        self.thread.start()
+        logger.info(f"数据库写入线程启动，队列长度: {self.queue_size}")
+
+    def submit(self, func, *args):
+        """
+        提交写入任务（在反应器线程中调用）
+
+        Args:
+            func: 写入函数
+            *args: 写入函数参数
+
+        Returns:
+            Deferred: 写入完成后以写入函数返回值触发
+        """
+        d = defer.Deferred()
+        self._enqueue((func, args, d))
+        return d
+
+    def wait_for_space(self):
+        """
+        等待队列有空闲名额（在反应器线程中调用），供生产方在写入线程跟不上时暂停
+
+        Returns:
+            Deferred: 队列有空闲名额时触发
+        """
+        if self.slots.tokens > 0 and not self.slots.waiting:
+            return defer.succeed(None)
+        d = self.slots.acquire()
+        d.addCallback(lambda slots: slots.release())
+        return d
+
+    def stop(self):
+        """
+        停止写入线程，等待队列中的任务全部完成
+
+        Returns:
+            Deferred: 写入线程退出后触发
+        """
+        if not self.thread:
+            return defer.succeed(None)
+        # 结束标记排在所有等待入队的任务之后
+        d = self.slots.acquire()
+        d.addCallback(lambda _: self._put(None))
+        d.addCallback(lambda _: threads.deferToThread(self.thread.join))
+        return d
+
+    def get_stats(self):
+        """
+        获取写入统计信息
+
+        Returns:
+            dict: 统计信息
+        """
+        return {
+            'queue_depth': self.queue.qsize() + len(self.slots.waiting),
+            'max_queue_depth': self.max_queue_depth,
+            'write_count': self.write_count,
+            'avg_latency': self.total_latency / self.write_count if self.write_count else 0.0,
+            'max_latency': self.max_latency,
+        }
+
+    def _enqueue(self, task):
+        """任务入队，队列名额用完时等待写入线程释放名额"""
+        d = self.slots.acquire()
+        d.addCallback(lambda _: self._put(task))
+        self._update_queue_stats()
+
+    def _put(self, task):
+        """将已取得名额的任务放入队列"""
+        self.queue.put_nowait(task)
+        self._update_queue_stats()
+
+    def _run(self):
+        """写入线程主循环"""
+        while True:
+            task = self.queue.get()
+            if task is None:
+                break
+
+            func, args, d = task
+            start_time = time.monotonic()
+            try:
+                result = func(*args)
+            except Exception:
+                result = Failure()
+            latency = time.monotonic() - start_time
+            reactor.callFromThread(self._task_done, d, result, latency)
+
+    def _task_done(self, d, result, latency):
+        """写入任务完成回调（在反应器线程中执行）"""
+        self.write_count += 1
+        self.total_latency += latency
+        self.max_latency = max(self.max_latency, latency)
+
+        self.slots.release()
+        self._update_queue_stats()
+        if self.stats:
+            self.stats.inc_value('pipeline/db_writer/write_count')
+            self.stats.inc_value('pipeline/db_writer/write_latency_total', latency)
+            self.stats.max_value('pipeline/db_writer/write_latency_max', latency)
+
+        if isinstance(result, Failure):
+            d.errback(result)
+        else:
+            d.callback(result)
+
+    def _update_queue_stats(self):
+        """更新队列深度统计"""
+        depth = self.queue.qsize() + len(self.slots.waiting)
+        self.max_queue_depth = max(self.max_queue_depth, depth)
+        if self.stats:
+            self.stats.set_value('pipeline/db_writer/queue_depth', depth)
+            self.stats.max_value('pipeline/db_writer/queue_depth_max', depth)
@@ -5,13 +5,31 @@
 新闻数据处理管道
 """
 
+import time
 import logging
 import datetime
 from sqlalchemy.exc import SQLAlchemyError
+from twisted.internet import defer, reactor, task, threads
+from twisted.python.threadpool import ThreadPool
 
+from config.settings import PIPELINE_SETTINGS, SUMMARY_SETTINGS
 from database.db_handler import session_scope
 from database.models import News, NewsContent, NewsImage, Category, Tag
+from database.news_writer import (
+    dedupe_items,
+    upsert_news,
+    upsert_news_contents,
+    replace_news_tags,
+    increment_tag_frequencies,
+    load_simhash_index
+)
+from database.tag_cache import tag_cache
 from crawler.items import NewsItem, ImageItem, TagItem
+from crawler.pipelines.db_writer import DatabaseWriter
+from utils.category_resolver import category_resolver
+from utils.summarizer import summarizer
+from utils.simhash import SimHashIndex, to_signed
+from utils.url_filter import UrlSeenStore
 
 logger = logging.getLogger(__name__)
 
@@ -19,24 +37,119 @@ logger = logging.getLogger(__name__)
 class NeteaseNewsPipeline:
     """网易新闻数据处理管道"""
     
-    def __init__(self):
+    def __init__(self, stats=None):
         """初始化"""
         self.items_count = 0
         self.success_count = 0
         self.fail_count = 0
+        self.skipped_count = 0
+        # 批量写入设置
+        self.batch_size = PIPELINE_SETTINGS['batch_size']
+        self.flush_interval = PIPELINE_SETTINGS['flush_interval'] / 1000.0
+        self.news_buffer = []
+        self.last_flush_time = time.monotonic()
+        self.flush_task = None
+        # 尚未完成的摘要生成及写入
+        self.pending_flushes = set()
+        # 数据库写入线程
+        self.writer = DatabaseWriter(PIPELINE_SETTINGS['queue_size'], stats)
+        # 摘要生成线程池，与反应器线程池（DNS解析等）分开
+        self.summary_pool = ThreadPool(1, SUMMARY_SETTINGS['threads'], name='summarizer')
+        self.stats = stats
+        # 近似重复检测（索引只在写入线程中访问）
+        self.simhash_index = SimHashIndex(max_distance=PIPELINE_SETTINGS['near_duplicate_distance'])
+        self.near_duplicate_action = PIPELINE_SETTINGS['near_duplicate_action']
+        self.near_duplicate_count = 0
+        # 当前爬虫，写入成功后记录到其已爬取URL存储和增量爬取状态存储
+        self.spider = None
+    
+    @classmethod
+    def from_crawler(cls, crawler):
+        """从爬虫创建管道"""
+        return cls(stats=crawler.stats)
     
     def process_item(self, item, spider):
-        """处理数据项"""
+        """处理数据项，数据库写入在写入线程中执行"""
         if isinstance(item, NewsItem):
-            return self._process_news_item(item, spider)
+            # 补全缺失的分类
+            if not item.get('category_id'):
+                item['category_id'], item['category_name'] = category_resolver.resolve(item['url'])
+            if self.batch_size > 1:
+                return self._buffer_news_item(item, spider)
+            d = self._summarize([item])
+            d.addCallback(lambda _: self._submit(self._process_news_item, item, spider))
+            return d
         elif isinstance(item, ImageItem):
-            return self._process_image_item(item, spider)
+            return self._submit(self._process_image_item, item, spider)
         elif isinstance(item, TagItem):
-            return self._process_tag_item(item, spider)
+            return self._submit(self._process_tag_item, item, spider)
         return item
     
+    def _submit(self, func, item, spider):
+        """提交写入任务，写入完成后返回数据项"""
+        d = self.writer.submit(func, item, spider)
+        d.addCallback(lambda _: item)
+        return d
+    
+    def _count(self, success=0, fail=0, skipped=0, near_duplicates=0):
+        """累加处理计数（在反应器线程中执行，写入线程通过 reactor.callFromThread 调用）"""
+        self.items_count += success + fail + skipped
+        self.success_count += success
+        self.fail_count += fail
+        self.skipped_count += skipped
+        self.near_duplicate_count += near_duplicates
+    
+    def _mark_stored(self, items):
+        """记录已写入新闻的请求URL和验证信息（在反应器线程中执行，写入线程通过 reactor.callFromThread 调用）"""
+        # 增量爬取状态存储由中间件在 spider_opened 时挂到爬虫上，晚于管道启动
+        seen_urls = getattr(self.spider, 'seen_urls', None)
+        crawl_state = getattr(self.spider, 'crawl_state', None)
+        for item in items:
+            if seen_urls is not None:
+                seen_urls.add(item.get('request_url') or item['url'])
+            if crawl_state is not None and item.get('crawl_validators'):
+                crawl_state.set(**item['crawl_validators'])
+    
+    def _summarize(self, items):
+        """在摘要线程池中批量生成摘要，不占用反应器线程及其线程池"""
+        d = threads.deferToThreadPool(reactor, self.summary_pool, summarizer.summarize_items, items)
+        d.addErrback(lambda failure: logger.error(f"批量生成摘要失败: {failure.getErrorMessage()}"))
+        return d
+    
+    def _find_near_duplicate(self, item):
+        """
+        在已入库的新闻中查找近似重复
+        
+        Args:
+            item: 新闻数据项
+            
+        Returns:
+            int: 原始新闻ID，不存在时返回None
+        """
+        if item.get('simhash') is None:
+            return None
+        return self.simhash_index.find(item['simhash'], UrlSeenStore.url_hash(item['url']))
+    
+    def _index_news(self, item, news_id):
+        """将已写入的原始新闻加入近似重复索引，替换同一URL之前的指纹"""
+        key = UrlSeenStore.url_hash(item['url'])
+        if item.get('simhash') is not None and not item.get('duplicate_of'):
+            self.simhash_index.add(item['simhash'], news_id, key)
+        else:
+            self.simhash_index.remove(key)
+    
     def _process_news_item(self, item, spider):
         """处理新闻数据项"""
+        original_id = self._find_near_duplicate(item)
+        if original_id is not None:
+            if self.near_duplicate_action == 'skip':
+                logger.info(f"跳过近似重复新闻: {item['url']}，原始新闻ID: {original_id}")
+                reactor.callFromThread(self._count, skipped=1, near_duplicates=1)
+                reactor.callFromThread(self._mark_stored, [item])
+                return item
+            reactor.callFromThread(self._count, near_duplicates=1)
+            item['duplicate_of'] = original_id
+        
         try:
             with session_scope() as session:
                 # 检查新闻是否已存在
@@ -45,8 +158,9 @@ class NeteaseNewsPipeline:
                     logger.info(f"新闻已存在，更新数据: {item['url']}")
                     # 更新新闻基本信息
                     for key, value in item.items():
-                        if key not in ['content', 'content_html', 'summary', 'keywords', 'images', 'tags']:
+                        if key not in ['content', 'content_html', 'summary', 'keywords', 'images', 'tags', 'simhash', 'request_url', 'crawl_validators']:
                             setattr(existing_news, key, value)
+                    existing_news.simhash = to_signed(item.get('simhash'))
                     
                     # 更新新闻内容
                     if existing_news.content and all(k in item for k in ['content', 'content_html', 'summary', 'keywords']):
@@ -57,7 +171,7 @@ class NeteaseNewsPipeline:
                     
                     # 处理标签
                     if 'tags' in item and item['tags']:
-                        self._process_news_tags(session, existing_news, item['tags'])
+                        self._process_news_tags(session, {existing_news.id: item['tags']})
                     
                     news = existing_news
                 else:
@@ -78,7 +192,9 @@ class NeteaseNewsPipeline:
                         view_count=item.get('view_count', 0),
                         comment_count=item.get('comment_count', 0),
                         like_count=item.get('like_count', 0),
-                        status=item.get('status', 1)
+                        status=item.get('status', 1),
+                        simhash=to_signed(item.get('simhash')),
+                        duplicate_of=item.get('duplicate_of')
                     )
                     session.add(news)
                     session.flush()  # 获取新闻ID
@@ -96,19 +212,130 @@ class NeteaseNewsPipeline:
                     
                     # 处理标签
                     if 'tags' in item and item['tags']:
-                        self._process_news_tags(session, news, item['tags'])
+                        self._process_news_tags(session, {news.id: item['tags']})
                 
                 # 提交事务
                 session.commit()
-                self.success_count += 1
-                self.items_count += 1
+                self._index_news(item, news.id)
+                reactor.callFromThread(self._count, success=1)
+                reactor.callFromThread(self._mark_stored, [item])
                 return item
         except SQLAlchemyError as e:
             logger.error(f"处理新闻数据失败: {str(e)}")
-            self.fail_count += 1
-            self.items_count += 1
+            reactor.callFromThread(self._count, fail=1)
             return item
     
+    def _buffer_news_item(self, item, spider):
+        """缓存新闻数据项，达到批量条数后批量写入"""
+        self.news_buffer.append(dict(item))
+        
+        if len(self.news_buffer) < self.batch_size:
+            # 写入队列已满时等待，暂停产生新的数据项
+            d = self.writer.wait_for_space()
+            d.addCallback(lambda _: item)
+            return d
+        
+        # 触发写入的数据项等待本批次写入完成，形成背压
+        d = self._flush_news_buffer()
+        d.addCallback(lambda _: item)
+        return d
+    
+    def _flush_news_buffer(self):
+        """提交缓存的新闻数据项到写入线程"""
+        self.last_flush_time = time.monotonic()
+        if not self.news_buffer:
+            return defer.succeed(None)
+        
+        batch = self.news_buffer
+        self.news_buffer = []
+        d = self._summarize(batch)
+        d.addCallback(lambda _: self.writer.submit(self._write_news_batch, batch))
+        self.pending_flushes.add(d)
+        d.addBoth(self._flush_done, d)
+        return d
+    
+    def _flush_done(self, result, d):
+        """批次写入完成后移出待完成列表"""
+        self.pending_flushes.discard(d)
+        return result
+    
+    def _flush_if_expired(self):
+        """缓存等待时间超过上限时写入，定时任务等待本批次写入完成后再继续"""
+        if time.monotonic() - self.last_flush_time >= self.flush_interval:
+            d = self._flush_news_buffer()
+            d.addErrback(lambda failure: logger.error(f"定时批量写入失败: {failure.getErrorMessage()}"))
+            return d
+    
+    def _split_near_duplicates(self, items):
+        """
+        区分原始新闻和近似重复新闻，同时检查已入库新闻和本批次内的新闻
+        
+        Args:
+            items: 新闻数据项列表
+            
+        Returns:
+            tuple: (原始新闻列表, [(近似重复新闻, 原始新闻ID, 原始新闻URL)])
+        """
+        originals = []
+        duplicates = []
+        batch_index = SimHashIndex(max_distance=self.simhash_index.max_distance)
+        for item in items:
+            original_id = self._find_near_duplicate(item)
+            if original_id is not None:
+                duplicates.append((item, original_id, None))
+                continue
+            if item.get('simhash') is not None:
+                key = UrlSeenStore.url_hash(item['url'])
+                position = batch_index.find(item['simhash'], key)
+                if position is not None:
+                    duplicates.append((item, None, originals[position]['url']))
+                    continue
+                batch_index.add(item['simhash'], len(originals), key)
+            originals.append(item)
+        return originals, duplicates
+    
+    def _write_news_batch(self, batch):
+        """批量写入新闻数据项（在写入线程中执行）"""
+        items, duplicates = self._split_near_duplicates(dedupe_items(batch))
+        near_duplicates = len(duplicates)
+        skipped = []
+        if duplicates and self.near_duplicate_action == 'skip':
+            logger.info(f"跳过近似重复新闻 {len(duplicates)} 条")
+            skipped = [item for item, _, _ in duplicates]
+            duplicates = []
+        
+        try:
+            with session_scope() as session:
+                # 批量写入新闻，近似重复新闻在原始新闻之后写入以关联其ID
+                news_ids = upsert_news(session, items)
+                for item, original_id, original_url in duplicates:
+                    item['duplicate_of'] = original_id or news_ids.get(original_url)
+                news_ids.update(upsert_news(session, [item for item, _, _ in duplicates]))
+                items = items + [item for item, _, _ in duplicates]
+                
+                # 批量写入内容
+                upsert_news_contents(session, items, news_ids)
+                
+                # 批量处理标签
+                self._process_news_tags(session, {
+                    news_ids[item['url']]: item['tags']
+                    for item in items if item.get('tags') and item['url'] in news_ids
+                })
+            
+            for item in items:
+                if item['url'] in news_ids:
+                    self._index_news(item, news_ids[item['url']])
+            
+            logger.info(f"批量写入新闻 {len(items)} 条")
+            # 只有实际写入的新闻计为成功，跳过的近似重复新闻及同批次中被覆盖的同URL新闻计为跳过
+            written = [item for item in items if item['url'] in news_ids]
+            reactor.callFromThread(self._count, success=len(written), skipped=len(batch) - len(written),
+                                   near_duplicates=near_duplicates)
+            reactor.callFromThread(self._mark_stored, written + skipped)
+        except SQLAlchemyError as e:
+            logger.error(f"批量写入新闻失败: {str(e)}")
+            reactor.callFromThread(self._count, fail=len(batch), near_duplicates=near_duplicates)
+    
     def _process_image_item(self, item, spider):
         """处理图片数据项"""
         try:
@@ -153,13 +380,11 @@ class NeteaseNewsPipeline:
                 
                 # 提交事务
                 session.commit()
-                self.success_count += 1
-                self.items_count += 1
+                reactor.callFromThread(self._count, success=1)
                 return item
         except SQLAlchemyError as e:
             logger.error(f"处理图片数据失败: {str(e)}")
-            self.fail_count += 1
-            self.items_count += 1
+            reactor.callFromThread(self._count, fail=1)
             return item
     
     def _process_tag_item(self, item, spider):
@@ -188,48 +413,92 @@ class NeteaseNewsPipeline:
                 
                 # 提交事务
                 session.commit()
-                self.success_count += 1
-                self.items_count += 1
+                reactor.callFromThread(self._count, success=1)
                 return item
         except SQLAlchemyError as e:
             logger.error(f"处理标签数据失败: {str(e)}")
-            self.fail_count += 1
-            self.items_count += 1
+            reactor.callFromThread(self._count, fail=1)
             return item
     
-    def _process_news_tags(self, session, news, tag_names):
-        """处理新闻标签关联"""
-        # 清空现有标签关联
-        news.tags = []
+    def _process_news_tags(self, session, news_tags):
+        """
+        批量处理新闻标签关联
         
-        # 添加新标签关联
-        for tag_name in tag_names:
-            # 查找或创建标签
-            tag = session.query(Tag).filter(Tag.name == tag_name).first()
-            if not tag:
-                tag = Tag(
-                    name=tag_name,
-                    frequency=1,
-                    create_time=datetime.datetime.now(),
-                    update_time=datetime.datetime.now()
-                )
-                session.add(tag)
-                session.flush()
-            else:
-                # 更新标签频率
-                tag.frequency += 1
-                tag.update_time = datetime.datetime.now()
-            
-            # 添加关联
-            news.tags.append(tag)
+        Args:
+            session: 数据库会话
+            news_tags: 新闻ID到标签名称列表的映射
+        """
+        counts = replace_news_tags(session, news_tags)
+        increment_tag_frequencies(session, counts)
+    
+    def _warm_tag_cache(self):
+        """预热标签缓存（在写入线程中执行）"""
+        try:
+            with session_scope() as session:
+                tag_cache.warm(session)
+        except SQLAlchemyError as e:
+            logger.error(f"标签缓存预热失败: {str(e)}")
+    
+    def _load_simhash_index(self):
+        """加载近似重复索引（在写入线程中执行）"""
+        try:
+            with session_scope() as session:
+                load_simhash_index(session, self.simhash_index)
+        except SQLAlchemyError as e:
+            logger.error(f"近似重复索引加载失败: {str(e)}")
     
     def open_spider(self, spider):
         """爬虫开始时的回调"""
         logger.info("新闻数据处理管道启动")
         self.start_time = datetime.datetime.now()
+        self.spider = spider
+        self.writer.start()
+        self.summary_pool.start()
+        self.writer.submit(self._warm_tag_cache)
+        self.writer.submit(self._load_simhash_index)
+        
+        # 定时写入未满批次的缓存数据
+        if self.batch_size > 1:
+            self.flush_task = task.LoopingCall(self._flush_if_expired)
+            self.flush_task.start(self.flush_interval, now=False)
     
     def close_spider(self, spider):
         """爬虫结束时的回调"""
+        if self.flush_task and self.flush_task.running:
+            self.flush_task.stop()
+        
+        # 写入剩余的缓存数据，等待摘要生成及写入线程结束
+        self._flush_news_buffer()
+        d = defer.DeferredList(list(self.pending_flushes))
+        d.addCallback(lambda _: self.writer.stop())
+        d.addCallback(lambda _: self._close_summarizer())
+        d.addCallback(lambda _: self._log_summary())
+        return d
+    
+    def _close_summarizer(self):
+        """停止摘要线程池并关闭摘要缓存"""
+        self.summary_pool.stop()
+        if summarizer.cache:
+            summarizer.cache.close()
+    
+    def _log_summary(self):
+        """输出管道统计信息"""
         end_time = datetime.datetime.now()
         duration = (end_time - self.start_time).total_seconds()
-        logger.info(f"新闻数据处理管道关闭，处理项目数: {self.items_count}，成功: {self.success_count}，失败: {self.fail_count}，耗时: {duration}秒") 
\ No newline at end of file
+        logger.info(f"新闻数据处理管道关闭，处理项目数: {self.items_count}，成功: {self.success_count}，失败: {self.fail_count}，跳过: {self.skipped_count}，耗时: {duration}秒")
+        
+        writer_stats = self.writer.get_stats()
+        logger.info(f"数据库写入统计，写入次数: {writer_stats['write_count']}，最大队列深度: {writer_stats['max_queue_depth']}，"
+                    f"平均延迟: {writer_stats['avg_latency'] * 1000:.1f}毫秒，最大延迟: {writer_stats['max_latency'] * 1000:.1f}毫秒")
+        
+        cache_stats = tag_cache.get_stats()
+        logger.info(f"标签缓存统计，缓存数: {cache_stats['size']}，命中率: {cache_stats['hit_rate']:.2%}")
+        
+        logger.info(f"近似重复新闻: {self.near_duplicate_count} 条，处理方式: {self.near_duplicate_action}，"
+                    f"索引指纹数: {len(self.simhash_index)}")
+        if self.stats:
+            self.stats.set_value('pipeline/near_duplicate/count', self.near_duplicate_count)
+        
+        summary_stats = summarizer.cache.get_stats()
+        logger.info(f"摘要缓存统计，命中: {summary_stats['hits']}，未命中: {summary_stats['misses']}，"
+                    f"命中率: {summary_stats['hit_rate']:.2%}，CPU超时: {summarizer.timeouts}") 
\ No newline at end of file
@@ -9,15 +9,21 @@ import re
 import json
 import logging
 import datetime
-from urllib.parse import urljoin, urlparse
+from urllib.parse import urljoin
 
 import scrapy
 from scrapy.linkextractors import LinkExtractor
 from scrapy.spiders import CrawlSpider, Rule
-from bs4 import BeautifulSoup
 
 from config.settings import NEWS_CATEGORIES, CRAWLER_SETTINGS
-from crawler.items import NewsItem, ImageItem, TagItem
+from crawler.items import NewsItem, ImageItem
+from database.db_handler import session_scope
+from utils.url_filter import UrlSeenStore
+from utils.simhash import simhash
+from utils.article_extractor import ArticleExtractor
+from utils.selector_cache import SelectorCache
+from utils.category_resolver import category_resolver
+from utils.date_parser import parse_datetime, parse_url_datetime
 
 logger = logging.getLogger(__name__)
 
@@ -67,7 +73,8 @@ class NeteaseNewsSpider(CrawlSpider):
                 )
             ),
             callback='parse_news',
-            follow=True
+            follow=True,
+            process_links='filter_seen_links'
         ),
         # 分页规则 - 更新以匹配更多的分页模式
         Rule(
@@ -113,8 +120,78 @@ class NeteaseNewsSpider(CrawlSpider):
         self.pages_processed = 0
         self.news_found = 0
         self.news_processed = 0
-        # 添加已处理URL集合，避免重复处理
-        self.processed_urls = set()
+        self.news_skipped = 0
+        self.news_unchanged = 0
+        self.pages_unchanged = 0
+        # 本次运行已调度URL的哈希，避免重复处理
+        self.scheduled_urls = set()
+        # 持久化的已入库新闻URL，增量运行时跳过
+        self.seen_filter_enabled = CRAWLER_SETTINGS['seen_filter_enabled']
+        self.seen_urls = UrlSeenStore(CRAWLER_SETTINGS['seen_store_path'])
+        if self.seen_filter_enabled:
+            self._load_seen_urls()
+        # 分类解析器（域名查表 + 路径最长前缀匹配）
+        self.category_resolver = category_resolver
+        # 按站点模板学习的选择器缓存
+        self.selector_cache = SelectorCache(CRAWLER_SETTINGS['selector_cache_path']).load()
+    
+    def _load_seen_urls(self):
+        """加载已入库新闻URL，并导入上次运行后新增的URL"""
+        self.seen_urls.load()
+        try:
+            with session_scope() as session:
+                self.seen_urls.seed_from_db(session)
+        except Exception as e:
+            logger.error(f"从数据库导入已爬取URL失败: {str(e)}")
+    
+    def _has_crawl_state(self, url):
+        """
+        增量模式下URL是否已保存验证信息，已保存的页面发送条件请求重新验证
+        
+        Args:
+            url: URL
+            
+        Returns:
+            bool: 是否已保存验证信息
+        """
+        # 增量爬取状态存储由条件请求中间件在 spider_opened 时挂到爬虫上，未启用增量模式时不存在
+        crawl_state = getattr(self, 'crawl_state', None)
+        return crawl_state is not None and crawl_state.get(url) is not None
+    
+    def _save_crawl_validators(self, response):
+        """列表页和专题页解析完成后保存验证信息，下次运行时发送条件请求"""
+        crawl_state = getattr(self, 'crawl_state', None)
+        validators = response.meta.get('crawl_validators')
+        if crawl_state is not None and validators:
+            crawl_state.set(**validators)
+    
+    def _should_schedule(self, url, is_news=True):
+        """
+        判断URL是否需要调度
+        
+        Args:
+            url: URL
+            is_news: 是否为新闻页面，新闻页面会跳过已入库的URL（增量模式下已保存验证信息的除外）
+            
+        Returns:
+            bool: 是否需要调度
+        """
+        url_hash = UrlSeenStore.url_hash(url)
+        if url_hash in self.scheduled_urls:
+            return False
+        self.scheduled_urls.add(url_hash)
+        
+        if is_news and self.seen_filter_enabled and self.seen_urls.contains_hash(url_hash) \
+                and not self._has_crawl_state(url):
+            self.news_skipped += 1
+            return False
+        return True
+    
+    def filter_seen_links(self, links):
+        """过滤规则提取到的已入库新闻链接（增量模式下已保存验证信息的除外）"""
+        if not self.seen_filter_enabled:
+            return links
+        return [link for link in links if link.url not in self.seen_urls or self._has_crawl_state(link.url)]
     
     def start_requests(self):
         """开始请求"""
@@ -128,6 +205,12 @@ class NeteaseNewsSpider(CrawlSpider):
         self.pages_processed += 1
         logger.info(f"正在解析页面[{self.pages_processed}]: {response.url}")
         
+        # 增量模式下内容未变化的列表页无需重新解析
+        if response.meta.get('content_unchanged'):
+            self.pages_unchanged += 1
+            logger.info(f"列表页内容未变化，跳过解析: {response.url}")
+            return
+        
         # 提取新闻链接 - 更新选择器以匹配当前网站结构
         news_links = response.css('a.news-item-title::attr(href), a.news-title::attr(href), a.title::attr(href), a.data-title::attr(href), div.news_title a::attr(href), h3.title a::attr(href), div.titleBar a::attr(href), a.article-link::attr(href), div.news_item a::attr(href), div.ndi_main a::attr(href), div.news_title h3 a::attr(href), div.item_top h2 a::attr(href), div.news-item h3 a::attr(href), ul.cm_ul li a::attr(href), div.data_row a::attr(href), div.news_hot_list a::attr(href), div.hot_list a::attr(href), div.news-list a::attr(href), div.list-item a::attr(href), div.item h2 a::attr(href), div.content a::attr(href)').getall()
         logger.info(f"使用主选择器找到 {len(news_links)} 个链接")
@@ -147,8 +230,7 @@ class NeteaseNewsSpider(CrawlSpider):
                 link = urljoin(response.url, link)
             
             # 过滤链接
-            if any(domain in link for domain in self.allowed_domains) and link not in self.processed_urls:
-                self.processed_urls.add(link)
+            if any(domain in link for domain in self.allowed_domains) and self._should_schedule(link):
                 self.news_found += 1
                 logger.info(f"发现有效新闻链接[{self.news_found}]: {link}")
                 yield scrapy.Request(link, callback=self.parse_news)
@@ -168,15 +250,21 @@ class NeteaseNewsSpider(CrawlSpider):
                 link = urljoin(response.url, link)
             
             # 过滤链接，只保留网易域名下的链接
-            if any(domain in link for domain in self.allowed_domains) and link not in self.processed_urls:
-                self.processed_urls.add(link)
+            if any(domain in link for domain in self.allowed_domains) and self._should_schedule(link, is_news=False):
                 logger.info(f"发现新闻列表页链接: {link}")
                 yield scrapy.Request(link, callback=self.parse)
+        
+        self._save_crawl_validators(response)
     
     def parse_special_page(self, response):
         """解析专题页面，提取新闻链接"""
         logger.info(f"正在解析专题页面: {response.url}")
         
+        if response.meta.get('content_unchanged'):
+            self.pages_unchanged += 1
+            logger.info(f"专题页面内容未变化，跳过解析: {response.url}")
+            return
+        
         # 提取专题页面中的新闻链接
         news_links = response.css('a::attr(href)').getall()
         news_links = [link for link in news_links if re.search(r'.*\.163\.com/.*\.html', link)]
@@ -185,28 +273,37 @@ class NeteaseNewsSpider(CrawlSpider):
             if not link.startswith(('http://', 'https://')):
                 link = urljoin(response.url, link)
             
-            if any(domain in link for domain in self.allowed_domains) and link not in self.processed_urls:
-                self.processed_urls.add(link)
+            if any(domain in link for domain in self.allowed_domains) and self._should_schedule(link):
                 self.news_found += 1
                 logger.info(f"从专题页面发现新闻链接[{self.news_found}]: {link}")
                 yield scrapy.Request(link, callback=self.parse_news)
+        
+        self._save_crawl_validators(response)
     
     def parse_news(self, response):
         """解析新闻页面"""
         self.news_processed += 1
         logger.info(f"正在解析新闻页面[{self.news_processed}]: {response.url}")
         
+        # 增量模式下内容未变化的页面无需重新解析
+        if response.meta.get('content_unchanged'):
+            self.news_unchanged += 1
+            logger.info(f"新闻内容未变化，跳过解析: {response.url}")
+            return
+        
         # 创建新闻项
         news_item = NewsItem()
         news_item['url'] = response.url
+        news_item['request_url'] = response.meta.get('redirect_urls', [response.url])[0]
+        news_item['crawl_validators'] = response.meta.get('crawl_validators')
         news_item['crawl_time'] = self.crawl_time
         news_item['spider_name'] = self.name
         
-        # 解析标题 - 更新选择器以匹配当前网站结构
-        title = response.css('h1.post_title::text, h1.title::text, h1.article-title::text, h1.main-title::text, div.article-header h1::text, h1.headline::text, h1.news_title::text, h1.art_tit::text, h1.main_title::text, h1.page_title::text').get()
-        if not title:
-            title = response.xpath('//h1[contains(@class, "title") or contains(@class, "post_title") or contains(@class, "headline") or contains(@class, "news_title")]/text()').get()
-        news_item['title'] = title.strip() if title else ''
+        # 在Scrapy已构建的lxml文档树上一次提取所有字段
+        article = ArticleExtractor(response.selector.root, response.url, self.selector_cache).extract()
+        
+        # 解析标题
+        news_item['title'] = article['title']
         logger.info(f"解析到标题: {news_item['title']}")
         
         # 如果没有找到标题，可能不是新闻页面，跳过处理
@@ -214,150 +311,46 @@ class NeteaseNewsSpider(CrawlSpider):
             logger.warning(f"未找到标题，可能不是新闻页面: {response.url}")
             return
         
-        # 解析副标题
-        subtitle = response.css('div.post_subtitle::text, div.sub-title::text, div.article-subtitle::text, div.sub_title::text, div.subtitle::text, p.summary::text').get()
-        news_item['subtitle'] = subtitle.strip() if subtitle else ''
-        
-        # 解析来源
-        source = response.css('div.post_info a.source::text, div.post_info span.source::text, div.article-source a::text, span.source::text, a.source::text, div.info a.source::text, div.info span.source::text, div.from a::text, div.from span::text, div.article_info span.source::text, div.article_info a.source::text').get()
-        news_item['source'] = source.strip() if source else ''
+        # 副标题、来源、作者
+        news_item['subtitle'] = article['subtitle']
+        news_item['source'] = article['source']
+        news_item['author'] = article['author']
         
-        # 解析作者
-        author = response.css('div.post_author::text, div.author::text, span.author::text, div.article-author::text, div.info span.author::text, div.info a.author::text, div.article_info span.author::text, div.article_info a.author::text').get()
-        news_item['author'] = author.strip() if author else ''
-        
-        # 解析发布时间
-        publish_time = response.css('div.post_info span.post_time::text, div.post_info time::text, span.time::text, span.publish-time::text, div.article-info span.date::text, div.info span.time::text, div.info time::text, div.from span.time::text, div.from time::text, div.article_info span.time::text, div.article_info time::text').get()
-        if publish_time:
-            try:
-                # 尝试多种日期格式
-                for date_format in ['%Y-%m-%d %H:%M:%S', '%Y-%m-%d %H:%M', '%Y年%m月%d日 %H:%M:%S', '%Y年%m月%d日 %H:%M']:
-                    try:
-                        news_item['publish_time'] = datetime.datetime.strptime(publish_time.strip(), date_format)
-                        break
-                    except ValueError:
-                        continue
-                if 'publish_time' not in news_item:
-                    news_item['publish_time'] = self.crawl_time
-            except Exception as e:
-                logger.error(f"解析发布时间失败: {str(e)}")
-                news_item['publish_time'] = self.crawl_time
-        else:
-            news_item['publish_time'] = self.crawl_time
+        # 解析发布时间，页面中未找到时尝试从URL中提取
+        news_item['publish_time'] = (
+            parse_datetime(article['publish_time'], self.crawl_time)
+            or parse_url_datetime(response.url)
+            or self.crawl_time
+        )
         
         # 解析分类
-        category_name = None
-        for category in NEWS_CATEGORIES:
-            if category['url'] in response.url:
-                news_item['category_id'] = category['id']
-                news_item['category_name'] = category['name']
-                category_name = category['name']
-                break
+        news_item['category_id'], news_item['category_name'] = self.category_resolver.resolve(response.url)
         
-        if not category_name:
-            # 尝试从URL中提取分类
-            url_parts = urlparse(response.url).netloc.split('.')
-            if len(url_parts) > 0 and url_parts[0] != 'www' and url_parts[0] != 'news':
-                category_name = url_parts[0]
-                # 映射常见分类
-                category_map = {
-                    'money': '财经',
-                    'ent': '娱乐',
-                    'sports': '体育',
-                    'tech': '科技',
-                    'house': '房产',
-                    'auto': '汽车',
-                    'war': '军事',
-                    'travel': '旅游',
-                    'dy': '订阅',
-                    'gov': '政务',
-                    'edu': '教育',
-                    'jiankang': '健康',
-                    'caipiao': '彩票',
-                    'lady': '女性',
-                    'mobile': '手机',
-                    'data': '数据'
-                }
-                if category_name in category_map:
-                    category_name = category_map[category_name]
-                    # 查找对应的分类ID
-                    for category in NEWS_CATEGORIES:
-                        if category['name'] == category_name:
-                            news_item['category_id'] = category['id']
-                            news_item['category_name'] = category_name
-                            break
-                    if 'category_id' not in news_item:
-                        news_item['category_id'] = 99  # 其他分类
-                        news_item['category_name'] = category_name
+        # 解析内容
+        if article['content_html']:
+            news_item['content'] = article['content']
+            news_item['simhash'] = simhash(article['content'])
+            news_item['content_html'] = article['content_html']
             
-            # 如果仍未找到分类，设为默认
-            if 'category_id' not in news_item:
-                news_item['category_id'] = 1
-                news_item['category_name'] = '头条'
-        
-        # 解析内容 - 更新选择器以匹配当前网站结构
-        content_html = response.css('div.post_body, div.post_text, div.article-content, div.main-content, article.article-content, div.content, div.article, div.news_txt, div.article_content, div.main_content, div.end_content').get()
-        
-        if content_html:
-            # 使用BeautifulSoup解析HTML内容
-            soup = BeautifulSoup(content_html, 'lxml')
-            
-            # 提取纯文本内容
-            content = soup.get_text(strip=True)
-            news_item['content'] = content
-            news_item['content_html'] = content_html
-            
-            # 提取摘要
-            summary = content[:200] + '...' if len(content) > 200 else content
-            news_item['summary'] = summary
+            # 摘要在数据管道中批量生成
+            news_item['summary'] = ''
             
             # 提取关键词
-            keywords = response.css('meta[name="keywords"]::attr(content)').get()
-            news_item['keywords'] = keywords if keywords else ''
+            news_item['keywords'] = article['keywords']
             
-            # 提取图片
+            # 提取图片（只保存基本信息，不下载）
             images = []
-            img_tags = soup.find_all('img')
-            for i, img in enumerate(img_tags):
-                img_url = img.get('src', '')
-                if not img_url:
-                    continue
-                
-                # 处理相对URL
-                if not img_url.startswith(('http://', 'https://')):
-                    img_url = urljoin(response.url, img_url)
-                
-                # 创建图片项（只保存基本信息，不下载）
-                image_info = {
-                    'url': img_url,
-                    'news_url': response.url,
-                    'title': img.get('alt', ''),
-                    'description': img.get('title', ''),
-                    'is_cover': (i == 0),  # 第一张图片作为封面
-                    'position': i
-                }
-                
+            for image_info in article['images']:
+                image_info['news_url'] = response.url
                 images.append(image_info)
             
             news_item['images'] = images
             logger.info(f"解析到 {len(images)} 张图片")
             
             # 提取相关新闻链接
-            related_links = []
-            related_elements = soup.select('div.related_news a, div.related a, div.relative_news a, div.relevant a, div.correlation a, div.related-news a, div.news-related a')
-            for related in related_elements:
-                related_link = related.get('href', '')
-                if not related_link:
-                    continue
-                
-                # 处理相对URL
-                if not related_link.startswith(('http://', 'https://')):
-                    related_link = urljoin(response.url, related_link)
-                
+            for related_link in article['related_links']:
                 # 过滤链接
-                if any(domain in related_link for domain in self.allowed_domains) and related_link not in self.processed_urls:
-                    related_links.append(related_link)
-                    self.processed_urls.add(related_link)
+                if any(domain in related_link for domain in self.allowed_domains) and self._should_schedule(related_link):
                     self.news_found += 1
                     logger.info(f"发现相关新闻链接[{self.news_found}]: {related_link}")
                     yield scrapy.Request(related_link, callback=self.parse_news)
@@ -371,27 +364,12 @@ class NeteaseNewsSpider(CrawlSpider):
             news_item['images'] = []
         
         # 解析标签
-        tags = []
-        tag_elements = response.css('div.post_tags a::text, div.article-tags a::text, div.tags a::text, div.tag a::text, div.keywords a::text, div.key_word a::text').getall()
-        if tag_elements:
-            for tag_name in tag_elements:
-                tag_name = tag_name.strip()
-                if tag_name:
-                    # 创建标签项
-                    tag_item = TagItem()
-                    tag_item['name'] = tag_name
-                    tag_item['news_urls'] = [response.url]
-                    
-                    tags.append(tag_name)
-        
-        news_item['tags'] = tags
+        news_item['tags'] = article['tags']
         
         # 解析统计信息
-        view_count_text = response.css('div.post_info span.post_view::text, span.view-count::text, span.views::text, span.view::text, span.read::text, span.read-count::text').get()
-        if view_count_text:
-            view_count_match = re.search(r'\d+', view_count_text)
-            if view_count_match:
-                news_item['view_count'] = int(view_count_match.group())
+        view_count_match = re.search(r'\d+', article['view_count'])
+        if view_count_match:
+            news_item['view_count'] = int(view_count_match.group())
         
         # 设置默认值
         news_item.setdefault('view_count', 0)
@@ -403,13 +381,28 @@ class NeteaseNewsSpider(CrawlSpider):
         news_item.setdefault('status', 1)
         
         # 直接输出新闻项
+        # 已爬取URL在数据管道写入成功后记录
         logger.info(f"成功解析新闻: {news_item['title']}")
         yield news_item
     
     def closed(self, reason):
         """爬虫关闭时的回调"""
         logger.info(f"爬虫关闭，原因: {reason}")
-        logger.info(f"页面处理数: {self.pages_processed}, 发现新闻链接数: {self.news_found}, 处理新闻数: {self.news_processed}")
+        logger.info(f"页面处理数: {self.pages_processed}, 发现新闻链接数: {self.news_found}, 处理新闻数: {self.news_processed}, 跳过已入库新闻数: {self.news_skipped}, 内容未变化新闻数: {self.news_unchanged}, 内容未变化列表页数: {self.pages_unchanged}")
+        
+        # 保存选择器缓存并输出命中率
+        self.selector_cache.log_stats()
+        try:
+            self.selector_cache.save()
+        except OSError as e:
+            logger.error(f"保存选择器缓存失败: {str(e)}")
+        
+        # 保存已爬取URL
+        if self.seen_filter_enabled:
+            try:
+                self.seen_urls.save()
+            except Exception as e:
+                logger.error(f"保存已爬取URL失败: {str(e)}")
         end_time = datetime.datetime.now()
         duration = (end_time - self.crawl_time).total_seconds()
         logger.info(f"爬虫运行时间: {duration}秒") 
\ No newline at end of file
@@ -7,9 +7,10 @@
 
 import logging
 from contextlib import contextmanager
-from sqlalchemy import create_engine, text
+from sqlalchemy import create_engine, text, inspect
 from sqlalchemy.orm import sessionmaker, scoped_session
 from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.schema import CreateColumn
 
 from config.db_config import (
     SQLALCHEMY_DATABASE_URI,
@@ -67,6 +68,32 @@ class DatabaseHandler:
             logger.error(f"数据库表创建失败: {str(e)}")
             raise
     
+    def upgrade_tables(self):
+        """为已存在的表补充模型中新增的字段和索引"""
+        try:
+            inspector = inspect(self.engine)
+            existing_tables = set(inspector.get_table_names())
+            with self.engine.begin() as conn:
+                for table in Base.metadata.sorted_tables:
+                    if table.name not in existing_tables:
+                        continue
+                    existing_columns = {column['name'] for column in inspector.get_columns(table.name)}
+                    for column in table.columns:
+                        if column.name in existing_columns:
+                            continue
+                        ddl = CreateColumn(column).compile(dialect=self.engine.dialect)
+                        conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {ddl}"))
+                        logger.info(f"数据库表 {table.name} 新增字段: {column.name}")
+                    existing_indexes = {index['name'] for index in inspector.get_indexes(table.name)}
+                    for index in table.indexes:
+                        if index.name in existing_indexes:
+                            continue
+                        index.create(bind=conn)
+                        logger.info(f"数据库表 {table.name} 新增索引: {index.name}")
+        except SQLAlchemyError as e:
+            logger.error(f"数据库表升级失败: {str(e)}")
+            raise
+    
     def drop_tables(self):
         """删除所有表"""
         try:
@@ -158,6 +185,7 @@ db_handler = DatabaseHandler()
 def init_db():
     """初始化数据库"""
     db_handler.create_tables()
+    db_handler.upgrade_tables()
     logger.info("数据库初始化完成")
 
 
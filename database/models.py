@@ -6,7 +6,7 @@
 """
 
 import datetime
-from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, ForeignKey, Table, Float
+from sqlalchemy import Column, Integer, BigInteger, String, Text, DateTime, Boolean, ForeignKey, Table, Float
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship, backref
 
@@ -36,7 +36,7 @@ class News(Base):
     category_id = Column(Integer, ForeignKey(f'{TABLE_PREFIX}category.id'), nullable=False, comment='分类ID')
     publish_time = Column(DateTime, nullable=True, comment='发布时间')
     crawl_time = Column(DateTime, default=datetime.datetime.now, comment='爬取时间')
-    update_time = Column(DateTime, default=datetime.datetime.now, onupdate=datetime.datetime.now, comment='更新时间')
+    update_time = Column(DateTime, default=datetime.datetime.now, onupdate=datetime.datetime.now, index=True, comment='更新时间')
     is_top = Column(Boolean, default=False, comment='是否置顶')
     is_hot = Column(Boolean, default=False, comment='是否热门')
     is_recommend = Column(Boolean, default=False, comment='是否推荐')
@@ -44,6 +44,8 @@ class News(Base):
     comment_count = Column(Integer, default=0, comment='评论数')
     like_count = Column(Integer, default=0, comment='点赞数')
     status = Column(Integer, default=1, comment='状态：0-禁用，1-启用')
+    simhash = Column(BigInteger, nullable=True, comment='正文SimHash指纹')
+    duplicate_of = Column(Integer, ForeignKey(f'{TABLE_PREFIX}news.id'), nullable=True, comment='近似重复的原始新闻ID')
     
     # 关联关系
     category = relationship('Category', back_populates='news')
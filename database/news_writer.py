@@ -0,0 +1,256 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+新闻批量写入模块
+使用多行 INSERT ... ON DUPLICATE KEY UPDATE 批量写入新闻、内容及标签
+"""
+
+import datetime
+import logging
+from collections import Counter
+from sqlalchemy import case
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+
+from database.models import News, NewsContent, Tag, news_tag_association
+from database.tag_cache import tag_cache
+from utils.simhash import to_signed, to_unsigned
+from utils.url_filter import UrlSeenStore
+
+logger = logging.getLogger(__name__)
+
+# 新闻表可写入的字段
+NEWS_COLUMNS = [
+    'title', 'subtitle', 'url', 'source', 'author', 'category_id', 'publish_time',
+    'crawl_time', 'update_time', 'is_top', 'is_hot', 'is_recommend',
+    'view_count', 'comment_count', 'like_count', 'status', 'simhash', 'duplicate_of'
+]
+
+# 新闻内容表可写入的字段
+CONTENT_COLUMNS = ['news_id', 'content', 'content_html', 'summary', 'keywords']
+
+
+def build_news_row(item, now=None):
+    """
+    将新闻数据项转换为新闻表行
+
+    Args:
+        item: 新闻数据项
+        now: 当前时间
+
+    Returns:
+        dict: 新闻表行
+    """
+    now = now or datetime.datetime.now()
+    return {
+        'title': item['title'],
+        'subtitle': item.get('subtitle', ''),
+        'url': item['url'],
+        'source': item.get('source', ''),
+        'author': item.get('author', ''),
+        'category_id': item.get('category_id', 1),
+        'publish_time': item.get('publish_time', now),
+        'crawl_time': item.get('crawl_time', now),
+        'update_time': now,
+        'is_top': item.get('is_top', False),
+        'is_hot': item.get('is_hot', False),
+        'is_recommend': item.get('is_recommend', False),
+        'view_count': item.get('view_count', 0),
+        'comment_count': item.get('comment_count', 0),
+        'like_count': item.get('like_count', 0),
+        'status': item.get('status', 1),
+        'simhash': to_signed(item.get('simhash')),
+        'duplicate_of': item.get('duplicate_of'),
+    }
+
+
+def dedupe_items(items):
+    """
+    按URL去重，同一批次中后出现的数据覆盖先出现的数据
+
+    Args:
+        items: 新闻数据项列表
+
+    Returns:
+        list: 去重后的新闻数据项列表
+    """
+    unique = {}
+    for item in items:
+        unique[item['url']] = item
+    return list(unique.values())
+
+
+def upsert_news(session, items):
+    """
+    批量写入新闻基本信息
+
+    Args:
+        session: 数据库会话
+        items: 新闻数据项列表（URL需唯一）
+
+    Returns:
+        dict: URL到新闻ID的映射
+    """
+    if not items:
+        return {}
+
+    now = datetime.datetime.now()
+    rows = [build_news_row(item, now) for item in items]
+
+    # 多行插入，URL冲突时更新除URL外的所有字段
+    stmt = mysql_insert(News.__table__).values(rows)
+    stmt = stmt.on_duplicate_key_update({
+        column: stmt.inserted[column] for column in NEWS_COLUMNS if column != 'url'
+    })
+    session.execute(stmt)
+
+    # 一次查询取回本批次所有新闻ID
+    urls = [row['url'] for row in rows]
+    result = session.query(News.url, News.id).filter(News.url.in_(urls)).all()
+    return {url: news_id for url, news_id in result}
+
+
+def upsert_news_contents(session, items, news_ids):
+    """
+    批量写入新闻内容
+
+    Args:
+        session: 数据库会话
+        items: 新闻数据项列表
+        news_ids: URL到新闻ID的映射
+
+    Returns:
+        int: 写入的内容行数
+    """
+    rows = []
+    for item in items:
+        news_id = news_ids.get(item['url'])
+        if not news_id or not all(k in item for k in ['content', 'content_html']):
+            continue
+        rows.append({
+            'news_id': news_id,
+            'content': item['content'],
+            'content_html': item['content_html'],
+            'summary': item.get('summary', ''),
+            'keywords': item.get('keywords', ''),
+        })
+
+    if not rows:
+        return 0
+
+    stmt = mysql_insert(NewsContent.__table__).values(rows)
+    stmt = stmt.on_duplicate_key_update({
+        column: stmt.inserted[column] for column in CONTENT_COLUMNS if column != 'news_id'
+    })
+    session.execute(stmt)
+    return len(rows)
+
+
+def resolve_tag_ids(session, names):
+    """
+    获取标签ID，不存在的标签批量创建
+
+    Args:
+        session: 数据库会话
+        names: 标签名称列表
+
+    Returns:
+        dict: 标签名称到ID的映射
+    """
+    names = list(dict.fromkeys(names))
+    tag_ids, missing = tag_cache.get_many(names)
+    if not missing:
+        return tag_ids
+
+    # 批量创建不存在的标签，频率由 increment_tag_frequencies 统一累加
+    now = datetime.datetime.now()
+    stmt = mysql_insert(Tag.__table__).prefix_with('IGNORE').values([
+        {'name': name, 'frequency': 0, 'create_time': now, 'update_time': now}
+        for name in missing
+    ])
+    session.execute(stmt)
+
+    # 一次查询取回未缓存的标签ID
+    result = session.query(Tag.name, Tag.id).filter(Tag.name.in_(missing)).all()
+    loaded = {name: tag_id for name, tag_id in result}
+    # INSERT IGNORE 创建的标签在事务提交前可能被回滚，提交后才写入缓存
+    tag_cache.stage(session, loaded)
+    tag_ids.update(loaded)
+    return tag_ids
+
+
+def replace_news_tags(session, news_tags):
+    """
+    批量替换新闻标签关联
+
+    Args:
+        session: 数据库会话
+        news_tags: 新闻ID到标签名称列表的映射
+
+    Returns:
+        Counter: 标签ID到本批次使用次数的映射
+    """
+    news_tags = {news_id: names for news_id, names in news_tags.items() if names}
+    if not news_tags:
+        return Counter()
+
+    all_names = [name for names in news_tags.values() for name in names]
+    tag_ids = resolve_tag_ids(session, all_names)
+
+    # 清空现有标签关联
+    session.execute(
+        news_tag_association.delete().where(news_tag_association.c.news_id.in_(list(news_tags)))
+    )
+
+    # 批量添加新标签关联
+    rows = []
+    counts = Counter()
+    for news_id, names in news_tags.items():
+        for name in dict.fromkeys(names):
+            tag_id = tag_ids.get(name)
+            if tag_id:
+                rows.append({'news_id': news_id, 'tag_id': tag_id})
+                counts[tag_id] += 1
+    if rows:
+        session.execute(mysql_insert(news_tag_association).prefix_with('IGNORE').values(rows))
+    return counts
+
+
+def increment_tag_frequencies(session, counts):
+    """
+    使用一条 UPDATE ... CASE 语句累加标签频率
+
+    Args:
+        session: 数据库会话
+        counts: 标签ID到增量的映射
+    """
+    if not counts:
+        return
+
+    session.query(Tag).filter(Tag.id.in_(list(counts))).update({
+        Tag.frequency: Tag.frequency + case(dict(counts), value=Tag.id, else_=0),
+        Tag.update_time: datetime.datetime.now(),
+    }, synchronize_session=False)
+
+
+def load_simhash_index(session, index, batch_size=10000):
+    """
+    从新闻表加载SimHash指纹到近似重复索引（不含已标记为重复的新闻）
+
+    Args:
+        session: 数据库会话
+        index: SimHash分段索引
+        batch_size: 每次读取的行数
+
+    Returns:
+        int: 加载的指纹数量
+    """
+    query = session.query(News.id, News.url, News.simhash) \
+        .filter(News.simhash.isnot(None), News.duplicate_of.is_(None)) \
+        .yield_per(batch_size)
+    count = 0
+    for news_id, url, value in query:
+        index.add(to_unsigned(value), news_id, UrlSeenStore.url_hash(url))
+        count += 1
+    logger.info(f"近似重复索引加载完成，加载指纹 {count} 个")
+    return count
@@ -0,0 +1,148 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+标签ID缓存模块
+进程内有界LRU缓存，保存标签名称到标签ID的映射；
+事务中新取得的标签ID暂存在会话中，事务提交后才写入缓存
+"""
+
+import logging
+import threading
+from collections import OrderedDict
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from config.settings import PIPELINE_SETTINGS
+from database.models import Tag
+
+logger = logging.getLogger(__name__)
+
+# 会话中暂存未提交标签ID的键
+PENDING_KEY = 'tag_cache_pending'
+
+
+class TagCache:
+    """标签名称到ID的LRU缓存"""
+
+    def __init__(self, max_size=10000):
+        """
+        初始化
+
+        Args:
+            max_size: 最大缓存条数
+        """
+        self.max_size = max_size
+        self.data = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.data)
+
+    def get_many(self, names):
+        """
+        批量获取标签ID
+
+        Args:
+            names: 标签名称列表
+
+        Returns:
+            tuple: (已缓存的名称到ID映射, 未缓存的名称列表)
+        """
+        found = {}
+        missing = []
+        with self.lock:
+            for name in names:
+                tag_id = self.data.get(name)
+                if tag_id is None:
+                    missing.append(name)
+                    self.misses += 1
+                else:
+                    self.data.move_to_end(name)
+                    found[name] = tag_id
+                    self.hits += 1
+        return found, missing
+
+    def put_many(self, mapping):
+        """
+        批量写入缓存
+
+        Args:
+            mapping: 标签名称到ID的映射
+        """
+        with self.lock:
+            for name, tag_id in mapping.items():
+                self.data[name] = tag_id
+                self.data.move_to_end(name)
+            while len(self.data) > self.max_size:
+                self.data.popitem(last=False)
+
+    def stage(self, session, mapping):
+        """
+        暂存本事务中新取得的标签ID，事务提交后写入缓存，回滚时丢弃
+
+        Args:
+            session: 数据库会话
+            mapping: 标签名称到ID的映射
+        """
+        # 确保事务已开始，事务结束事件才会触发
+        session.connection()
+        session.info.setdefault(PENDING_KEY, []).append((self, dict(mapping)))
+
+    def clear(self):
+        """清空缓存"""
+        with self.lock:
+            self.data.clear()
+
+    def warm(self, session):
+        """
+        从标签表预热缓存，优先加载使用频率高的标签
+
+        Args:
+            session: 数据库会话
+
+        Returns:
+            int: 加载的标签数量
+        """
+        rows = session.query(Tag.name, Tag.id).order_by(Tag.frequency.desc()).limit(self.max_size).all()
+        # 频率低的先写入，使频率高的标签位于LRU尾部
+        self.put_many(dict(reversed(rows)))
+        logger.info(f"标签缓存预热完成，加载标签 {len(rows)} 个")
+        return len(rows)
+
+    def get_stats(self):
+        """
+        获取缓存统计信息
+
+        Returns:
+            dict: 统计信息
+        """
+        total = self.hits + self.misses
+        return {
+            'size': len(self.data),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0,
+        }
+
+
+def _publish_pending(session):
+    """事务提交后将暂存的标签ID写入缓存"""
+    for cache, mapping in session.info.pop(PENDING_KEY, []):
+        cache.put_many(mapping)
+
+
+def _discard_pending(session, transaction):
+    """事务回滚或未提交即结束时丢弃暂存的标签ID"""
+    if transaction.parent is None:
+        session.info.pop(PENDING_KEY, None)
+
+
+event.listen(Session, 'after_commit', _publish_pending)
+event.listen(Session, 'after_transaction_end', _discard_pending)
+
+
+# 进程内共享的标签缓存
+tag_cache = TagCache(PIPELINE_SETTINGS['tag_cache_size'])
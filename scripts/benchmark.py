@@ -0,0 +1,735 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+性能基准测试脚本
+"""
+
+import os
+import re
+import sys
+import html
+import time
+import datetime
+import random
+import argparse
+from pathlib import Path
+
+# 添加项目根目录到系统路径
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+
+def timeit(func, repeat):
+    """
+    多次运行函数，返回平均耗时
+
+    Args:
+        func: 待测函数
+        repeat: 运行次数
+
+    Returns:
+        float: 平均耗时（秒）
+    """
+    start_time = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start_time) / repeat
+
+
+def report(name, seconds, unit='页'):
+    """输出单项测试结果"""
+    if seconds < 0.001:
+        print(f"{name:<32} {seconds * 1000000:>10.3f} 微秒/{unit}")
+    else:
+        print(f"{name:<32} {seconds * 1000:>10.3f} 毫秒/{unit}")
+
+
+def sample_article_html(paragraphs=40, images=5):
+    """
+    生成模拟网易新闻页面
+
+    Args:
+        paragraphs: 段落数
+        images: 图片数
+
+    Returns:
+        str: HTML内容
+    """
+    rng = random.Random(0)
+    chars = '中国经济发展科技创新政府企业市场国际合作记者报道今年以来数据显示增长提升改革开放'
+    body = []
+    for i in range(paragraphs):
+        text = ''.join(rng.choice(chars) for _ in range(120))
+        body.append(f'<p>{text}。</p>')
+        if i < images:
+            body.append(f'<p class="f_center"><img src="//nimg.ws.126.net/photo/{i}.jpg" alt="图片{i}"></p>')
+    related = ''.join(f'<li><a href="/article/REL{i}.html">相关新闻{i}</a></li>' for i in range(8))
+    nav = ''.join(f'<li><a href="https://news.163.com/channel{i}/">频道{i}</a></li>' for i in range(60))
+    return f'''<html><head><title>测试新闻标题_网易新闻</title>
+<meta name="keywords" content="经济,科技,创新"><script>var config = {{}};</script></head>
+<body><div class="nav"><ul>{nav}</ul></div>
+<div class="post_main"><h1 class="post_title">测试新闻标题</h1>
+<div class="post_info"><span class="post_time">2024-05-01 10:20:30</span> 来源: <a class="source" href="#">网易新闻</a></div>
+<div class="post_body">{''.join(body)}<div class="related_news"><ul>{related}</ul></div></div>
+<div class="post_tags"><a href="#">经济</a><a href="#">科技</a></div>
+<div class="post_author">责任编辑：张三</div></div></body></html>'''
+
+
+def legacy_parse_news(response):
+    """优化前的解析方式：多次CSS查询 + BeautifulSoup二次解析正文"""
+    from bs4 import BeautifulSoup
+
+    response.css('h1.post_title::text, h1.title::text, h1.article-title::text, h1.main-title::text, div.article-header h1::text, h1.headline::text, h1.news_title::text, h1.art_tit::text, h1.main_title::text, h1.page_title::text').get()
+    response.css('div.post_subtitle::text, div.sub-title::text, div.article-subtitle::text, div.sub_title::text, div.subtitle::text, p.summary::text').get()
+    response.css('div.post_info a.source::text, div.post_info span.source::text, div.article-source a::text, span.source::text, a.source::text, div.info a.source::text, div.info span.source::text, div.from a::text, div.from span::text, div.article_info span.source::text, div.article_info a.source::text').get()
+    response.css('div.post_author::text, div.author::text, span.author::text, div.article-author::text, div.info span.author::text, div.info a.author::text, div.article_info span.author::text, div.article_info a.author::text').get()
+    response.css('div.post_info span.post_time::text, div.post_info time::text, span.time::text, span.publish-time::text, div.article-info span.date::text, div.info span.time::text, div.info time::text, div.from span.time::text, div.from time::text, div.article_info span.time::text, div.article_info time::text').get()
+    content_html = response.css('div.post_body, div.post_text, div.article-content, div.main-content, article.article-content, div.content, div.article, div.news_txt, div.article_content, div.main_content, div.end_content').get()
+    soup = BeautifulSoup(content_html, 'lxml')
+    soup.get_text(strip=True)
+    response.css('meta[name="keywords"]::attr(content)').get()
+    [img.get('src', '') for img in soup.find_all('img')]
+    [a.get('href', '') for a in soup.select('div.related_news a, div.related a, div.relative_news a, div.relevant a, div.correlation a, div.related-news a, div.news-related a')]
+    response.css('div.post_tags a::text, div.article-tags a::text, div.tags a::text, div.tag a::text, div.keywords a::text, div.key_word a::text').getall()
+    response.css('div.post_info span.post_view::text, span.view-count::text, span.views::text, span.view::text, span.read::text, span.read-count::text').get()
+
+
+def bench_parse(args):
+    """新闻页面解析耗时对比"""
+    from scrapy.http import HtmlResponse
+    from utils.article_extractor import ArticleExtractor
+
+    if args.files:
+        pages = [Path(path).read_bytes() for path in args.files]
+    else:
+        pages = [sample_article_html().encode('utf-8')]
+    url = 'https://www.163.com/news/article/TEST0001.html'
+
+    def make_responses():
+        # 每次创建新的响应，解析时间包含构建文档树
+        return [HtmlResponse(url=url, body=body, encoding='utf-8') for body in pages]
+
+    def run_legacy():
+        for response in make_responses():
+            legacy_parse_news(response)
+
+    def run_extractor():
+        for response in make_responses():
+            ArticleExtractor(response.selector.root, response.url).extract()
+
+    print(f"新闻页面解析（{len(pages)} 个页面，重复 {args.repeat} 次）")
+    legacy = timeit(run_legacy, args.repeat) / len(pages)
+    extractor = timeit(run_extractor, args.repeat) / len(pages)
+    report('优化前（CSS + BeautifulSoup）', legacy)
+    report('优化后（单次文档树提取）', extractor)
+    print(f"加速比: {legacy / extractor:.2f}x")
+
+
+# 网易新闻页面中常见的发布时间文本
+DATE_CORPUS = [
+    '2024-05-01 10:20:30',
+    '2024-05-01 10:20:30　来源: 网易新闻',
+    '2024-05-01 10:20',
+    '2024年05月01日 10:20:30',
+    '2024年5月1日 10:20',
+    '2024-05-01T10:20:30+08:00',
+    '2024/05/01 08:05',
+    '3小时前',
+    '25分钟前',
+    '刚刚',
+    '1714530030',
+    '1714530030123',
+    'https://news.163.com/24/0501/10/J0ABCDEF000189FM.html',
+]
+
+
+def legacy_parse_datetime(text, default):
+    """优化前的解析方式：逐个尝试 strptime 格式"""
+    for date_format in ['%Y-%m-%d %H:%M:%S', '%Y-%m-%d %H:%M', '%Y年%m月%d日 %H:%M:%S', '%Y年%m月%d日 %H:%M']:
+        try:
+            return datetime.datetime.strptime(text.strip(), date_format)
+        except ValueError:
+            continue
+    return default
+
+
+def bench_dates(args):
+    """发布时间解析耗时对比"""
+    from utils.date_parser import parse_datetime, _parse_cached
+
+    now = datetime.datetime.now()
+    corpus = DATE_CORPUS * args.scale
+
+    def run_legacy():
+        for text in corpus:
+            legacy_parse_datetime(text, now)
+
+    def run_parser():
+        for text in corpus:
+            parse_datetime(text, now)
+
+    def run_parser_cold():
+        # 绕过缓存直接解析
+        for text in corpus:
+            _parse_cached.__wrapped__(text.strip())
+
+    recognised = sum(1 for text in DATE_CORPUS if legacy_parse_datetime(text, None))
+    print(f"发布时间解析（{len(corpus)} 条，重复 {args.repeat} 次）")
+    print(f"可识别格式: 优化前 {recognised}/{len(DATE_CORPUS)}，"
+          f"优化后 {sum(1 for text in DATE_CORPUS if parse_datetime(text, now))}/{len(DATE_CORPUS)}")
+    report('优化前（strptime 循环）', timeit(run_legacy, args.repeat) / len(corpus), '条')
+    report('优化后（无缓存）', timeit(run_parser_cold, args.repeat) / len(corpus), '条')
+    report('优化后（缓存命中）', timeit(run_parser, args.repeat) / len(corpus), '条')
+
+
+def sample_chinese_text(length=20000, seed=0):
+    """
+    生成模拟长篇中文新闻正文（含HTML标签、URL、邮箱和电话号码）
+
+    Args:
+        length: 正文字符数
+        seed: 随机种子
+
+    Returns:
+        str: 正文
+    """
+    rng = random.Random(seed)
+    chars = '中国经济发展科技创新政府企业市场国际合作记者报道今年以来数据显示增长提升改革开放，。'
+    noise = ['<p>', '</p>', '<br/>', ' https://news.163.com/24/0501/10/ABC.html ', ' 13812345678 ',
+             ' 010-12345678 ', ' reporter@163.com ', '&nbsp;', '\n']
+    parts = []
+    size = 0
+    while size < length:
+        part = ''.join(rng.choice(chars) for _ in range(rng.randint(20, 80)))
+        parts.append(part)
+        parts.append(rng.choice(noise))
+        size += len(part)
+    return ''.join(parts)
+
+
+def legacy_clean_all(text, stopwords=None):
+    """优化前的综合清洗：多次未编译的 re.sub"""
+    text = html.unescape(text)
+    text = re.sub(r'<[^>]+>', '', text)
+    text = re.sub(r'https?://\S+', '', text)
+    text = re.sub(r'\S+@\S+\.\S+', '', text)
+    text = re.sub(r'1[3-9]\d{9}', '', text)
+    text = re.sub(r'\d{3,4}-\d{7,8}', '', text)
+    text = re.sub(r'\d{17}[\dXx]', '', text)
+    text = re.sub(r'\s+', ' ', text)
+    if stopwords:
+        words = text.split()
+        words = [word for word in words if word not in stopwords]
+        text = ' '.join(words)
+    return text.strip()
+
+
+def bench_clean(args):
+    """文本清洗吞吐量对比"""
+    from utils.text_cleaner import TextCleaner
+
+    texts = [sample_chinese_text(args.length, seed) for seed in range(args.count)]
+    stopwords = ['的', '了', '和', '是', '在']
+    megabytes = sum(len(text.encode('utf-8')) for text in texts) / (1024 * 1024)
+
+    def throughput(func):
+        start_time = time.perf_counter()
+        func()
+        return megabytes / (time.perf_counter() - start_time)
+
+    print(f"文本清洗（{args.count} 篇，每篇约 {args.length} 字，共 {megabytes:.1f} MB）")
+    print(f"{'优化前（多次 re.sub）':<32} {throughput(lambda: [legacy_clean_all(t, stopwords) for t in texts]):>10.2f} MB/秒")
+    print(f"{'优化后（预编译，跳过无关步骤）':<32} {throughput(lambda: TextCleaner.clean_many(texts, stopwords)):>10.2f} MB/秒")
+    if args.workers > 1:
+        print(f"{f'优化后（{args.workers} 进程）':<32} "
+              f"{throughput(lambda: TextCleaner.clean_many(texts, stopwords, workers=args.workers)):>10.2f} MB/秒")
+
+
+def sample_zipf_texts(count, length, alphabet_size=6000, exponent=1.05, seed=0):
+    """
+    生成字频服从Zipf分布的中文文本，词表规模随文章数增长的情况接近真实语料
+
+    Args:
+        count: 文章数
+        length: 每篇文章字符数
+        alphabet_size: 常用汉字数
+        exponent: Zipf分布指数
+        seed: 随机种子
+
+    Returns:
+        list: 文本列表
+    """
+    import numpy as np
+
+    rng = np.random.default_rng(seed)
+    weights = 1.0 / np.arange(1, alphabet_size + 1) ** exponent
+    alphabet = np.array([chr(0x4e00 + i) for i in rng.permutation(20000)[:alphabet_size]])
+    texts = []
+    for _ in range(count):
+        chars = alphabet[rng.choice(alphabet_size, size=length, p=weights / weights.sum())]
+        # 每20至60字插入一个句号
+        breaks = np.cumsum(rng.integers(20, 60, size=length // 20))
+        chars[breaks[breaks < length]] = '。'
+        texts.append(''.join(chars.tolist()))
+    return texts
+
+
+def bench_keywords(args):
+    """语料级TF-IDF关键词提取吞吐量，逐批输出耗时和词表规模"""
+    from utils.keyword_extractor import KeywordExtractor
+
+    texts = sample_zipf_texts(args.count, args.length)
+    extractor = KeywordExtractor(max_terms=args.max_terms)
+
+    print(f"关键词提取（{args.count} 篇，每篇 {args.length} 字，字频服从Zipf分布，每批 {args.batch_size} 篇，"
+          f"词表上限 {args.max_terms}）")
+    seconds = 0.0
+    for i in range(0, len(texts), args.batch_size):
+        start_time = time.perf_counter()
+        extractor.extract(texts[i:i + args.batch_size])
+        elapsed = time.perf_counter() - start_time
+        seconds += elapsed
+        print(f"  第 {i // args.batch_size + 1} 批  {elapsed:8.2f} 秒  词表 {len(extractor.terms):>9}")
+    report('增量统计并打分', seconds / args.count, '篇')
+    print(f"{'10万篇预计耗时':<32} {seconds / args.count * 100000 / 60:>10.2f} 分钟")
+
+
+def bench_simhash(args):
+    """SimHash指纹计算及分段索引查询耗时"""
+    import numpy as np
+    from utils.simhash import simhash, SimHashIndex
+
+    text = sample_chinese_text(2000)
+    report('计算指纹（2000字）', timeit(lambda: simhash(text), 200), '篇')
+
+    rng = np.random.default_rng(0)
+    fingerprints = rng.integers(0, np.iinfo(np.uint64).max, size=args.size, dtype=np.uint64, endpoint=True).tolist()
+    index = SimHashIndex()
+    start_time = time.perf_counter()
+    for i, fingerprint in enumerate(fingerprints):
+        index.add(fingerprint, i)
+    build_seconds = time.perf_counter() - start_time
+    print(f"{f'构建索引（{args.size} 个指纹）':<32} {build_seconds:>10.2f} 秒")
+
+    # 近似重复查询：随机翻转1~3位；非重复查询：随机指纹
+    picks = rng.integers(0, args.size, size=args.queries).tolist()
+    near = []
+    for i in picks:
+        fingerprint = fingerprints[i]
+        for bit in rng.choice(64, size=int(rng.integers(1, 4)), replace=False).tolist():
+            fingerprint ^= 1 << bit
+        near.append((fingerprint, i))
+    misses = rng.integers(0, np.iinfo(np.uint64).max, size=args.queries, dtype=np.uint64, endpoint=True).tolist()
+
+    start_time = time.perf_counter()
+    found = sum(index.find(fingerprint) == i for fingerprint, i in near)
+    report('查询近似重复', (time.perf_counter() - start_time) / args.queries, '次')
+    start_time = time.perf_counter()
+    false_hits = sum(index.find(fingerprint) is not None for fingerprint in misses)
+    report('查询非重复', (time.perf_counter() - start_time) / args.queries, '次')
+    print(f"{'近似重复召回':<32} {found / args.queries:>10.2%}")
+    print(f"{'随机指纹误报':<32} {false_hits / args.queries:>10.2%}")
+
+
+def legacy_choose_proxy(proxies, proxy_stats):
+    """优化前的代理选择：每次按成功率排序后从前80%中随机选择"""
+    sorted_proxies = sorted(proxies, key=lambda p: proxy_stats.get(p, {}).get('success_rate', 0), reverse=True)
+    top_count = max(1, int(len(sorted_proxies) * 0.8))
+    return random.choice(sorted_proxies[:top_count])
+
+
+def bench_proxy(args):
+    """代理选择耗时"""
+    from utils.proxy_pool import ProxyPool
+
+    rng = random.Random(0)
+    proxies = [f"http://10.0.{i // 256}.{i % 256}:8080" for i in range(args.size)]
+    proxy_stats = {proxy: {'success_rate': rng.random()} for proxy in proxies}
+    pool = ProxyPool(proxies)
+    for proxy in proxies:
+        pool.record(proxy, rng.random() < 0.9, rng.uniform(0.1, 5.0))
+
+    def pool_request():
+        proxy = pool.choose()
+        pool.record(proxy, True, 0.5)
+
+    print(f"代理选择（{args.size} 个代理）")
+    report('优化前（每次排序）', timeit(lambda: legacy_choose_proxy(proxies, proxy_stats), args.repeat), '次')
+    report('优化后（树状数组选择）', timeit(pool.choose, args.repeat), '次')
+    report('优化后（选择并更新权重）', timeit(pool_request, args.repeat), '次')
+
+
+def bench_ua_memory(args):
+    """User-Agent中间件URL尝试次数记录的内存占用"""
+    import tracemalloc
+    from types import SimpleNamespace
+    from collections import defaultdict
+    from crawler.middlewares.user_agent import RandomUserAgentMiddleware
+
+    def run(middleware):
+        tracemalloc.start()
+        start_time = time.perf_counter()
+        for i in range(args.count):
+            request = SimpleNamespace(url=f"https://www.163.com/dy/article/{i:08d}.html", headers={})
+            middleware.process_request(request, None)
+        seconds = time.perf_counter() - start_time
+        current, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return current / (1024 * 1024), seconds
+
+    legacy = RandomUserAgentMiddleware()
+    legacy.url_attempts = defaultdict(int)
+    legacy._add_attempt = lambda url: legacy.url_attempts.__setitem__(url, legacy.url_attempts[url] + 1) or legacy.url_attempts[url]
+
+    print(f"User-Agent中间件（{args.count} 个不同URL）")
+    for name, middleware in [('优化前（按完整URL无限增长）', legacy), ('优化后（URL哈希LRU）', RandomUserAgentMiddleware())]:
+        megabytes, seconds = run(middleware)
+        print(f"{name:<32} {megabytes:>10.1f} MB，{seconds / args.count * 1000000:.2f} 微秒/次")
+
+
+def create_export_database(path, rows, batch_size=10000):
+    """
+    创建用于导出测试的本地SQLite数据库
+
+    Args:
+        path: 数据库文件路径
+        rows: 新闻条数
+        batch_size: 每批插入条数
+
+    Returns:
+        Engine: 数据库引擎
+    """
+    from sqlalchemy import create_engine
+    from database.models import Base, News, NewsContent, Category
+
+    if os.path.exists(path):
+        os.remove(path)
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+
+    rng = random.Random(0)
+    text = sample_chinese_text(200000)
+    base_time = datetime.datetime(2024, 1, 1)
+    with engine.begin() as conn:
+        conn.execute(Category.__table__.insert(), [
+            {'id': i, 'name': f"分类{i}", 'code': f"category{i}", 'level': 1, 'sort': i} for i in range(1, 11)
+        ])
+        for start in range(1, rows + 1, batch_size):
+            ids = range(start, min(start + batch_size, rows + 1))
+            news_rows = []
+            content_rows = []
+            for news_id in ids:
+                publish_time = base_time + datetime.timedelta(minutes=news_id)
+                news_rows.append({
+                    'id': news_id, 'title': f"新闻标题{news_id}", 'subtitle': '', 'url': f"https://www.163.com/dy/article/{news_id:08d}.html",
+                    'source': '网易新闻', 'author': '', 'category_id': rng.randint(1, 10), 'publish_time': publish_time,
+                    'crawl_time': publish_time, 'update_time': publish_time, 'is_top': False, 'is_hot': False,
+                    'is_recommend': False, 'view_count': 0, 'comment_count': 0, 'like_count': 0, 'status': 1,
+                })
+                offset = rng.randrange(len(text) - 1000)
+                content_rows.append({
+                    'news_id': news_id, 'content': text[offset:offset + 1000], 'content_html': '',
+                    'summary': text[offset:offset + 100], 'keywords': '',
+                })
+            conn.execute(News.__table__.insert(), news_rows)
+            conn.execute(NewsContent.__table__.insert(), content_rows)
+    return engine
+
+
+def bench_export_delta(args):
+    """全量导出与增量导出耗时对比"""
+    import shutil
+    import tempfile
+    from sqlalchemy.orm import sessionmaker, scoped_session
+    from database.db_handler import db_handler
+    from database.models import News
+    from scripts.export_data import export_data, export_delta
+    from config.settings import EXPORT_SETTINGS
+
+    work_dir = tempfile.mkdtemp(prefix='export_bench_')
+    try:
+        start_time = time.perf_counter()
+        engine = create_export_database(os.path.join(work_dir, 'news.db'), args.rows)
+        print(f"创建测试数据库（{args.rows} 条新闻）耗时 {time.perf_counter() - start_time:.1f} 秒")
+
+        # 导出脚本改用本地数据库
+        db_handler.Session = scoped_session(sessionmaker(bind=engine))
+        EXPORT_SETTINGS.update({
+            'export_path': os.path.join(work_dir, 'exports'),
+            'delta_path': os.path.join(work_dir, 'exports', 'delta'),
+            'delta_safety_seconds': 0,
+        })
+
+        def run(name, func):
+            start_time = time.perf_counter()
+            result = func(args.formats)
+            print(f"{name:<32} {time.perf_counter() - start_time:>10.2f} 秒，{result['message']}")
+
+        run('全量导出', export_data)
+        run('增量导出（首次，全部作为基线）', export_delta)
+
+        # 修改部分新闻，并禁用其中十分之一
+        changed_ids = random.Random(1).sample(range(1, args.rows + 1), min(args.changed, args.rows))
+        now = datetime.datetime.now()
+        with engine.begin() as conn:
+            for news_id in changed_ids:
+                conn.execute(News.__table__.update().where(News.id == news_id).values(
+                    title=f"修改后的标题{news_id}", status=0 if news_id % 10 == 0 else 1, update_time=now,
+                ))
+
+        run(f"增量导出（{len(changed_ids)} 条变更）", export_delta)
+        run('全量导出', export_data)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def sample_news_items(count, seed=0):
+    """
+    生成导出测试用的新闻数据
+
+    Args:
+        count: 新闻条数
+        seed: 随机种子
+
+    Yields:
+        dict: 与 export_data.build_news_item 结构相同的新闻数据
+    """
+    rng = random.Random(seed)
+    text = sample_chinese_text(200000, seed)
+    for news_id in range(1, count + 1):
+        offset = rng.randrange(len(text) - 1000)
+        yield {
+            'id': news_id,
+            'title': f"新闻标题{news_id}",
+            'subtitle': '',
+            'url': f"https://www.163.com/dy/article/{news_id:08d}.html",
+            'source': '网易新闻',
+            'author': '',
+            'publish_time': '2024-01-01 08:00:00',
+            'crawl_time': '2024-01-01 08:05:00',
+            'is_top': False,
+            'is_hot': rng.random() < 0.1,
+            'is_recommend': False,
+            'view_count': rng.randint(0, 100000),
+            'comment_count': rng.randint(0, 1000),
+            'like_count': rng.randint(0, 1000),
+            'category': {'id': 1, 'name': '头条', 'code': 'headline'},
+            'content': {
+                'text': text[offset:offset + 1000],
+                'html': f"<p>{text[offset:offset + 1000]}</p>",
+                'summary': text[offset:offset + 100],
+                'keywords': '新闻,测试',
+            },
+            'images': [
+                {'id': news_id * 10 + i, 'url': f"https://nimg.ws.126.net/{news_id}_{i}.jpg", 'local_path': None,
+                 'title': '', 'description': '', 'width': 640, 'height': 480, 'size': None, 'format': 'jpg',
+                 'is_cover': i == 0}
+                for i in range(rng.randint(0, 3))
+            ],
+            'tags': [{'id': i, 'name': f"标签{i}"} for i in rng.sample(range(1, 1000), rng.randint(0, 3))],
+        }
+
+
+def legacy_export_xml(news_data, file_path, encoding='utf-8'):
+    """优化前的XML导出：构建完整的ElementTree，再用minidom重新解析并格式化"""
+    import xml.dom.minidom as md
+    from xml.etree import ElementTree as ET
+
+    root = ET.Element('news_data')
+    for news in news_data:
+        news_elem = ET.SubElement(root, 'news')
+        for key, value in news.items():
+            if key not in ['content', 'images', 'tags', 'category']:
+                ET.SubElement(news_elem, key).text = str(value)
+        for key in ('category', 'content'):
+            if news.get(key):
+                group_elem = ET.SubElement(news_elem, key)
+                for field, value in news[key].items():
+                    ET.SubElement(group_elem, field).text = str(value)
+        for key, item_tag in (('images', 'image'), ('tags', 'tag')):
+            list_elem = ET.SubElement(news_elem, key)
+            for item in news.get(key, []):
+                item_elem = ET.SubElement(list_elem, item_tag)
+                for field, value in item.items():
+                    ET.SubElement(item_elem, field).text = str(value)
+
+    xml_str = ET.tostring(root, encoding=encoding)
+    dom = md.parseString(xml_str)
+    with open(file_path, 'wb') as f:
+        f.write(dom.toprettyxml(indent='  ', encoding=encoding))
+
+
+def streaming_export_xml(news_data, file_path, encoding='utf-8'):
+    """优化后的XML导出：逐条写入"""
+    from utils.export_writers import XmlExportWriter, open_sink
+
+    writer = XmlExportWriter(open_sink(file_path), encoding)
+    for news in news_data:
+        writer.write(news)
+    writer.close()
+
+
+def _run_export_xml(func, count, file_path, queue):
+    """子进程：导出XML并返回耗时和峰值内存"""
+    import resource
+
+    start_time = time.perf_counter()
+    func(sample_news_items(count), file_path)
+    seconds = time.perf_counter() - start_time
+    queue.put((seconds, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024))
+
+
+def bench_export_xml(args):
+    """XML导出耗时及峰值内存"""
+    import hashlib
+    import tempfile
+    import multiprocessing
+
+    work_dir = tempfile.mkdtemp(prefix='export_bench_')
+    print(f"XML导出（{args.count} 条新闻）")
+    digests = []
+    for name, func in [('优化前（ElementTree + minidom）', legacy_export_xml), ('优化后（流式写入）', streaming_export_xml)]:
+        # 每种实现在独立子进程中运行，分别统计峰值内存
+        file_path = os.path.join(work_dir, f"{func.__name__}.xml")
+        queue = multiprocessing.Queue()
+        process = multiprocessing.Process(target=_run_export_xml, args=(func, args.count, file_path, queue))
+        process.start()
+        process.join()
+        if process.exitcode != 0:
+            print(f"{name:<32} 运行失败，退出码: {process.exitcode}")
+            continue
+        seconds, megabytes = queue.get()
+        with open(file_path, 'rb') as f:
+            digests.append(hashlib.md5(f.read()).hexdigest())
+        print(f"{name:<32} {seconds:>10.2f} 秒，峰值内存 {megabytes:.0f} MB，文件 {os.path.getsize(file_path) / 1048576:.0f} MB")
+        os.remove(file_path)
+    os.rmdir(work_dir)
+    if len(digests) == 2:
+        print(f"输出是否一致: {digests[0] == digests[1]}")
+
+
+def legacy_compress_file(file_path, compress_format):
+    """优化前的压缩：导出完成后重新读取文件，按行写入单线程压缩流"""
+    import gzip
+    import bz2
+
+    opener = gzip.open if compress_format == 'gz' else bz2.open
+    compressed_path = f"{file_path}.{compress_format}"
+    with open(file_path, 'rb') as f_in:
+        with opener(compressed_path, 'wb') as f_out:
+            f_out.writelines(f_in)
+    return compressed_path
+
+
+def bench_compress(args):
+    """各压缩格式在不同线程数下的压缩耗时"""
+    import json
+    import shutil
+    import tempfile
+    from utils.export_writers import CompressedSink
+
+    work_dir = tempfile.mkdtemp(prefix='compress_bench_')
+    try:
+        # 生成测试数据（导出JSON）
+        source_path = os.path.join(work_dir, 'news_data.json')
+        with open(source_path, 'wb') as f:
+            for news in sample_news_items(args.count):
+                f.write(json.dumps(news, ensure_ascii=False, indent=2).encode('utf-8'))
+        with open(source_path, 'rb') as f:
+            data = f.read()
+        megabytes = len(data) / 1048576
+        print(f"压缩 {megabytes:.0f} MB 导出数据")
+
+        def report_result(name, seconds, compressed_path):
+            ratio = os.path.getsize(compressed_path) / len(data)
+            print(f"{name:<32} {seconds:>8.2f} 秒，{megabytes / seconds:>7.1f} MB/秒，压缩率 {ratio:.1%}")
+            os.remove(compressed_path)
+
+        for compress_format in args.formats:
+            if compress_format in ('gz', 'bz2'):
+                start_time = time.perf_counter()
+                compressed_path = legacy_compress_file(source_path, compress_format)
+                report_result(f"{compress_format} 优化前（压缩文件）", time.perf_counter() - start_time, compressed_path)
+
+            for workers in args.workers:
+                if compress_format == 'zip' and workers > 1:
+                    continue
+                try:
+                    start_time = time.perf_counter()
+                    sink = CompressedSink(os.path.join(work_dir, 'stream.json'), compress_format, workers)
+                    for offset in range(0, len(data), 1 << 20):
+                        sink.write(data[offset:offset + (1 << 20)])
+                    compressed_path = sink.close()
+                except ImportError as e:
+                    print(f"{compress_format:<32} 跳过: {e}")
+                    break
+                report_result(f"{compress_format} 流式（{workers} 线程）", time.perf_counter() - start_time, compressed_path)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description='性能基准测试')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    parse_parser = subparsers.add_parser('parse', help='新闻页面解析耗时')
+    parse_parser.add_argument('files', nargs='*', help='本地保存的新闻页面HTML文件，默认使用模拟页面')
+    parse_parser.add_argument('--repeat', type=int, default=200, help='重复次数')
+    parse_parser.set_defaults(func=bench_parse)
+
+    dates_parser = subparsers.add_parser('dates', help='发布时间解析耗时')
+    dates_parser.add_argument('--scale', type=int, default=100, help='样本重复倍数')
+    dates_parser.add_argument('--repeat', type=int, default=20, help='重复次数')
+    dates_parser.set_defaults(func=bench_dates)
+
+    clean_parser = subparsers.add_parser('clean', help='文本清洗吞吐量')
+    clean_parser.add_argument('--count', type=int, default=200, help='文章数')
+    clean_parser.add_argument('--length', type=int, default=20000, help='每篇文章字符数')
+    clean_parser.add_argument('--workers', type=int, default=4, help='批量清洗进程数')
+    clean_parser.set_defaults(func=bench_clean)
+
+    keywords_parser = subparsers.add_parser('keywords', help='关键词提取吞吐量')
+    keywords_parser.add_argument('--count', type=int, default=5000, help='文章数')
+    keywords_parser.add_argument('--length', type=int, default=2000, help='每篇文章字符数')
+    keywords_parser.add_argument('--batch-size', type=int, default=1000, help='每批文章数')
+    keywords_parser.add_argument('--max-terms', type=int, default=500000, help='词表上限')
+    keywords_parser.set_defaults(func=bench_keywords)
+
+    simhash_parser = subparsers.add_parser('simhash', help='SimHash近似重复索引耗时')
+    simhash_parser.add_argument('--size', type=int, default=1000000, help='索引指纹数')
+    simhash_parser.add_argument('--queries', type=int, default=10000, help='查询次数')
+    simhash_parser.set_defaults(func=bench_simhash)
+
+    proxy_parser = subparsers.add_parser('proxy', help='代理选择耗时')
+    proxy_parser.add_argument('--size', type=int, default=500, help='代理数')
+    proxy_parser.add_argument('--repeat', type=int, default=10000, help='重复次数')
+    proxy_parser.set_defaults(func=bench_proxy)
+
+    ua_parser = subparsers.add_parser('ua-memory', help='User-Agent中间件内存占用')
+    ua_parser.add_argument('--count', type=int, default=1000000, help='URL数')
+    ua_parser.set_defaults(func=bench_ua_memory)
+
+    export_delta_parser = subparsers.add_parser('export-delta', help='全量导出与增量导出耗时对比')
+    export_delta_parser.add_argument('--rows', type=int, default=1000000, help='新闻条数')
+    export_delta_parser.add_argument('--changed', type=int, default=1000, help='变更的新闻条数')
+    export_delta_parser.add_argument('--formats', nargs='+', default=['json', 'csv'], help='导出格式')
+    export_delta_parser.set_defaults(func=bench_export_delta)
+
+    export_xml_parser = subparsers.add_parser('export-xml', help='XML导出耗时及峰值内存')
+    export_xml_parser.add_argument('--count', type=int, default=500000, help='新闻条数')
+    export_xml_parser.set_defaults(func=bench_export_xml)
+
+    compress_parser = subparsers.add_parser('compress', help='各压缩格式及线程数的压缩耗时')
+    compress_parser.add_argument('--count', type=int, default=50000, help='新闻条数')
+    compress_parser.add_argument('--formats', nargs='+', default=['zip', 'gz', 'bz2', 'zstd'], help='压缩格式')
+    compress_parser.add_argument('--workers', nargs='+', type=int, default=[1, 2, 4, 8], help='压缩线程数')
+    compress_parser.set_defaults(func=bench_compress)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == '__main__':
+    main()
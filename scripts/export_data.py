@@ -8,26 +8,28 @@
 import os
 import sys
 import json
-import csv
 import time
 import logging
+import shutil
+import hashlib
 import argparse
 import datetime
-import zipfile
-import gzip
-import bz2
 from pathlib import Path
-import xml.dom.minidom as md
-from xml.etree import ElementTree as ET
+from concurrent.futures import ProcessPoolExecutor, as_completed
 
 # 添加项目根目录到系统路径
 BASE_DIR = Path(__file__).resolve().parent.parent
 sys.path.insert(0, str(BASE_DIR))
 
-from database.db_handler import session_scope
+from sqlalchemy import and_, or_, case, func
+from sqlalchemy.orm import joinedload, selectinload
+
+from database.db_handler import db_handler, session_scope
 from database.models import News, NewsContent, NewsImage, Category, Tag
 from config.settings import EXPORT_SETTINGS
 from utils.logger import setup_logger
+from utils.category_resolver import category_resolver
+from utils.export_writers import EXPORT_WRITERS, JsonExportWriter, xml_text
 
 # 设置日志
 logger = setup_logger(
@@ -36,6 +38,9 @@ logger = setup_logger(
     log_file=os.path.join(BASE_DIR, 'logs', 'export_data.log')
 )
 
+# 每个sitemap文件最多包含的URL数（sitemap协议上限）
+SITEMAP_MAX_URLS = 50000
+
 
 def get_export_path(format_name):
     """
@@ -62,51 +67,204 @@ def get_export_path(format_name):
     return os.path.join(export_path, filename)
 
 
-def compress_file(file_path, compress_format='zip'):
+def build_news_item(news):
     """
-    压缩文件
+    将新闻对象转换为导出数据
     
     Args:
-        file_path: 文件路径
-        compress_format: 压缩格式
+        news: 新闻对象（分类、内容、图片和标签需已加载）
         
     Returns:
-        str: 压缩后的文件路径
+        dict: 新闻数据
     """
-    if not os.path.exists(file_path):
-        logger.error(f"文件不存在: {file_path}")
-        return None
+    # 基本信息
+    news_item = {
+        'id': news.id,
+        'title': news.title,
+        'subtitle': news.subtitle,
+        'url': news.url,
+        'source': news.source,
+        'author': news.author,
+        'publish_time': news.publish_time.strftime('%Y-%m-%d %H:%M:%S') if news.publish_time else '',
+        'crawl_time': news.crawl_time.strftime('%Y-%m-%d %H:%M:%S') if news.crawl_time else '',
+        'is_top': news.is_top,
+        'is_hot': news.is_hot,
+        'is_recommend': news.is_recommend,
+        'view_count': news.view_count,
+        'comment_count': news.comment_count,
+        'like_count': news.like_count,
+        'category': {
+            'id': news.category.id,
+            'name': news.category.name,
+            'code': news.category.code,
+        } if news.category else {
+            'id': news.category_id,
+            'name': category_resolver.get_name(news.category_id),
+            'code': None,
+        },
+    }
     
-    try:
-        if compress_format == 'zip':
-            # ZIP压缩
-            compressed_path = f"{file_path}.zip"
-            with zipfile.ZipFile(compressed_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
-                zipf.write(file_path, os.path.basename(file_path))
-        elif compress_format == 'gz':
-            # GZIP压缩
-            compressed_path = f"{file_path}.gz"
-            with open(file_path, 'rb') as f_in:
-                with gzip.open(compressed_path, 'wb') as f_out:
-                    f_out.writelines(f_in)
-        elif compress_format == 'bz2':
-            # BZ2压缩
-            compressed_path = f"{file_path}.bz2"
-            with open(file_path, 'rb') as f_in:
-                with bz2.open(compressed_path, 'wb') as f_out:
-                    f_out.writelines(f_in)
-        else:
-            logger.error(f"不支持的压缩格式: {compress_format}")
-            return None
+    # 内容信息
+    if news.content:
+        news_item['content'] = {
+            'text': news.content.content,
+            'html': news.content.content_html,
+            'summary': news.content.summary,
+            'keywords': news.content.keywords,
+        }
+    else:
+        news_item['content'] = {}
+    
+    # 图片信息
+    news_item['images'] = []
+    for image in news.images:
+        image_item = {
+            'id': image.id,
+            'url': image.url,
+            'local_path': image.local_path,
+            'title': image.title,
+            'description': image.description,
+            'width': image.width,
+            'height': image.height,
+            'size': image.size,
+            'format': image.format,
+            'is_cover': image.is_cover,
+        }
+        news_item['images'].append(image_item)
+    
+    # 标签信息
+    news_item['tags'] = [{'id': tag.id, 'name': tag.name} for tag in news.tags]
+    
+    return news_item
+
+
+def news_export_query(session):
+    """
+    创建导出查询，分类和内容联表加载，图片和标签批量预加载
+    
+    Args:
+        session: 数据库会话
+        
+    Returns:
+        Query: 新闻查询
+    """
+    return session.query(News).options(
+        joinedload(News.category),
+        joinedload(News.content),
+        selectinload(News.images),
+        selectinload(News.tags),
+    )
+
+
+def build_tombstone(news):
+    """
+    生成已删除新闻的删除记录
+    
+    Args:
+        news: 新闻对象
+        
+    Returns:
+        dict: 删除记录
+    """
+    return {
+        'id': news.id,
+        'url': news.url,
+        'update_time': news.update_time.strftime('%Y-%m-%d %H:%M:%S') if news.update_time else '',
+    }
+
+
+def iter_news_data(chunk_size=None, filters=None):
+    """
+    分块流式读取新闻数据
+    
+    按ID分页，每块一次主查询（分类和内容联表加载），图片和标签各一次IN查询，
+    查询次数与块数成正比；每块处理完后释放会话中的对象，内存占用与数据总量无关
+    
+    Args:
+        chunk_size: 每块新闻条数，默认使用配置
+        filters: 额外的过滤条件列表
+        
+    Yields:
+        dict: 新闻数据
+    """
+    chunk_size = chunk_size or EXPORT_SETTINGS['chunk_size']
+    last_id = 0
+    count = 0
+    
+    with session_scope() as session:
+        query = news_export_query(session).filter(News.status == 1, *(filters or [])).order_by(News.id)
+        
+        while True:
+            chunk = query.filter(News.id > last_id).limit(chunk_size).all()
+            if not chunk:
+                break
+            
+            for news in chunk:
+                yield build_news_item(news)
+            
+            count += len(chunk)
+            last_id = chunk[-1].id
+            session.expunge_all()
+    
+    logger.info(f"读取 {count} 条新闻数据")
+
+
+def iter_news_changes(watermark=None, until=None, chunk_size=None):
+    """
+    按 (update_time, id) 分块流式读取水位线之后新增、修改或禁用的新闻
+    
+    Args:
+        watermark: 水位线 (更新时间, 新闻ID)，None表示从头读取
+        until: 只读取该时间及之前更新的新闻
+        chunk_size: 每块新闻条数，默认使用配置
         
-        # 删除原始文件
-        os.remove(file_path)
+    Yields:
+        tuple: (新闻数据或删除记录, 是否已删除, 该条新闻的水位线)
+    """
+    chunk_size = chunk_size or EXPORT_SETTINGS['chunk_size']
+    last_time, last_id = watermark or (None, 0)
+    
+    with session_scope() as session:
+        query = news_export_query(session).filter(News.update_time.isnot(None))
+        if until:
+            query = query.filter(News.update_time <= until)
+        query = query.order_by(News.update_time, News.id)
         
-        logger.info(f"文件压缩成功: {compressed_path}")
-        return compressed_path
+        while True:
+            chunk_query = query
+            if last_time is not None:
+                chunk_query = query.filter(or_(
+                    News.update_time > last_time,
+                    and_(News.update_time == last_time, News.id > last_id),
+                ))
+            chunk = chunk_query.limit(chunk_size).all()
+            if not chunk:
+                break
+            
+            for news in chunk:
+                mark = (news.update_time, news.id)
+                if news.status == 1:
+                    yield build_news_item(news), False, mark
+                else:
+                    yield build_tombstone(news), True, mark
+            
+            last_time, last_id = chunk[-1].update_time, chunk[-1].id
+            session.expunge_all()
+
+
+def has_news_data():
+    """
+    检查是否有可导出的新闻
+    
+    Returns:
+        bool: 是否有数据
+    """
+    try:
+        with session_scope() as session:
+            return session.query(News.id).filter(News.status == 1).first() is not None
     except Exception as e:
-        logger.error(f"文件压缩失败: {str(e)}")
-        return None
+        logger.error(f"获取新闻数据失败: {str(e)}")
+        return False
 
 
 def fetch_news_data():
@@ -116,70 +274,8 @@ def fetch_news_data():
     Returns:
         list: 新闻数据列表
     """
-    news_data = []
-    
     try:
-        with session_scope() as session:
-            # 查询所有新闻
-            news_list = session.query(News).filter(News.status == 1).all()
-            
-            for news in news_list:
-                # 基本信息
-                news_item = {
-                    'id': news.id,
-                    'title': news.title,
-                    'subtitle': news.subtitle,
-                    'url': news.url,
-                    'source': news.source,
-                    'author': news.author,
-                    'publish_time': news.publish_time.strftime('%Y-%m-%d %H:%M:%S') if news.publish_time else '',
-                    'crawl_time': news.crawl_time.strftime('%Y-%m-%d %H:%M:%S') if news.crawl_time else '',
-                    'is_top': news.is_top,
-                    'is_hot': news.is_hot,
-                    'is_recommend': news.is_recommend,
-                    'view_count': news.view_count,
-                    'comment_count': news.comment_count,
-                    'like_count': news.like_count,
-                    'category': {
-                        'id': news.category.id,
-                        'name': news.category.name,
-                        'code': news.category.code,
-                    } if news.category else {},
-                }
-                
-                # 内容信息
-                if news.content:
-                    news_item['content'] = {
-                        'text': news.content.content,
-                        'html': news.content.content_html,
-                        'summary': news.content.summary,
-                        'keywords': news.content.keywords,
-                    }
-                else:
-                    news_item['content'] = {}
-                
-                # 图片信息
-                news_item['images'] = []
-                for image in news.images:
-                    image_item = {
-                        'id': image.id,
-                        'url': image.url,
-                        'local_path': image.local_path,
-                        'title': image.title,
-                        'description': image.description,
-                        'width': image.width,
-                        'height': image.height,
-                        'size': image.size,
-                        'format': image.format,
-                        'is_cover': image.is_cover,
-                    }
-                    news_item['images'].append(image_item)
-                
-                # 标签信息
-                news_item['tags'] = [{'id': tag.id, 'name': tag.name} for tag in news.tags]
-                
-                news_data.append(news_item)
-        
+        news_data = list(iter_news_data())
         logger.info(f"获取到 {len(news_data)} 条新闻数据")
         return news_data
     except Exception as e:
@@ -187,34 +283,92 @@ def fetch_news_data():
         return []
 
 
-def export_to_json(news_data):
+def export_formats(news_data, formats, get_path=get_export_path, use_process=None):
     """
-    导出为JSON格式
+    单次遍历新闻数据，同时写入多种导出格式，输出边写边压缩
     
     Args:
-        news_data: 新闻数据列表
+        news_data: 新闻数据（列表或生成器）
+        formats: 导出格式列表
+        get_path: 根据导出格式获取文件路径的函数
+        use_process: 是否在子进程中压缩，默认使用配置
         
     Returns:
-        str: 导出文件路径
+        dict: {导出格式: 导出文件路径}，导出失败的格式不包含在内
     """
-    try:
-        # 获取导出路径
-        file_path = get_export_path('json')
-        
-        # 写入JSON文件
-        with open(file_path, 'w', encoding=EXPORT_SETTINGS['encoding']) as f:
-            json.dump(news_data, f, ensure_ascii=False, indent=2)
-        
-        logger.info(f"导出JSON成功: {file_path}")
+    compress_format = EXPORT_SETTINGS['compress_format'] if EXPORT_SETTINGS['compress'] else None
+    if use_process is None:
+        use_process = EXPORT_SETTINGS['compress_processes']
+    
+    # 打开各格式的写入器
+    writers = {}
+    for format_name in formats:
+        writer_class = EXPORT_WRITERS.get(format_name)
+        if not writer_class:
+            logger.warning(f"不支持的导出格式: {format_name}")
+            continue
         
-        # 压缩文件
-        if EXPORT_SETTINGS['compress']:
-            file_path = compress_file(file_path, EXPORT_SETTINGS['compress_format'])
+        options = {'encoding': EXPORT_SETTINGS['encoding']}
+        if format_name == 'csv':
+            options.update(
+                delimiter=EXPORT_SETTINGS['csv_delimiter'],
+                include_header=EXPORT_SETTINGS['include_header'],
+            )
+        elif format_name == 'parquet':
+            options.update(
+                row_group_size=EXPORT_SETTINGS['parquet_row_group_size'],
+                compression=EXPORT_SETTINGS['parquet_compression'],
+            )
         
-        return file_path
+        try:
+            writers[format_name] = writer_class.open(
+                get_path(format_name), compress_format, use_process, EXPORT_SETTINGS['compress_workers'], **options
+            )
+        except Exception as e:
+            logger.error(f"导出{format_name.upper()}失败: {str(e)}")
+    
+    # 逐条写入所有格式，某一格式失败不影响其他格式
+    try:
+        for news in news_data:
+            for format_name, writer in list(writers.items()):
+                try:
+                    writer.write(news)
+                except Exception as e:
+                    logger.error(f"导出{format_name.upper()}失败: {str(e)}")
+                    writer.abort()
+                    del writers[format_name]
     except Exception as e:
-        logger.error(f"导出JSON失败: {str(e)}")
-        return None
+        logger.error(f"获取新闻数据失败: {str(e)}")
+        for writer in writers.values():
+            writer.abort()
+        return {}
+    
+    # 完成写入
+    files = {}
+    for format_name, writer in writers.items():
+        try:
+            files[format_name] = writer.close()
+            for name, file_path in writer.extra_files.items():
+                files[f"{format_name}_{name}"] = file_path
+            logger.info(f"导出{format_name.upper()}成功: {files[format_name]}，共 {writer.count} 条")
+        except Exception as e:
+            logger.error(f"导出{format_name.upper()}失败: {str(e)}")
+            writer.abort()
+    
+    return files
+
+
+def export_to_json(news_data):
+    """
+    导出为JSON格式
+    
+    Args:
+        news_data: 新闻数据（列表或生成器）
+        
+    Returns:
+        str: 导出文件路径
+    """
+    return export_formats(news_data, ['json']).get('json')
 
 
 def export_to_xml(news_data):
@@ -222,77 +376,12 @@ def export_to_xml(news_data):
     导出为XML格式
     
     Args:
-        news_data: 新闻数据列表
+        news_data: 新闻数据（列表或生成器）
         
     Returns:
         str: 导出文件路径
     """
-    try:
-        # 获取导出路径
-        file_path = get_export_path('xml')
-        
-        # 创建XML根元素
-        root = ET.Element('news_data')
-        
-        # 添加新闻元素
-        for news in news_data:
-            news_elem = ET.SubElement(root, 'news')
-            
-            # 添加基本信息
-            for key, value in news.items():
-                if key not in ['content', 'images', 'tags', 'category']:
-                    elem = ET.SubElement(news_elem, key)
-                    elem.text = str(value)
-            
-            # 添加分类信息
-            if news.get('category'):
-                category_elem = ET.SubElement(news_elem, 'category')
-                for key, value in news['category'].items():
-                    elem = ET.SubElement(category_elem, key)
-                    elem.text = str(value)
-            
-            # 添加内容信息
-            if news.get('content'):
-                content_elem = ET.SubElement(news_elem, 'content')
-                for key, value in news['content'].items():
-                    elem = ET.SubElement(content_elem, key)
-                    elem.text = str(value)
-            
-            # 添加图片信息
-            images_elem = ET.SubElement(news_elem, 'images')
-            for image in news.get('images', []):
-                image_elem = ET.SubElement(images_elem, 'image')
-                for key, value in image.items():
-                    elem = ET.SubElement(image_elem, key)
-                    elem.text = str(value)
-            
-            # 添加标签信息
-            tags_elem = ET.SubElement(news_elem, 'tags')
-            for tag in news.get('tags', []):
-                tag_elem = ET.SubElement(tags_elem, 'tag')
-                for key, value in tag.items():
-                    elem = ET.SubElement(tag_elem, key)
-                    elem.text = str(value)
-        
-        # 格式化XML
-        xml_str = ET.tostring(root, encoding=EXPORT_SETTINGS['encoding'])
-        dom = md.parseString(xml_str)
-        pretty_xml = dom.toprettyxml(indent='  ', encoding=EXPORT_SETTINGS['encoding'])
-        
-        # 写入XML文件
-        with open(file_path, 'wb') as f:
-            f.write(pretty_xml)
-        
-        logger.info(f"导出XML成功: {file_path}")
-        
-        # 压缩文件
-        if EXPORT_SETTINGS['compress']:
-            file_path = compress_file(file_path, EXPORT_SETTINGS['compress_format'])
-        
-        return file_path
-    except Exception as e:
-        logger.error(f"导出XML失败: {str(e)}")
-        return None
+    return export_formats(news_data, ['xml']).get('xml')
 
 
 def export_to_csv(news_data):
@@ -300,76 +389,12 @@ def export_to_csv(news_data):
     导出为CSV格式
     
     Args:
-        news_data: 新闻数据列表
+        news_data: 新闻数据（列表或生成器）
         
     Returns:
         str: 导出文件路径
     """
-    try:
-        # 获取导出路径
-        file_path = get_export_path('csv')
-        
-        # 定义CSV表头
-        fieldnames = [
-            'id', 'title', 'subtitle', 'url', 'source', 'author', 'publish_time', 'crawl_time',
-            'is_top', 'is_hot', 'is_recommend', 'view_count', 'comment_count', 'like_count',
-            'category_id', 'category_name', 'content_summary', 'content_keywords', 'tags', 'cover_image'
-        ]
-        
-        # 写入CSV文件
-        with open(file_path, 'w', encoding=EXPORT_SETTINGS['encoding'], newline='') as f:
-            writer = csv.DictWriter(f, fieldnames=fieldnames, delimiter=EXPORT_SETTINGS['csv_delimiter'])
-            
-            # 写入表头
-            if EXPORT_SETTINGS['include_header']:
-                writer.writeheader()
-            
-            # 写入数据
-            for news in news_data:
-                # 处理标签
-                tags = ','.join([tag['name'] for tag in news.get('tags', [])])
-                
-                # 处理封面图
-                cover_image = ''
-                for image in news.get('images', []):
-                    if image.get('is_cover'):
-                        cover_image = image.get('url', '')
-                        break
-                
-                # 写入行
-                writer.writerow({
-                    'id': news.get('id', ''),
-                    'title': news.get('title', ''),
-                    'subtitle': news.get('subtitle', ''),
-                    'url': news.get('url', ''),
-                    'source': news.get('source', ''),
-                    'author': news.get('author', ''),
-                    'publish_time': news.get('publish_time', ''),
-                    'crawl_time': news.get('crawl_time', ''),
-                    'is_top': news.get('is_top', ''),
-                    'is_hot': news.get('is_hot', ''),
-                    'is_recommend': news.get('is_recommend', ''),
-                    'view_count': news.get('view_count', ''),
-                    'comment_count': news.get('comment_count', ''),
-                    'like_count': news.get('like_count', ''),
-                    'category_id': news.get('category', {}).get('id', ''),
-                    'category_name': news.get('category', {}).get('name', ''),
-                    'content_summary': news.get('content', {}).get('summary', ''),
-                    'content_keywords': news.get('content', {}).get('keywords', ''),
-                    'tags': tags,
-                    'cover_image': cover_image
-                })
-        
-        logger.info(f"导出CSV成功: {file_path}")
-        
-        # 压缩文件
-        if EXPORT_SETTINGS['compress']:
-            file_path = compress_file(file_path, EXPORT_SETTINGS['compress_format'])
-        
-        return file_path
-    except Exception as e:
-        logger.error(f"导出CSV失败: {str(e)}")
-        return None
+    return export_formats(news_data, ['csv']).get('csv')
 
 
 def export_data(formats=None):
@@ -386,9 +411,8 @@ def export_data(formats=None):
     if not formats:
         formats = EXPORT_SETTINGS['formats']
     
-    # 获取新闻数据
-    news_data = fetch_news_data()
-    if not news_data:
+    # 检查是否有数据
+    if not has_news_data():
         logger.error("没有可导出的数据")
         return {'success': False, 'message': '没有可导出的数据'}
     
@@ -399,22 +423,8 @@ def export_data(formats=None):
         'files': {}
     }
     
-    # 导出数据
-    for format_name in formats:
-        if format_name == 'json':
-            file_path = export_to_json(news_data)
-            if file_path:
-                result['files']['json'] = file_path
-        elif format_name == 'xml':
-            file_path = export_to_xml(news_data)
-            if file_path:
-                result['files']['xml'] = file_path
-        elif format_name == 'csv':
-            file_path = export_to_csv(news_data)
-            if file_path:
-                result['files']['csv'] = file_path
-        else:
-            logger.warning(f"不支持的导出格式: {format_name}")
+    # 单次读取数据，同时导出所有格式
+    result['files'] = export_formats(iter_news_data(), formats)
     
     # 检查是否有成功导出的文件
     if not result['files']:
@@ -424,10 +434,570 @@ def export_data(formats=None):
     return result
 
 
+def get_delta_path(sequence, name):
+    """
+    获取增量导出文件路径
+    
+    Args:
+        sequence: 增量序号
+        name: 文件类型（导出格式或 deleted.json）
+        
+    Returns:
+        str: 文件路径
+    """
+    return os.path.join(EXPORT_SETTINGS['delta_path'], f"news_delta_{sequence:06d}.{name}")
+
+
+def load_delta_manifest():
+    """
+    读取增量导出清单
+    
+    Returns:
+        dict: 清单，包含当前水位线和已生成的增量列表
+    """
+    manifest_path = os.path.join(EXPORT_SETTINGS['delta_path'], 'manifest.json')
+    if not os.path.exists(manifest_path):
+        return {'watermark': None, 'deltas': []}
+    with open(manifest_path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_delta_manifest(manifest):
+    """
+    保存增量导出清单（先写临时文件再替换）
+    
+    Args:
+        manifest: 清单
+    """
+    manifest_path = os.path.join(EXPORT_SETTINGS['delta_path'], 'manifest.json')
+    tmp_path = f"{manifest_path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, manifest_path)
+
+
+def remove_files(file_paths):
+    """删除导出文件"""
+    for file_path in file_paths:
+        if file_path and os.path.exists(file_path):
+            os.remove(file_path)
+
+
+def export_delta(formats=None):
+    """
+    增量导出：只导出水位线之后新增或修改的新闻，已禁用的新闻写入删除记录
+    
+    每次导出生成带序号的增量文件，并在清单中记录文件、条数和新的水位线；
+    首次运行没有水位线，导出全部新闻作为基线
+    
+    Args:
+        formats: 导出格式列表
+        
+    Returns:
+        dict: 导出结果
+    """
+    # 获取导出格式
+    if not formats:
+        formats = EXPORT_SETTINGS['formats']
+    formats = [format_name for format_name in formats if format_name in EXPORT_WRITERS]
+    if not formats:
+        return {'success': False, 'message': '没有支持的导出格式'}
+    
+    os.makedirs(EXPORT_SETTINGS['delta_path'], exist_ok=True)
+    manifest = load_delta_manifest()
+    watermark = manifest['watermark']
+    if watermark:
+        watermark = (datetime.datetime.fromisoformat(watermark['update_time']), watermark['id'])
+    sequence = manifest['deltas'][-1]['sequence'] + 1 if manifest['deltas'] else 1
+    
+    # 最近更新的新闻留到下次导出，避免遗漏尚未提交的事务
+    until = datetime.datetime.now() - datetime.timedelta(seconds=EXPORT_SETTINGS['delta_safety_seconds'])
+    compress_format = EXPORT_SETTINGS['compress_format'] if EXPORT_SETTINGS['compress'] else None
+    state = {'count': 0, 'deleted': 0, 'watermark': None, 'tombstones': None}
+    
+    def active_news():
+        """产出启用的新闻，禁用的新闻写入删除记录文件"""
+        for news_item, deleted, mark in iter_news_changes(watermark, until):
+            state['watermark'] = mark
+            if not deleted:
+                state['count'] += 1
+                yield news_item
+                continue
+            if state['tombstones'] is None:
+                state['tombstones'] = JsonExportWriter.open(
+                    get_delta_path(sequence, 'deleted.json'), compress_format, encoding=EXPORT_SETTINGS['encoding']
+                )
+            state['tombstones'].write(news_item)
+            state['deleted'] += 1
+    
+    files = export_formats(active_news(), formats, lambda format_name: get_delta_path(sequence, format_name))
+    tombstones = state['tombstones']
+    
+    # 任一格式失败时整个增量作废，水位线不前移
+    if any(format_name not in files for format_name in formats):
+        remove_files(files.values())
+        if tombstones:
+            tombstones.abort()
+        return {'success': False, 'message': '导出失败'}
+    
+    if not state['count'] and not state['deleted']:
+        remove_files(files.values())
+        logger.info("水位线之后没有新增或修改的新闻")
+        return {'success': True, 'message': '没有变更', 'files': {}}
+    
+    if tombstones:
+        try:
+            files['deleted'] = tombstones.close()
+        except Exception as e:
+            logger.error(f"写入删除记录失败: {str(e)}")
+            tombstones.abort()
+            remove_files(files.values())
+            return {'success': False, 'message': '导出失败'}
+    
+    # 更新清单
+    update_time, news_id = state['watermark']
+    new_watermark = {'update_time': update_time.isoformat(), 'id': news_id}
+    manifest['deltas'].append({
+        'sequence': sequence,
+        'created_at': datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        'since': manifest['watermark'],
+        'watermark': new_watermark,
+        'count': state['count'],
+        'deleted': state['deleted'],
+        'files': {name: os.path.basename(file_path) for name, file_path in files.items()},
+    })
+    manifest['watermark'] = new_watermark
+    save_delta_manifest(manifest)
+    
+    logger.info(f"增量导出 #{sequence}：新增或修改 {state['count']} 条，删除 {state['deleted']} 条")
+    return {
+        'success': True,
+        'message': '导出成功',
+        'files': files,
+        'sequence': sequence,
+        'count': state['count'],
+        'deleted': state['deleted'],
+    }
+
+
+def shard_key(day, category_id=None):
+    """
+    获取分片标识
+    
+    Args:
+        day: 发布日期（YYYY-MM-DD），None表示没有发布时间
+        category_id: 分类ID，按日期分片时为None
+        
+    Returns:
+        str: 分片标识，如 2024-01-01 或 2024-01-01_c3
+    """
+    key = day or 'unknown'
+    return key if category_id is None else f"{key}_c{category_id}"
+
+
+def get_shard_path(key, format_name):
+    """
+    获取分片文件路径
+    
+    Args:
+        key: 分片标识
+        format_name: 导出格式
+        
+    Returns:
+        str: 文件路径
+    """
+    return os.path.join(EXPORT_SETTINGS['shard_path'], f"news_{key}.{format_name}")
+
+
+def file_checksum(file_path):
+    """
+    计算文件的SHA-256校验和
+    
+    Args:
+        file_path: 文件路径
+        
+    Returns:
+        str: 十六进制校验和
+    """
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def query_shard_signatures(shard_by='day'):
+    """
+    一次聚合查询得到每个分片的签名，签名不变说明分片内的新闻没有变化
+    
+    签名由启用新闻的条数、ID之和及分片内所有新闻（含已禁用）的最大更新时间组成，
+    新增、修改、禁用或移动到其他分片的新闻都会改变签名
+    
+    Args:
+        shard_by: 分片方式（day 或 category_day）
+        
+    Returns:
+        dict: {分片标识: 分片信息}
+    """
+    active = News.status == 1
+    columns = [func.date(News.publish_time)]
+    if shard_by == 'category_day':
+        columns.append(News.category_id)
+    
+    with session_scope() as session:
+        rows = session.query(
+            *columns,
+            func.sum(case((active, 1), else_=0)),
+            func.sum(case((active, News.id), else_=0)),
+            func.max(News.update_time),
+        ).group_by(*columns).all()
+    
+    shards = {}
+    for row in rows:
+        day = str(row[0]) if row[0] is not None else None
+        category_id = row[1] if shard_by == 'category_day' else None
+        count, id_sum, max_update_time = int(row[-3] or 0), int(row[-2] or 0), row[-1]
+        if not count:
+            continue
+        key = shard_key(day, category_id)
+        shards[key] = {
+            'key': key,
+            'date': day,
+            'category_id': category_id,
+            'count': count,
+            'signature': f"{count}:{id_sum}:{max_update_time}",
+        }
+    return shards
+
+
+def _init_shard_worker():
+    """分片导出子进程初始化：丢弃从父进程继承的数据库连接"""
+    db_handler.engine.dispose(close=False)
+
+
+def export_shard(shard, formats):
+    """
+    导出一个分片（在子进程中运行）
+    
+    各格式先写入暂存目录，全部成功后才移动到分片目录，
+    任一格式失败时分片目录中上次导出的文件保持不变
+    
+    Args:
+        shard: 分片信息
+        formats: 导出格式列表
+        
+    Returns:
+        dict: {文件类型: {'file': 文件名, 'size': 字节数, 'sha256': 校验和}}，任一格式失败时返回None
+    """
+    filters = []
+    if shard['date'] is None:
+        filters.append(News.publish_time.is_(None))
+    else:
+        start = datetime.datetime.strptime(shard['date'], '%Y-%m-%d')
+        filters.extend([News.publish_time >= start, News.publish_time < start + datetime.timedelta(days=1)])
+    if shard['category_id'] is not None:
+        filters.append(News.category_id == shard['category_id'])
+    
+    staging_path = os.path.join(EXPORT_SETTINGS['shard_path'], '.staging', shard['key'])
+    os.makedirs(staging_path, exist_ok=True)
+    try:
+        files = export_formats(
+            iter_news_data(filters=filters), formats,
+            lambda format_name: os.path.join(staging_path, os.path.basename(get_shard_path(shard['key'], format_name))),
+            use_process=False,
+        )
+        if any(format_name not in files for format_name in formats):
+            return None
+        
+        entries = {
+            name: {'file': os.path.basename(file_path), 'size': os.path.getsize(file_path), 'sha256': file_checksum(file_path)}
+            for name, file_path in files.items()
+        }
+        for file_path in files.values():
+            os.replace(file_path, os.path.join(EXPORT_SETTINGS['shard_path'], os.path.basename(file_path)))
+        return entries
+    finally:
+        shutil.rmtree(staging_path, ignore_errors=True)
+
+
+def export_shards(formats=None):
+    """
+    分片导出：每个发布日期（或分类+日期）一个文件，并生成包含条数和校验和的索引 index.json
+    
+    只重写签名发生变化的分片，多个分片由进程池并行写入；
+    导出格式、压缩格式或分片方式变化时重写全部分片
+    
+    Args:
+        formats: 导出格式列表
+        
+    Returns:
+        dict: 导出结果
+    """
+    # 获取导出格式
+    if not formats:
+        formats = EXPORT_SETTINGS['formats']
+    formats = [format_name for format_name in formats if format_name in EXPORT_WRITERS]
+    if not formats:
+        return {'success': False, 'message': '没有支持的导出格式'}
+    
+    shard_path = EXPORT_SETTINGS['shard_path']
+    shard_by = EXPORT_SETTINGS['shard_by']
+    compress_format = EXPORT_SETTINGS['compress_format'] if EXPORT_SETTINGS['compress'] else None
+    os.makedirs(shard_path, exist_ok=True)
+    
+    # 读取上次的索引，导出配置变化时全部重写
+    index_path = os.path.join(shard_path, 'index.json')
+    index = {}
+    if os.path.exists(index_path):
+        with open(index_path, 'r', encoding='utf-8') as f:
+            index = json.load(f)
+    layout = {'shard_by': shard_by, 'formats': formats, 'compress_format': compress_format}
+    previous = index.get('shards', {}) if all(index.get(key) == value for key, value in layout.items()) else {}
+    
+    shards = query_shard_signatures(shard_by)
+    changed = [
+        shard for key, shard in sorted(shards.items())
+        if key not in previous or previous[key]['signature'] != shard['signature']
+        or not all(os.path.exists(os.path.join(shard_path, entry['file'])) for entry in previous[key]['files'].values())
+    ]
+    logger.info(f"共 {len(shards)} 个分片，需要重写 {len(changed)} 个")
+    
+    # 并行写入变化的分片
+    entries = {}
+    failed = 0
+    workers = EXPORT_SETTINGS['shard_workers']
+    if workers > 1 and len(changed) > 1:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_shard_worker) as executor:
+            futures = {executor.submit(export_shard, shard, formats): shard for shard in changed}
+            for future in as_completed(futures):
+                shard = futures[future]
+                try:
+                    entries[shard['key']] = future.result()
+                except Exception as e:
+                    logger.error(f"导出分片 {shard['key']} 失败: {str(e)}")
+                    entries[shard['key']] = None
+    else:
+        for shard in changed:
+            entries[shard['key']] = export_shard(shard, formats)
+    
+    # 更新索引：失败的分片保留上次的记录，下次导出时重试
+    new_shards = {}
+    for key, shard in shards.items():
+        if key in entries:
+            if entries[key] is None:
+                failed += 1
+                if key in previous:
+                    new_shards[key] = previous[key]
+                continue
+            new_shards[key] = dict(shard, files=entries[key])
+        else:
+            new_shards[key] = previous[key]
+    
+    # 删除已不存在的分片及不再导出的文件
+    kept_files = {entry['file'] for shard in new_shards.values() for entry in shard['files'].values()}
+    for name in os.listdir(shard_path):
+        if name.startswith('news_') and name not in kept_files and not name.endswith('.tmp'):
+            os.remove(os.path.join(shard_path, name))
+    
+    index = dict(
+        layout,
+        updated_at=datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        total=sum(shard['count'] for shard in new_shards.values()),
+        shards=dict(sorted(new_shards.items())),
+    )
+    tmp_path = f"{index_path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(index, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, index_path)
+    
+    logger.info(f"分片导出完成：重写 {len(changed) - failed} 个分片，失败 {failed} 个，共 {index['total']} 条新闻")
+    return {
+        'success': not failed,
+        'message': '导出成功' if not failed else f"{failed} 个分片导出失败",
+        'files': {'index': index_path},
+        'rewritten': len(changed) - failed,
+        'shards': len(new_shards),
+    }
+
+
+def article_json_path(news_id):
+    """
+    获取文章静态JSON的路径，按ID的MD5前4位分两级目录
+    
+    Args:
+        news_id: 新闻ID
+        
+    Returns:
+        str: 相对于静态目录的路径，如 articles/c4/ca/1234.json
+    """
+    digest = hashlib.md5(str(news_id).encode('utf-8')).hexdigest()
+    return os.path.join('articles', digest[:2], digest[2:4], f"{news_id}.json")
+
+
+def write_file_atomic(file_path, data):
+    """
+    先写临时文件再替换，避免读取到写了一半的文件
+    
+    Args:
+        file_path: 文件路径
+        data: 字节串
+    """
+    tmp_path = f"{file_path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, file_path)
+
+
+def write_sitemap(part, until=None):
+    """
+    重新生成一个sitemap文件，第 part 个文件包含ID在 (part*50000, (part+1)*50000] 内的启用新闻
+    
+    Args:
+        part: sitemap序号
+        until: 该时间之后更新的新闻只有已导出过文章JSON时才包含，与文章JSON的导出范围一致
+        
+    Returns:
+        dict: {'count': URL数, 'lastmod': 最后修改日期}，没有URL时删除文件并返回None
+    """
+    start_id = part * SITEMAP_MAX_URLS
+    with session_scope() as session:
+        rows = session.query(News.id, News.update_time).filter(
+            News.status == 1, News.id > start_id, News.id <= start_id + SITEMAP_MAX_URLS,
+            News.update_time.isnot(None),
+        ).order_by(News.id).all()
+    
+    # 截止时间之后修改的新闻留到下次导出，已导出过的仍保留在sitemap中
+    if until:
+        static_path = EXPORT_SETTINGS['static_path']
+        rows = [
+            (news_id, update_time) for news_id, update_time in rows
+            if update_time <= until or os.path.exists(os.path.join(static_path, article_json_path(news_id)))
+        ]
+    
+    file_path = os.path.join(EXPORT_SETTINGS['static_path'], 'sitemaps', f"sitemap-{part + 1:05d}.xml")
+    if not rows:
+        if os.path.exists(file_path):
+            os.remove(file_path)
+        return None
+    
+    site_url = EXPORT_SETTINGS['site_url'].rstrip('/')
+    url_path = EXPORT_SETTINGS['article_url_path']
+    parts = ['<?xml version="1.0" encoding="UTF-8"?>\n',
+             '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n']
+    for news_id, update_time in rows:
+        parts.append(f"  <url><loc>{xml_text(site_url + url_path.format(id=news_id))}</loc>")
+        if update_time:
+            parts.append(f"<lastmod>{update_time.strftime('%Y-%m-%d')}</lastmod>")
+        parts.append('</url>\n')
+    parts.append('</urlset>\n')
+    write_file_atomic(file_path, ''.join(parts).encode('utf-8'))
+    
+    lastmod = max((update_time for _, update_time in rows if update_time), default=None)
+    return {'count': len(rows), 'lastmod': lastmod.strftime('%Y-%m-%d') if lastmod else None}
+
+
+def write_sitemap_index(sitemaps):
+    """
+    生成sitemap索引 sitemap.xml
+    
+    Args:
+        sitemaps: {sitemap序号: {'count': URL数, 'lastmod': 最后修改日期}}
+    """
+    site_url = EXPORT_SETTINGS['site_url'].rstrip('/')
+    parts = ['<?xml version="1.0" encoding="UTF-8"?>\n',
+             '<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n']
+    for part in sorted(sitemaps, key=int):
+        parts.append(f"  <sitemap><loc>{xml_text(f'{site_url}/sitemaps/sitemap-{int(part) + 1:05d}.xml')}</loc>")
+        if sitemaps[part]['lastmod']:
+            parts.append(f"<lastmod>{sitemaps[part]['lastmod']}</lastmod>")
+        parts.append('</sitemap>\n')
+    parts.append('</sitemapindex>\n')
+    write_file_atomic(os.path.join(EXPORT_SETTINGS['static_path'], 'sitemap.xml'), ''.join(parts).encode('utf-8'))
+
+
+def export_static():
+    """
+    静态导出：每篇文章一个预渲染的JSON文件，并生成按5万条拆分的sitemap及索引
+    
+    按 update_time 水位线增量处理，只重写变化的文章及其所在的sitemap文件，
+    禁用的文章删除对应的JSON文件；首次运行处理全部文章
+    
+    Returns:
+        dict: 导出结果
+    """
+    static_path = EXPORT_SETTINGS['static_path']
+    os.makedirs(os.path.join(static_path, 'sitemaps'), exist_ok=True)
+    
+    # 读取上次的水位线和sitemap统计
+    state_path = os.path.join(static_path, 'state.json')
+    state = {'watermark': None, 'sitemaps': {}}
+    if os.path.exists(state_path):
+        with open(state_path, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+    watermark = state['watermark']
+    if watermark:
+        watermark = (datetime.datetime.fromisoformat(watermark['update_time']), watermark['id'])
+    
+    # 最近更新的新闻留到下次导出，避免遗漏尚未提交的事务
+    until = datetime.datetime.now() - datetime.timedelta(seconds=EXPORT_SETTINGS['delta_safety_seconds'])
+    count = 0
+    deleted = 0
+    last_mark = None
+    changed_parts = set()
+    created_dirs = set()
+    
+    for news_item, is_deleted, mark in iter_news_changes(watermark, until):
+        file_path = os.path.join(static_path, article_json_path(news_item['id']))
+        if is_deleted:
+            if os.path.exists(file_path):
+                os.remove(file_path)
+            deleted += 1
+        else:
+            directory = os.path.dirname(file_path)
+            if directory not in created_dirs:
+                os.makedirs(directory, exist_ok=True)
+                created_dirs.add(directory)
+            write_file_atomic(file_path, json.dumps(news_item, ensure_ascii=False, separators=(',', ':')).encode('utf-8'))
+            count += 1
+        changed_parts.add((news_item['id'] - 1) // SITEMAP_MAX_URLS)
+        last_mark = mark
+    
+    if last_mark is None:
+        logger.info("水位线之后没有新增或修改的新闻")
+        return {'success': True, 'message': '没有变更', 'files': {}}
+    
+    # 重新生成变化的sitemap文件及索引
+    for part in sorted(changed_parts):
+        sitemap = write_sitemap(part, until)
+        if sitemap:
+            state['sitemaps'][str(part)] = sitemap
+        else:
+            state['sitemaps'].pop(str(part), None)
+    write_sitemap_index(state['sitemaps'])
+    
+    # 保存水位线
+    state['watermark'] = {'update_time': last_mark[0].isoformat(), 'id': last_mark[1]}
+    tmp_path = f"{state_path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(state, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, state_path)
+    
+    logger.info(f"静态导出：写入 {count} 篇文章，删除 {deleted} 篇，更新 {len(changed_parts)} 个sitemap文件")
+    return {
+        'success': True,
+        'message': '导出成功',
+        'files': {'sitemap': os.path.join(static_path, 'sitemap.xml')},
+        'count': count,
+        'deleted': deleted,
+    }
+
+
 def main():
     """主函数"""
     parser = argparse.ArgumentParser(description='导出网易新闻数据')
-    parser.add_argument('--format', choices=['json', 'xml', 'csv', 'all'], default='all', help='导出格式')
+    parser.add_argument('--format', choices=list(EXPORT_WRITERS) + ['all'], default='all', help='导出格式')
+    parser.add_argument('--mode', choices=['full', 'delta', 'shards', 'static'], default='full',
+                        help='导出模式：全量、增量、按日期分片或静态文章JSON及sitemap')
     args = parser.parse_args()
     
     # 创建导出目录
@@ -441,7 +1011,14 @@ def main():
     
     # 导出数据
     start_time = time.time()
-    result = export_data(formats)
+    if args.mode == 'delta':
+        result = export_delta(formats)
+    elif args.mode == 'shards':
+        result = export_shards(formats)
+    elif args.mode == 'static':
+        result = export_static()
+    else:
+        result = export_data(formats)
     end_time = time.time()
     
     # 输出结果
@@ -40,8 +40,13 @@ import logging
 # logging.getLogger('scrapy').propagate = True
 
 
-def get_scrapy_settings():
-    """获取Scrapy设置"""
+def get_scrapy_settings(incremental=None):
+    """
+    获取Scrapy设置
+    
+    Args:
+        incremental: 是否启用增量爬取，None表示使用配置文件设置
+    """
     settings = Settings()
     
     # 爬虫设置
@@ -69,10 +74,17 @@ def get_scrapy_settings():
     settings.set('AUTOTHROTTLE_TARGET_CONCURRENCY', CRAWLER_SETTINGS['autothrottle_target_concurrency'])
     settings.set('AUTOTHROTTLE_DEBUG', CRAWLER_SETTINGS['autothrottle_debug'])
     
+    # 增量爬取设置
+    if incremental is None:
+        incremental = CRAWLER_SETTINGS['incremental_enabled']
+    settings.set('INCREMENTAL_ENABLED', incremental)
+    
     # 中间件设置
     settings.set('DOWNLOADER_MIDDLEWARES', {
         'crawler.middlewares.user_agent.RandomUserAgentMiddleware': 400,
         'crawler.middlewares.proxy.RandomProxyMiddleware': 410,
+        # 需在解压缩中间件(590)之后处理响应，以便对解压后的内容计算指纹
+        'crawler.middlewares.conditional_get.ConditionalGetMiddleware': 420,
     })
     
     # 管道设置
@@ -88,8 +100,13 @@ def get_scrapy_settings():
     return settings
 
 
-def run_spider():
-    """运行爬虫"""
+def run_spider(incremental=None):
+    """
+    运行爬虫
+    
+    Args:
+        incremental: 是否启用增量爬取，None表示使用配置文件设置
+    """
     try:
         logger.info("开始运行爬虫")
         
@@ -97,7 +114,7 @@ def run_spider():
         init_db()
         
         # 获取Scrapy设置
-        settings = get_scrapy_settings()
+        settings = get_scrapy_settings(incremental)
         
         # 创建爬虫进程
         process = CrawlerProcess(settings)
@@ -115,14 +132,14 @@ def run_spider():
         return False
 
 
-def run_scheduled_task():
+def run_scheduled_task(incremental=None):
     """运行定时任务"""
     logger.info(f"定时任务开始执行，当前时间: {datetime.datetime.now()}")
-    success = run_spider()
+    success = run_spider(incremental)
     logger.info(f"定时任务执行{'成功' if success else '失败'}，当前时间: {datetime.datetime.now()}")
 
 
-def schedule_task():
+def schedule_task(incremental=None):
     """调度定时任务"""
     if not SCHEDULE_SETTINGS['enabled']:
         logger.info("定时任务未启用")
@@ -133,12 +150,12 @@ def schedule_task():
     logger.info(f"设置定时任务，间隔: {interval_hours}小时")
     
     # 每隔N小时运行一次
-    schedule.every(interval_hours).hours.do(run_scheduled_task)
+    schedule.every(interval_hours).hours.do(run_scheduled_task, incremental)
     
     # 如果设置了立即运行
     if SCHEDULE_SETTINGS['run_on_start']:
         logger.info("立即运行一次爬虫")
-        run_scheduled_task()
+        run_scheduled_task(incremental)
     
     # 运行定时任务
     logger.info("开始运行定时任务")
@@ -152,6 +169,7 @@ def main():
     parser = argparse.ArgumentParser(description='运行网易新闻爬虫')
     parser.add_argument('--once', action='store_true', help='只运行一次爬虫')
     parser.add_argument('--schedule', action='store_true', help='按计划运行爬虫')
+    parser.add_argument('--incremental', action='store_true', default=None, help='启用增量爬取（条件请求，跳过未变化页面）')
     args = parser.parse_args()
     
     # 创建日志目录
@@ -162,13 +180,13 @@ def main():
     
     if args.once:
         # 只运行一次
-        run_spider()
+        run_spider(args.incremental)
     elif args.schedule:
         # 按计划运行
-        schedule_task()
+        schedule_task(args.incremental)
     else:
         # 默认只运行一次
-        run_spider()
+        run_spider(args.incremental)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,150 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+关键词更新脚本
+基于语料库TF-IDF为新闻内容批量提取关键词，并增量维护文档频率统计
+"""
+
+import os
+import sys
+import time
+import argparse
+from pathlib import Path
+
+# 添加项目根目录到系统路径
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+from database.db_handler import session_scope
+from database.models import NewsContent
+from config.settings import KEYWORD_SETTINGS
+from utils.logger import setup_logger
+from utils.keyword_extractor import KeywordExtractor, join_keywords
+
+# 设置日志
+logger = setup_logger(
+    name='update_keywords',
+    level='INFO',
+    log_file=os.path.join(BASE_DIR, 'logs', 'update_keywords.log')
+)
+
+
+def iter_batches(after_id, batch_size, max_id=None):
+    """
+    按ID分页读取新闻内容
+
+    Args:
+        after_id: 起始ID（不含）
+        batch_size: 每批条数
+        max_id: 结束ID（含），为None时读到末尾
+
+    Yields:
+        list: (内容ID, 正文, 原关键词) 列表
+    """
+    while True:
+        with session_scope() as session:
+            query = session.query(NewsContent.id, NewsContent.content, NewsContent.keywords) \
+                .filter(NewsContent.id > after_id)
+            if max_id is not None:
+                query = query.filter(NewsContent.id <= max_id)
+            rows = query.order_by(NewsContent.id).limit(batch_size).all()
+        if not rows:
+            return
+        yield rows
+        after_id = rows[-1][0]
+
+
+def save_keywords(rows, keywords_list, overwrite):
+    """
+    批量写入关键词
+
+    Args:
+        rows: (内容ID, 正文, 原关键词) 列表
+        keywords_list: 每篇文章的关键词列表
+        overwrite: 是否覆盖已有关键词
+
+    Returns:
+        int: 更新条数
+    """
+    mappings = [
+        {'id': content_id, 'keywords': join_keywords(keywords)}
+        for (content_id, _, old_keywords), keywords in zip(rows, keywords_list)
+        if keywords and (overwrite or not old_keywords)
+    ]
+    if mappings:
+        with session_scope() as session:
+            session.bulk_update_mappings(NewsContent, mappings)
+    return len(mappings)
+
+
+def update_keywords(rebuild=False, overwrite=False, batch_size=None, top_n=None):
+    """
+    更新新闻关键词
+
+    增量模式下只处理上次统计之后新增的内容：先用新文章更新文档频率，再为其打分。
+    重建模式下先完整统计一遍文档频率，再为所有文章打分。
+
+    Args:
+        rebuild: 是否重建文档频率统计并重新提取全部文章
+        overwrite: 是否覆盖已有关键词（如页面meta中的关键词）
+        batch_size: 每批处理的文章数
+        top_n: 每篇文章提取的关键词数量
+
+    Returns:
+        dict: 处理结果统计
+    """
+    batch_size = batch_size or KEYWORD_SETTINGS['batch_size']
+    df_path = KEYWORD_SETTINGS['df_path']
+    extractor = KeywordExtractor(
+        top_n=top_n or KEYWORD_SETTINGS['top_n'],
+        max_terms=KEYWORD_SETTINGS['max_terms']
+    )
+
+    processed = 0
+    updated = 0
+    if rebuild:
+        # 第一遍：统计文档频率
+        for rows in iter_batches(0, batch_size):
+            extractor.update([row[1] for row in rows])
+            extractor.watermark = rows[-1][0]
+            processed += len(rows)
+        logger.info(f"文档频率统计完成，文档数: {extractor.n_docs}，词数: {len(extractor.terms)}")
+        extractor.save(df_path)
+
+        # 第二遍：使用完整统计打分
+        for rows in iter_batches(0, batch_size, extractor.watermark):
+            updated += save_keywords(rows, extractor.extract([row[1] for row in rows], update=False), overwrite)
+    else:
+        extractor.load(df_path)
+        for rows in iter_batches(extractor.watermark, batch_size):
+            keywords_list = extractor.extract([row[1] for row in rows])
+            updated += save_keywords(rows, keywords_list, overwrite)
+            extractor.watermark = rows[-1][0]
+            processed += len(rows)
+            logger.info(f"已处理: {processed}，已更新: {updated}")
+        if processed:
+            extractor.save(df_path)
+
+    return {'processed': processed, 'updated': updated, 'n_docs': extractor.n_docs}
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description='更新新闻关键词')
+    parser.add_argument('--rebuild', action='store_true', help='重建文档频率统计并重新提取全部文章')
+    parser.add_argument('--overwrite', action='store_true', help='覆盖已有关键词')
+    parser.add_argument('--batch-size', type=int, help='每批处理的文章数')
+    parser.add_argument('--top-n', type=int, help='每篇文章提取的关键词数量')
+    args = parser.parse_args()
+
+    start_time = time.time()
+    result = update_keywords(args.rebuild, args.overwrite, args.batch_size, args.top_n)
+    logger.info(
+        f"关键词更新完成，处理: {result['processed']}，更新: {result['updated']}，"
+        f"语料文档数: {result['n_docs']}，耗时: {time.time() - start_time:.2f}秒"
+    )
+
+
+if __name__ == '__main__':
+    main()
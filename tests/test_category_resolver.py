@@ -0,0 +1,62 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+新闻分类解析测试
+"""
+
+import pytest
+
+from config.settings import NEWS_CATEGORIES
+from utils.category_resolver import CategoryResolver, SUBDOMAIN_ALIASES, DEFAULT_CATEGORY_ID
+
+
+@pytest.fixture(scope='module')
+def resolver():
+    return CategoryResolver(NEWS_CATEGORIES, SUBDOMAIN_ALIASES)
+
+
+def test_all_categories_covered():
+    assert sorted(category['id'] for category in NEWS_CATEGORIES) == list(range(1, 25))
+
+
+@pytest.mark.parametrize('category', NEWS_CATEGORIES, ids=lambda category: category['name'])
+def test_category_url(resolver, category):
+    assert resolver.resolve(category['url']) == (category['id'], category['name'])
+
+
+@pytest.mark.parametrize('category', NEWS_CATEGORIES, ids=lambda category: category['name'])
+def test_article_url(resolver, category):
+    url = f"{category['url']}24/0501/10/J0ABCDEF.html"
+    assert resolver.resolve(url) == (category['id'], category['name'])
+
+
+@pytest.mark.parametrize('url, category_id', [
+    ('https://NEWS.163.com/domestic/', 2),
+    ('https://news.163.com:443/domestic/', 2),
+    ('http://Money.163.COM:80/24/0501/10/J0ABCDEF.html', 5),
+    ('https://news.163.com/domestic', 2),
+    ('https://news.163.com/domestic/?page=2', 2),
+])
+def test_host_normalized(resolver, url, category_id):
+    assert resolver.resolve_id(url) == category_id
+
+
+def test_longest_prefix(resolver):
+    # 未知的下级路径归入最近的上级分类
+    assert resolver.resolve_id('https://news.163.com/world/asia/24/0501/a.html') == 3
+    assert resolver.resolve_id('https://news.163.com/unknown/a.html') == 1
+
+
+def test_subdomain_alias(resolver):
+    assert resolver.resolve('https://war.163.com/24/0501/10/J0ABCDEF.html') == (4, '军事')
+
+
+@pytest.mark.parametrize('url', [
+    'https://www.example.com/news/a.html',
+    'https://163.com.example.com/',
+    'not a url',
+    '',
+])
+def test_unknown_host(resolver, url):
+    assert resolver.resolve_id(url) == DEFAULT_CATEGORY_ID
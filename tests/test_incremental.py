@@ -0,0 +1,109 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+增量爬取测试：条件请求中间件与爬虫的已爬取URL过滤配合
+"""
+
+import pytest
+from scrapy import Request
+from scrapy.http import HtmlResponse
+
+from config.settings import CRAWLER_SETTINGS
+from crawler.middlewares.conditional_get import ConditionalGetMiddleware
+from crawler.spiders.news_spider import NeteaseNewsSpider
+
+LIST_URL = 'https://news.163.com/domestic/'
+ARTICLE_URL = 'https://www.163.com/news/article/J0ABCDEF000189FH.html'
+LIST_BODY = f'<html><body><a class="news-title" href="{ARTICLE_URL}">标题</a></body></html>'.encode('utf-8')
+
+
+@pytest.fixture
+def paths(tmp_path, monkeypatch):
+    monkeypatch.setitem(CRAWLER_SETTINGS, 'seen_store_path', str(tmp_path / 'seen_urls.npy'))
+    monkeypatch.setitem(CRAWLER_SETTINGS, 'selector_cache_path', str(tmp_path / 'selector_cache.json'))
+    monkeypatch.setitem(CRAWLER_SETTINGS, 'seen_filter_enabled', True)
+    # 不连接数据库，只读取本地的已爬取URL
+    monkeypatch.setattr(NeteaseNewsSpider, '_load_seen_urls', lambda spider: spider.seen_urls.load())
+    return tmp_path
+
+
+def start_run(paths):
+    """模拟一次增量运行：创建爬虫并启动条件请求中间件"""
+    spider = NeteaseNewsSpider()
+    middleware = ConditionalGetMiddleware(True, str(paths / 'crawl_state.db'))
+    middleware.spider_opened(spider)
+    return spider, middleware
+
+
+def finish_run(spider, middleware):
+    middleware.spider_closed(spider)
+    spider.seen_urls.save()
+
+
+def download(middleware, request, body, headers=None):
+    """经过条件请求中间件下载页面"""
+    middleware.process_request(request, None)
+    response = HtmlResponse(request.url, body=body, headers=headers or {}, request=request)
+    return middleware.process_response(request, response, None)
+
+
+def test_list_page_state_saved_after_parse(paths):
+    spider, middleware = start_run(paths)
+    response = download(middleware, Request(LIST_URL), LIST_BODY, {'ETag': '"v1"'})
+    assert middleware.store.get(LIST_URL) is None
+    requests = list(spider.parse(response))
+    assert [request.url for request in requests] == [ARTICLE_URL]
+    assert middleware.store.get(LIST_URL)['etag'] == '"v1"'
+    finish_run(spider, middleware)
+
+    # 下次运行发送条件请求，内容未变化时跳过列表页
+    spider, middleware = start_run(paths)
+    request = Request(LIST_URL)
+    response = download(middleware, request, LIST_BODY)
+    assert request.headers['If-None-Match'] == b'"v1"'
+    assert list(spider.parse(response)) == []
+    assert spider.pages_unchanged == 1
+    finish_run(spider, middleware)
+
+
+def test_list_page_state_not_saved_when_parse_fails(paths, monkeypatch):
+    spider, middleware = start_run(paths)
+    response = download(middleware, Request(LIST_URL), LIST_BODY, {'ETag': '"v1"'})
+    monkeypatch.setattr(spider, '_should_schedule', lambda *args, **kwargs: 1 / 0)
+    with pytest.raises(ZeroDivisionError):
+        list(spider.parse(response))
+    assert middleware.store.get(LIST_URL) is None
+    finish_run(spider, middleware)
+
+
+def test_stored_article_with_validators_is_revalidated(paths):
+    spider, middleware = start_run(paths)
+    # 数据管道写入成功后同时记录已爬取URL和验证信息
+    spider.seen_urls.add(ARTICLE_URL)
+    spider.crawl_state.set(ARTICLE_URL, etag='"a1"', fingerprint='f')
+    finish_run(spider, middleware)
+
+    spider, middleware = start_run(paths)
+    assert spider._should_schedule(ARTICLE_URL)
+    request = Request(ARTICLE_URL)
+    middleware.process_request(request, None)
+    assert request.headers['If-None-Match'] == b'"a1"'
+    finish_run(spider, middleware)
+
+
+def test_stored_article_without_validators_is_skipped(paths):
+    spider, middleware = start_run(paths)
+    spider.seen_urls.add(ARTICLE_URL)
+    finish_run(spider, middleware)
+
+    spider, middleware = start_run(paths)
+    assert not spider._should_schedule(ARTICLE_URL)
+    assert spider.news_skipped == 1
+    finish_run(spider, middleware)
+
+
+def test_seen_filter_applies_without_incremental(paths):
+    spider = NeteaseNewsSpider()
+    spider.seen_urls.add(ARTICLE_URL)
+    assert not spider._should_schedule(ARTICLE_URL)
@@ -0,0 +1,300 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+代理中间件测试（使用本地的模拟代理服务器）
+"""
+
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+from scrapy import Request
+from scrapy.http import Response
+from twisted.internet import reactor
+
+from crawler.middlewares.proxy import RandomProxyMiddleware, TRIAL_META_KEY
+from utils.circuit_breaker import CLOSED, OPEN, HALF_OPEN
+
+
+class FakeProxyHandler(BaseHTTPRequestHandler):
+    """模拟代理：按服务器上设置的状态码响应普通请求和CONNECT请求"""
+
+    def do_GET(self):
+        self.server.requests.append(('GET', self.path))
+        self.send_response(self.server.status)
+        self.send_header('Content-Length', '2')
+        self.end_headers()
+        self.wfile.write(b'ok')
+
+    def do_CONNECT(self):
+        self.server.requests.append(('CONNECT', self.path))
+        self.send_response(self.server.connect_status)
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def fake_proxy():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), FakeProxyHandler)
+    server.requests = []
+    server.status = 200
+    server.connect_status = 200
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+class FakeClock:
+    """可手动推进的时钟"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+
+@pytest.fixture
+def middleware():
+    middleware = RandomProxyMiddleware()
+    middleware.check_timeout = 5
+    yield middleware
+    middleware.spider_closed(None)
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def proxied(middleware, fake_proxy, clock):
+    """启用代理中间件，代理池中只有模拟代理，熔断器使用模拟时钟"""
+    proxy = proxy_url(fake_proxy)
+    middleware.enabled = True
+    middleware.candidates = {proxy}
+    middleware.pool.add(proxy)
+    middleware._get_breaker(proxy).clock = clock
+    return middleware
+
+
+def wait(d, timeout=10):
+    """驱动反应器直到Deferred触发"""
+    results = []
+    d.addBoth(results.append)
+    deadline = time.monotonic() + timeout
+    while not results and time.monotonic() < deadline:
+        reactor.iterate(0.01)
+    assert results, 'Deferred未在超时前触发'
+    return results[0]
+
+
+def proxy_url(server, scheme='http'):
+    return f"{scheme}://127.0.0.1:{server.server_address[1]}"
+
+
+def test_check_http_url(middleware, fake_proxy):
+    middleware.check_url = 'http://check.internal/ping'
+    assert wait(middleware._check_proxy(proxy_url(fake_proxy))) is True
+    assert fake_proxy.requests == [('GET', 'http://check.internal/ping')]
+
+
+def test_check_http_url_failure_status(middleware, fake_proxy):
+    middleware.check_url = 'http://check.internal/ping'
+    fake_proxy.status = 502
+    assert wait(middleware._check_proxy(proxy_url(fake_proxy))) is False
+
+
+def test_check_https_url_uses_tunnel(middleware, fake_proxy):
+    middleware.check_url = 'https://check.internal/ping'
+    assert wait(middleware._check_proxy(proxy_url(fake_proxy))) is True
+    assert fake_proxy.requests == [('CONNECT', 'check.internal:443')]
+
+
+def test_check_https_url_tunnel_refused(middleware, fake_proxy):
+    middleware.check_url = 'https://check.internal/ping'
+    fake_proxy.connect_status = 405
+    assert wait(middleware._check_proxy(proxy_url(fake_proxy))) is False
+
+
+@pytest.mark.parametrize('scheme', ['socks5', 'socks4'])
+def test_check_socks_proxy_unsupported(middleware, fake_proxy, scheme):
+    assert wait(middleware._check_proxy(proxy_url(fake_proxy, scheme))) is False
+    assert fake_proxy.requests == []
+
+
+def test_check_https_proxy_with_https_url_unsupported(middleware, fake_proxy):
+    middleware.check_url = 'https://check.internal/ping'
+    assert wait(middleware._check_proxy(proxy_url(fake_proxy, 'https'))) is False
+    assert fake_proxy.requests == []
+
+
+def test_check_unreachable_proxy(middleware, fake_proxy):
+    middleware.check_url = 'http://check.internal/ping'
+    url = proxy_url(fake_proxy)
+    fake_proxy.shutdown()
+    fake_proxy.server_close()
+    assert wait(middleware._check_proxy(url)) is False
+
+
+def test_revalidate_without_check_url_keeps_proxies(middleware, fake_proxy):
+    proxy = proxy_url(fake_proxy)
+    middleware.check_url = ''
+    middleware.candidates = {proxy}
+    assert wait(middleware._revalidate()) is None
+    assert proxy in middleware.pool
+    assert fake_proxy.requests == []
+
+
+def fetch(middleware, url='http://news.internal/article.html'):
+    """经过代理中间件选择代理，通过模拟代理下载，再把结果交给代理中间件"""
+    request = Request(url)
+    middleware.process_request(request, None)
+    proxy = request.meta.get('proxy')
+    if proxy is None:
+        return request, None
+    try:
+        result = requests.get(url, proxies={'http': proxy}, timeout=5)
+    except requests.RequestException as e:
+        middleware.process_exception(request, e, None)
+        return request, None
+    response = Response(url, status=result.status_code, request=request)
+    return request, middleware.process_response(request, response, None)
+
+
+def open_breaker(middleware, fake_proxy):
+    """连续失败直到熔断"""
+    fake_proxy.status = 502
+    for _ in range(middleware.max_fail_times):
+        fetch(middleware)
+    fake_proxy.status = 200
+
+
+def start_trial(middleware, fake_proxy, clock):
+    """熔断超时后重新加入代理池（代替定时任务），进入半开状态"""
+    clock.advance(middleware.breakers[proxy_url(fake_proxy)].open_timeout)
+    middleware._readmit_for_trial(proxy_url(fake_proxy))
+
+
+def test_breaker_closed_open_half_open_closed(proxied, fake_proxy, clock):
+    breaker = proxied.breakers[proxy_url(fake_proxy)]
+    fetch(proxied)
+    assert breaker.state == CLOSED
+
+    open_breaker(proxied, fake_proxy)
+    assert breaker.state == OPEN
+    assert fetch(proxied)[0].meta.get('proxy') is None
+
+    start_trial(proxied, fake_proxy, clock)
+    for _ in range(breaker.half_open_requests - 1):
+        request, _ = fetch(proxied)
+        assert breaker.state == HALF_OPEN
+        assert TRIAL_META_KEY not in request.meta
+    fetch(proxied)
+    assert breaker.state == CLOSED
+    assert proxy_url(fake_proxy) in proxied.pool
+
+
+def test_breaker_half_open_trial_failure_reopens(proxied, fake_proxy, clock):
+    breaker = proxied.breakers[proxy_url(fake_proxy)]
+    open_breaker(proxied, fake_proxy)
+    start_trial(proxied, fake_proxy, clock)
+    fetch(proxied)
+    assert breaker.state == HALF_OPEN
+
+    fake_proxy.status = 503
+    fetch(proxied)
+    assert breaker.state == OPEN
+    assert proxy_url(fake_proxy) not in proxied.pool
+
+
+def test_breaker_half_open_trial_proxy_down_reopens(proxied, fake_proxy, clock):
+    breaker = proxied.breakers[proxy_url(fake_proxy)]
+    open_breaker(proxied, fake_proxy)
+    start_trial(proxied, fake_proxy, clock)
+    fake_proxy.shutdown()
+    fake_proxy.server_close()
+    fetch(proxied)
+    assert breaker.state == OPEN
+
+
+def test_redirected_trial_releases_slot(proxied, fake_proxy, clock):
+    breaker = proxied.breakers[proxy_url(fake_proxy)]
+    open_breaker(proxied, fake_proxy)
+    start_trial(proxied, fake_proxy, clock)
+
+    # 试探请求的响应被重定向中间件截获，没有经过代理中间件，重定向后的请求复制了meta
+    for i in range(breaker.half_open_requests):
+        request = Request('http://news.internal/old.html')
+        proxied.process_request(request, None)
+        assert request.meta[TRIAL_META_KEY] == proxy_url(fake_proxy)
+        redirected = request.replace(url='http://news.internal/new.html')
+        proxied.process_request(redirected, None)
+        assert breaker.trials == i + 1
+        assert redirected.meta[TRIAL_META_KEY] == proxy_url(fake_proxy)
+        fetched = requests.get(redirected.url, proxies={'http': redirected.meta['proxy']}, timeout=5)
+        proxied.process_response(redirected, Response(redirected.url, status=fetched.status_code), None)
+    assert breaker.state == CLOSED
+
+
+def test_dropped_trials_expire(proxied, fake_proxy, clock):
+    breaker = proxied.breakers[proxy_url(fake_proxy)]
+    open_breaker(proxied, fake_proxy)
+    start_trial(proxied, fake_proxy, clock)
+
+    # 试探请求被丢弃，结果和后续请求都不再经过代理中间件
+    for _ in range(breaker.half_open_requests):
+        proxied.process_request(Request('http://news.internal/dropped.html'), None)
+    assert fetch(proxied)[0].meta.get('proxy') is None
+
+    clock.advance(breaker.trial_timeout)
+    proxied._apply_check_results({proxy_url(fake_proxy): True})
+    assert breaker.trials == 0
+    for _ in range(breaker.half_open_requests):
+        fetch(proxied)
+    assert breaker.state == CLOSED
+
+
+def exhaust_trials(middleware, proxy, clock):
+    """使代理进入半开状态并用完试探名额"""
+    breaker = middleware._get_breaker(proxy)
+    breaker.clock = clock
+    for _ in range(breaker.max_consecutive_failures):
+        breaker.record(False)
+    clock.advance(breaker.open_timeout)
+    middleware._readmit_for_trial(proxy)
+    while breaker.allow():
+        pass
+    assert breaker.state == HALF_OPEN
+
+
+def test_exhausted_half_open_falls_back_to_closed_proxy(proxied, fake_proxy, clock, monkeypatch):
+    half_open = 'http://10.0.0.9:8080'
+    proxied.candidates.add(half_open)
+    proxied.pool.add(half_open)
+    exhaust_trials(proxied, half_open, clock)
+    monkeypatch.setattr(proxied, '_get_random_proxy', lambda: half_open)
+
+    request = Request('http://news.internal/article.html')
+    assert proxied.process_request(request, None) is None
+    assert request.meta['proxy'] == proxy_url(fake_proxy)
+
+
+def test_all_exhausted_reschedules_instead_of_direct(proxied, fake_proxy, clock):
+    exhaust_trials(proxied, proxy_url(fake_proxy), clock)
+
+    request = Request('http://news.internal/article.html')
+    rescheduled = proxied.process_request(request, None)
+    assert isinstance(rescheduled, Request)
+    assert rescheduled.dont_filter
+    assert 'proxy' not in rescheduled.meta
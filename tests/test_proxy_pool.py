@@ -0,0 +1,31 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+代理池测试
+"""
+
+from utils.proxy_pool import ProxyPool
+
+PROXIES = ['http://10.0.0.1:8080', 'http://10.0.0.2:8080', 'http://10.0.0.3:8080']
+
+
+def test_choose_only_pooled_proxies():
+    pool = ProxyPool(PROXIES)
+    pool.remove(PROXIES[0])
+    assert {pool.choose() for _ in range(200)} <= set(PROXIES[1:])
+
+
+def test_remove_keeps_stats():
+    pool = ProxyPool(PROXIES)
+    for _ in range(5):
+        pool.record(PROXIES[0], False, 3.0)
+    weight = pool.weights[pool.index[PROXIES[0]]]
+
+    pool.remove(PROXIES[0])
+    stats = pool.get_stats()['http://10.0.0.1:8080']
+    assert (stats['fail'], stats['weight']) == (5, 0.0)
+
+    pool.add(PROXIES[0])
+    assert pool.stats[PROXIES[0]]['fail'] == 5
+    assert pool.weights[pool.index[PROXIES[0]]] == weight
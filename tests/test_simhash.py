@@ -0,0 +1,46 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+SimHash分段索引测试
+"""
+
+from utils.simhash import SimHashIndex
+
+FINGERPRINT = 0x0123456789ABCDEF
+CHANGED = FINGERPRINT ^ 0xFFFF0000FFFF0000
+
+
+def test_find_skips_same_key():
+    index = SimHashIndex()
+    index.add(FINGERPRINT, 1, key=10)
+    assert index.find(FINGERPRINT ^ 1) == 1
+    assert index.find(FINGERPRINT ^ 1, key=10) is None
+
+
+def test_add_same_key_replaces_entry():
+    index = SimHashIndex()
+    index.add(FINGERPRINT, 1, key=10)
+    index.add(CHANGED, 2, key=10)
+    assert len(index) == 1
+    assert index.find(FINGERPRINT) is None
+    assert index.find(CHANGED) == 2
+    assert all(bucket for table in index.tables for bucket in table.values())
+
+
+def test_add_without_key_appends():
+    index = SimHashIndex()
+    index.add(FINGERPRINT, 1)
+    index.add(FINGERPRINT, 2)
+    assert len(index) == 2
+
+
+def test_remove():
+    index = SimHashIndex()
+    index.add(FINGERPRINT, 1, key=10)
+    index.add(CHANGED, 2, key=11)
+    assert index.remove(10)
+    assert not index.remove(10)
+    assert len(index) == 1
+    assert index.find(FINGERPRINT) is None
+    assert index.find(CHANGED) == 2
@@ -0,0 +1,69 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+文本清洗测试
+"""
+
+import re
+import html
+import random
+
+import pytest
+
+from utils.text_cleaner import TextCleaner
+
+
+def legacy_clean_all(text, stopwords=None):
+    """逐步清洗的原始实现，综合清洗的输出需与其一致"""
+    text = html.unescape(text)
+    text = re.sub(r'<[^>]+>', '', text)
+    text = re.sub(r'https?://\S+', '', text)
+    text = re.sub(r'\S+@\S+\.\S+', '', text)
+    text = re.sub(r'1[3-9]\d{9}', '', text)
+    text = re.sub(r'\d{3,4}-\d{7,8}', '', text)
+    text = re.sub(r'\d{17}[\dXx]', '', text)
+    text = re.sub(r'\s+', ' ', text)
+    if stopwords:
+        words = text.split()
+        words = [word for word in words if word not in stopwords]
+        text = ' '.join(words)
+    return text.strip()
+
+
+@pytest.mark.parametrize('text', [
+    # 移除标签后拼接成完整的手机号
+    '电话<b>138</b>12345678',
+    # 手机号先于身份证号移除
+    '身份证 110101199003071234 号',
+    '座机 010-12345678 手机13812345678',
+    # 移除URL后拼接成邮箱地址
+    'a@http://x.com b.cn',
+    # 手机号位于邮箱地址中，邮箱先被整体移除
+    '联系 x@13812345678.com 咨询',
+    '@a.b 邮箱 reporter@163.com，@ 结尾@',
+    '&lt;p&gt;实体&amp;标签&lt;/p&gt; <p>正文</p>',
+    '',
+    '   ',
+])
+def test_clean_all_matches_legacy(text):
+    assert TextCleaner.clean_all(text) == legacy_clean_all(text)
+
+
+def test_clean_all_phone_split_by_tag():
+    assert TextCleaner.clean_all('电话<b>138</b>12345678') == '电话'
+
+
+def test_clean_all_stopwords():
+    text = '今天 的 新闻 和 明天 的 新闻'
+    stopwords = ['的', '和']
+    assert TextCleaner.clean_all(text, stopwords) == legacy_clean_all(text, stopwords) == '今天 新闻 明天 新闻'
+
+
+def test_clean_all_random_matches_legacy():
+    rng = random.Random(0)
+    pieces = ['中国', '经济', '<b>', '</b>', '<br/>', '138', '1381234', '5678', '010-', '12345678', '1101011990',
+              '03071234', 'X', '@', 'a@b.c', '.com', 'http://', 'https://x.cn/', '&amp;', '&lt;', ' ', '\n', '，']
+    for _ in range(2000):
+        text = ''.join(rng.choice(pieces) for _ in range(rng.randint(0, 30)))
+        assert TextCleaner.clean_all(text) == legacy_clean_all(text), text
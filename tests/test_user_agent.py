@@ -0,0 +1,69 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+User-Agent中间件测试
+"""
+
+import os
+
+import pytest
+from scrapy import Request
+from scrapy.exceptions import IgnoreRequest
+
+from crawler.middlewares.user_agent import RandomUserAgentMiddleware
+
+STATM_PATH = '/proc/self/statm'
+
+
+def rss_bytes():
+    """当前进程的常驻内存（字节）"""
+    with open(STATM_PATH) as f:
+        return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+
+
+def article_urls(start, count):
+    return (f"https://www.163.com/dy/article/{i:08d}.html" for i in range(start, start + count))
+
+
+@pytest.fixture
+def middleware():
+    middleware = RandomUserAgentMiddleware()
+    middleware.enabled = True
+    middleware.attempts_cache_size = 10000
+    return middleware
+
+
+def test_max_attempts(middleware):
+    url = 'https://www.163.com/dy/article/00000001.html'
+    for _ in range(middleware.max_attempts_per_url):
+        middleware.process_request(Request(url), None)
+    with pytest.raises(IgnoreRequest):
+        middleware.process_request(Request(url), None)
+
+
+def test_evicted_url_counts_new_entry(middleware):
+    middleware.attempts_cache_size = 2
+    for url in ['https://a.163.com/1.html', 'https://a.163.com/2.html', 'https://a.163.com/3.html',
+                'https://a.163.com/1.html']:
+        middleware.process_request(Request(url), None)
+    assert len(middleware.url_attempts) == 2
+    assert middleware.attempt_entries == 4
+
+
+@pytest.mark.skipif(not os.path.exists(STATM_PATH), reason='需要 /proc/self/statm')
+def test_attempt_tracking_rss_bounded_in_process(middleware):
+    """
+    在进程内直接调用 process_request（不经过下载器和本地服务器），
+    检查尝试次数记录的LRU淘汰：记录填满后再处理10万个不同URL，常驻内存增长与URL数无关
+    """
+    for url in article_urls(0, middleware.attempts_cache_size):
+        middleware.process_request(Request(url), None)
+    before = rss_bytes()
+    for url in article_urls(middleware.attempts_cache_size, 100000):
+        middleware.process_request(Request(url), None)
+    growth = rss_bytes() - before
+
+    assert len(middleware.url_attempts) == middleware.attempts_cache_size
+    # 不淘汰时10万条记录约占16MB
+    assert growth < 4 * 1024 * 1024
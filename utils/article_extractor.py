@@ -0,0 +1,251 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+新闻正文提取模块
+在同一棵lxml文档树上执行预编译的XPath，一次提取标题、正文、图片、标签及相关链接
+配合选择器学习缓存时，优先尝试同一站点模板上次命中的选择器
+"""
+
+import logging
+from urllib.parse import urljoin
+
+from lxml import etree
+from parsel.csstranslator import HTMLTranslator
+
+from utils.selector_cache import template_key, split_selectors
+
+logger = logging.getLogger(__name__)
+
+_translator = HTMLTranslator()
+
+
+def compile_css(css):
+    """
+    将CSS选择器（支持 ::text 和 ::attr()）编译为XPath
+
+    Args:
+        css: CSS选择器，多个选择器以逗号分隔
+
+    Returns:
+        etree.XPath: 编译后的XPath
+    """
+    return etree.XPath(_translator.css_to_xpath(css))
+
+
+# 新闻页面字段选择器
+ARTICLE_SELECTORS = {
+    'title': 'h1.post_title::text, h1.title::text, h1.article-title::text, h1.main-title::text, div.article-header h1::text, h1.headline::text, h1.news_title::text, h1.art_tit::text, h1.main_title::text, h1.page_title::text',
+    'subtitle': 'div.post_subtitle::text, div.sub-title::text, div.article-subtitle::text, div.sub_title::text, div.subtitle::text, p.summary::text',
+    'source': 'div.post_info a.source::text, div.post_info span.source::text, div.article-source a::text, span.source::text, a.source::text, div.info a.source::text, div.info span.source::text, div.from a::text, div.from span::text, div.article_info span.source::text, div.article_info a.source::text',
+    'author': 'div.post_author::text, div.author::text, span.author::text, div.article-author::text, div.info span.author::text, div.info a.author::text, div.article_info span.author::text, div.article_info a.author::text',
+    'publish_time': 'div.post_info span.post_time::text, div.post_info time::text, span.time::text, span.publish-time::text, div.article-info span.date::text, div.info span.time::text, div.info time::text, div.from span.time::text, div.from time::text, div.article_info span.time::text, div.article_info time::text',
+    'content': 'div.post_body, div.post_text, div.article-content, div.main-content, article.article-content, div.content, div.article, div.news_txt, div.article_content, div.main_content, div.end_content',
+    'keywords': 'meta[name="keywords"]::attr(content)',
+    'tags': 'div.post_tags a::text, div.article-tags a::text, div.tags a::text, div.tag a::text, div.keywords a::text, div.key_word a::text',
+    'view_count': 'div.post_info span.post_view::text, span.view-count::text, span.views::text, span.view::text, span.read::text, span.read-count::text',
+}
+
+# 标题备用XPath
+TITLE_FALLBACK_XPATH = etree.XPath('//h1[contains(@class, "title") or contains(@class, "post_title") or contains(@class, "headline") or contains(@class, "news_title")]/text()')
+
+# 正文内的相关新闻链接
+RELATED_XPATH = compile_css('div.related_news a, div.related a, div.relative_news a, div.relevant a, div.correlation a, div.related-news a, div.news-related a')
+
+# 正文纯文本（忽略脚本和样式内容）
+TEXT_XPATH = etree.XPath('descendant-or-self::text()[not(ancestor::script or ancestor::style or ancestor::template)]')
+
+# 正文图片
+IMAGE_XPATH = etree.XPath('descendant-or-self::img')
+
+COMPILED_SELECTORS = {name: compile_css(css) for name, css in ARTICLE_SELECTORS.items()}
+
+# 按站点模板学习命中选择器的字段
+LEARNED_FIELDS = ('title', 'content', 'publish_time', 'source', 'author')
+
+# 可学习字段拆分后的单个选择器
+SINGLE_SELECTORS = {
+    name: {css: compile_css(css) for css in split_selectors(ARTICLE_SELECTORS[name])}
+    for name in LEARNED_FIELDS
+}
+
+
+def first(root, name):
+    """
+    获取字段选择器的第一个结果
+
+    Args:
+        root: lxml文档树
+        name: 字段名
+
+    Returns:
+        第一个匹配结果，无匹配时返回None
+    """
+    result = COMPILED_SELECTORS[name](root)
+    return result[0] if result else None
+
+
+def element_text(element):
+    """
+    获取元素纯文本，与 BeautifulSoup 的 get_text(strip=True) 结果一致
+
+    Args:
+        element: lxml元素
+
+    Returns:
+        str: 纯文本
+    """
+    return ''.join(text.strip() for text in TEXT_XPATH(element))
+
+
+def element_html(element):
+    """
+    序列化元素HTML
+
+    Args:
+        element: lxml元素
+
+    Returns:
+        str: HTML内容
+    """
+    return etree.tostring(element, method='html', encoding='unicode', with_tail=False)
+
+
+class ArticleExtractor:
+    """新闻正文提取器"""
+
+    def __init__(self, root, base_url, selector_cache=None):
+        """
+        初始化
+
+        Args:
+            root: lxml文档树（如 Scrapy 响应的 response.selector.root）
+            base_url: 页面URL，用于处理相对URL
+            selector_cache: 选择器学习缓存
+        """
+        self.root = root
+        self.base_url = base_url
+        self.selector_cache = selector_cache
+        self.template = template_key(base_url) if selector_cache else None
+
+    def _absolute(self, url):
+        """处理相对URL"""
+        if not url.startswith(('http://', 'https://')):
+            return urljoin(self.base_url, url)
+        return url
+
+    def _first(self, name):
+        """获取字段的第一个结果，可学习字段优先使用已学习的选择器"""
+        if not self.selector_cache or name not in SINGLE_SELECTORS:
+            return first(self.root, name)
+
+        learned = self.selector_cache.get(self.template, name)
+        if learned in SINGLE_SELECTORS[name]:
+            result = SINGLE_SELECTORS[name][learned](self.root)
+            if result:
+                self.selector_cache.record(self.template, name, learned, hit=True)
+                return result[0]
+
+        # 未命中时回退到组合选择器，并记录实际命中的单个选择器
+        value = first(self.root, name)
+        winner = None
+        if value is not None:
+            for css, xpath in SINGLE_SELECTORS[name].items():
+                if value in xpath(self.root):
+                    winner = css
+                    break
+        self.selector_cache.record(self.template, name, winner, hit=False)
+        return value
+
+    def _text(self, name):
+        """获取字段文本"""
+        value = self._first(name)
+        return str(value).strip() if value is not None else ''
+
+    def get_title(self):
+        """
+        获取标题
+
+        Returns:
+            str: 标题
+        """
+        title = self._first('title')
+        if title is None:
+            result = TITLE_FALLBACK_XPATH(self.root)
+            title = result[0] if result else None
+        return str(title).strip() if title is not None else ''
+
+    def get_images(self, content):
+        """
+        获取正文图片
+
+        Args:
+            content: 正文元素
+
+        Returns:
+            list: 图片信息列表
+        """
+        images = []
+        for i, img in enumerate(IMAGE_XPATH(content)):
+            img_url = img.get('src', '')
+            if not img_url:
+                continue
+            images.append({
+                'url': self._absolute(img_url),
+                'title': img.get('alt', ''),
+                'description': img.get('title', ''),
+                'is_cover': (i == 0),  # 第一张图片作为封面
+                'position': i
+            })
+        return images
+
+    def get_related_links(self, content):
+        """
+        获取正文中的相关新闻链接
+
+        Args:
+            content: 正文元素
+
+        Returns:
+            list: 链接列表
+        """
+        links = []
+        for element in RELATED_XPATH(content):
+            href = element.get('href', '')
+            if href:
+                links.append(self._absolute(href))
+        return links
+
+    def extract(self):
+        """
+        提取新闻页面所有字段
+
+        Returns:
+            dict: 新闻字段，未找到标题时只包含空标题
+        """
+        title = self.get_title()
+        if not title:
+            return {'title': ''}
+
+        result = {
+            'title': title,
+            'subtitle': self._text('subtitle'),
+            'source': self._text('source'),
+            'author': self._text('author'),
+            'publish_time': self._text('publish_time'),
+            'keywords': self._text('keywords'),
+            'tags': [str(tag).strip() for tag in COMPILED_SELECTORS['tags'](self.root) if str(tag).strip()],
+            'view_count': self._text('view_count'),
+            'content': '',
+            'content_html': '',
+            'images': [],
+            'related_links': [],
+        }
+
+        content = self._first('content')
+        if content is not None:
+            result['content'] = element_text(content)
+            result['content_html'] = element_html(content)
+            result['images'] = self.get_images(content)
+            result['related_links'] = self.get_related_links(content)
+        return result
@@ -0,0 +1,124 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+新闻分类解析模块
+根据新闻URL解析分类：按域名查表，再按路径做最长前缀匹配
+"""
+
+import logging
+from urllib.parse import urlparse
+
+from config.settings import NEWS_CATEGORIES
+
+logger = logging.getLogger(__name__)
+
+# 未在分类URL中出现的子域名与分类名称的对应关系
+SUBDOMAIN_ALIASES = {
+    'war': '军事',
+}
+
+# 默认分类ID
+DEFAULT_CATEGORY_ID = 1
+
+
+def _path_segments(path):
+    """拆分URL路径"""
+    return [segment for segment in path.split('/') if segment]
+
+
+def _host(parsed):
+    """获取URL主机名（小写，不含端口）"""
+    return parsed.hostname or ''
+
+
+class CategoryResolver:
+    """新闻分类解析器"""
+
+    def __init__(self, categories, aliases=None, default_id=DEFAULT_CATEGORY_ID, domain='163.com'):
+        """
+        初始化，构建域名到路径前缀树的映射
+
+        Args:
+            categories: 分类列表，每项包含 id、name、url
+            aliases: 子域名到分类名称的映射
+            default_id: 无法解析时使用的分类ID
+            domain: 主域名，用于展开子域名别名
+        """
+        self.categories = {category['id']: category for category in categories}
+        self.default_id = default_id
+        # {域名: 前缀树节点}，节点结构为 {'id': 分类ID, 'children': {路径片段: 子节点}}
+        self.trie = {}
+
+        for category in categories:
+            parsed = urlparse(category['url'])
+            self._insert(_host(parsed), _path_segments(parsed.path), category['id'])
+
+        # 子域名别名只在对应域名尚无分类时生效
+        name_to_id = {category['name']: category['id'] for category in categories}
+        for subdomain, name in (aliases or {}).items():
+            host = f"{subdomain}.{domain}"
+            if name in name_to_id and host not in self.trie:
+                self._insert(host, [], name_to_id[name])
+
+    def _insert(self, host, segments, category_id):
+        """插入一条分类规则"""
+        node = self.trie.setdefault(host, {'id': None, 'children': {}})
+        for segment in segments:
+            node = node['children'].setdefault(segment, {'id': None, 'children': {}})
+        node['id'] = category_id
+
+    def resolve_id(self, url):
+        """
+        解析URL对应的分类ID，复杂度为 O(路径长度)
+
+        Args:
+            url: 新闻URL
+
+        Returns:
+            int: 分类ID
+        """
+        parsed = urlparse(url)
+        node = self.trie.get(_host(parsed))
+        if node is None:
+            return self.default_id
+
+        # 沿路径下行，记录最深的带分类节点
+        category_id = node['id']
+        for segment in _path_segments(parsed.path):
+            node = node['children'].get(segment)
+            if node is None:
+                break
+            if node['id'] is not None:
+                category_id = node['id']
+        return category_id if category_id is not None else self.default_id
+
+    def resolve(self, url):
+        """
+        解析URL对应的分类
+
+        Args:
+            url: 新闻URL
+
+        Returns:
+            tuple: (分类ID, 分类名称)
+        """
+        category_id = self.resolve_id(url)
+        return category_id, self.get_name(category_id)
+
+    def get_name(self, category_id):
+        """
+        获取分类名称
+
+        Args:
+            category_id: 分类ID
+
+        Returns:
+            str: 分类名称，未知分类返回空字符串
+        """
+        category = self.categories.get(category_id)
+        return category['name'] if category else ''
+
+
+# 进程内共享的分类解析器
+category_resolver = CategoryResolver(NEWS_CATEGORIES, SUBDOMAIN_ALIASES)
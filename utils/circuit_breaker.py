@@ -0,0 +1,200 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+熔断器模块
+按滑动窗口内的错误率和P95延迟在 关闭/打开/半开 三种状态间切换
+"""
+
+import time
+import logging
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+# 熔断器状态
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class CircuitBreaker:
+    """熔断器"""
+
+    def __init__(self, window=50, min_requests=10, error_rate=0.5, p95_latency=10.0,
+                 max_consecutive_failures=3, open_timeout=60, half_open_requests=3,
+                 trial_timeout=60, clock=time.monotonic, on_transition=None):
+        """
+        初始化
+
+        Args:
+            window: 滑动窗口大小（最近的请求数）
+            min_requests: 窗口内至少有多少个请求才按错误率和延迟判断
+            error_rate: 触发熔断的错误率
+            p95_latency: 触发熔断的P95延迟（秒）
+            max_consecutive_failures: 触发熔断的连续失败次数
+            open_timeout: 熔断后多久进入半开状态（秒）
+            half_open_requests: 半开状态下允许的试探请求数，全部成功后关闭熔断
+            trial_timeout: 试探请求超过该时间（秒）仍无结果时释放名额
+            clock: 时钟函数
+            on_transition: 状态变化回调，参数为 (原状态, 新状态, 原因)
+        """
+        self.window = window
+        self.min_requests = min_requests
+        self.error_rate_threshold = error_rate
+        self.p95_latency_threshold = p95_latency
+        self.max_consecutive_failures = max_consecutive_failures
+        self.open_timeout = open_timeout
+        self.half_open_requests = half_open_requests
+        self.trial_timeout = trial_timeout
+        self.clock = clock
+        self.on_transition = on_transition
+
+        self.state = CLOSED
+        self.opened_at = None
+        # 滑动窗口：(是否成功, 延迟)
+        self.outcomes = deque(maxlen=window)
+        self.consecutive_failures = 0
+        self.trials = 0
+        self.trial_successes = 0
+        # 半开状态下尚无结果的试探请求的开始时间
+        self.pending_trials = deque()
+
+    def _transition(self, state, reason):
+        """切换状态"""
+        previous = self.state
+        self.state = state
+        if state == OPEN:
+            self.opened_at = self.clock()
+        elif state == HALF_OPEN:
+            self.trials = 0
+            self.trial_successes = 0
+            self.pending_trials.clear()
+        elif state == CLOSED:
+            self.outcomes.clear()
+            self.consecutive_failures = 0
+        if self.on_transition:
+            self.on_transition(previous, state, reason)
+
+    def error_rate(self):
+        """
+        窗口内的错误率
+
+        Returns:
+            float: 错误率
+        """
+        if not self.outcomes:
+            return 0.0
+        return sum(1 for success, _ in self.outcomes if not success) / len(self.outcomes)
+
+    def p95_latency(self):
+        """
+        窗口内的P95延迟
+
+        Returns:
+            float: P95延迟（秒），窗口内没有延迟数据时返回None
+        """
+        latencies = sorted(latency for _, latency in self.outcomes if latency is not None)
+        if not latencies:
+            return None
+        return latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+
+    def allow(self):
+        """
+        判断是否允许发送请求，半开状态下会占用一个试探名额
+
+        Returns:
+            bool: 是否允许
+        """
+        if self.state == OPEN:
+            if self.clock() - self.opened_at < self.open_timeout:
+                return False
+            self._transition(HALF_OPEN, '熔断超时')
+        if self.state == HALF_OPEN:
+            self.expire_trials()
+            if self.trials >= self.half_open_requests:
+                return False
+            self.trials += 1
+            self.pending_trials.append(self.clock())
+        return True
+
+    def release(self):
+        """
+        释放一个没有结果的试探请求名额（如请求被其他中间件重定向或丢弃）
+
+        Returns:
+            bool: 是否释放了名额
+        """
+        if self.state != HALF_OPEN or not self.pending_trials:
+            return False
+        self.pending_trials.popleft()
+        self.trials -= 1
+        return True
+
+    def expire_trials(self):
+        """
+        释放超时仍无结果的试探请求名额
+
+        Returns:
+            int: 释放的名额数
+        """
+        if self.state != HALF_OPEN:
+            return 0
+        expired = 0
+        now = self.clock()
+        while self.pending_trials and now - self.pending_trials[0] >= self.trial_timeout:
+            self.pending_trials.popleft()
+            self.trials -= 1
+            expired += 1
+        return expired
+
+    def record(self, success, latency=None):
+        """
+        记录请求结果
+
+        Args:
+            success: 是否成功
+            latency: 延迟（秒）
+
+        Returns:
+            str: 记录后的状态
+        """
+        slow = latency is not None and latency > self.p95_latency_threshold
+
+        if self.state == HALF_OPEN:
+            if self.pending_trials:
+                self.pending_trials.popleft()
+            if not success or slow:
+                self._transition(OPEN, '试探请求失败' if not success else f'试探请求延迟 {latency:.2f}秒')
+            else:
+                self.trial_successes += 1
+                if self.trial_successes >= self.half_open_requests:
+                    self._transition(CLOSED, '试探请求全部成功')
+            return self.state
+
+        if self.state == OPEN:
+            return self.state
+
+        self.outcomes.append((success, latency))
+        self.consecutive_failures = 0 if success else self.consecutive_failures + 1
+        if self.consecutive_failures >= self.max_consecutive_failures:
+            self._transition(OPEN, f'连续失败 {self.consecutive_failures} 次')
+        elif len(self.outcomes) >= self.min_requests:
+            error_rate = self.error_rate()
+            p95_latency = self.p95_latency()
+            if error_rate >= self.error_rate_threshold:
+                self._transition(OPEN, f'错误率 {error_rate:.0%}')
+            elif p95_latency is not None and p95_latency > self.p95_latency_threshold:
+                self._transition(OPEN, f'P95延迟 {p95_latency:.2f}秒')
+        return self.state
+
+    def remaining_open_time(self):
+        """
+        距离进入半开状态的剩余时间
+
+        Returns:
+            float: 剩余秒数，非打开状态返回0
+        """
+        if self.state != OPEN:
+            return 0.0
+        return max(0.0, self.open_timeout - (self.clock() - self.opened_at))
@@ -0,0 +1,140 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+增量爬取状态存储模块
+按URL保存 ETag、Last-Modified 及页面内容指纹，使用SQLite持久化
+"""
+
+import os
+import sqlite3
+import hashlib
+import logging
+import datetime
+
+from utils.url_filter import UrlSeenStore
+
+logger = logging.getLogger(__name__)
+
+
+class CrawlStateStore:
+    """URL爬取状态存储"""
+
+    def __init__(self, path, commit_every=500):
+        """
+        初始化
+
+        Args:
+            path: SQLite数据库文件路径
+            commit_every: 累计多少条更新后提交一次
+        """
+        self.path = path
+        self.commit_every = commit_every
+        self.conn = None
+        self.pending = {}
+
+    def open(self):
+        """打开存储"""
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        self.conn = sqlite3.connect(self.path)
+        self.conn.execute(
+            'CREATE TABLE IF NOT EXISTS crawl_state ('
+            'url_hash INTEGER PRIMARY KEY, '
+            'etag TEXT, '
+            'last_modified TEXT, '
+            'fingerprint TEXT, '
+            'update_time TEXT)'
+        )
+        self.conn.commit()
+        logger.info(f"打开增量爬取状态存储: {self.path}")
+        return self
+
+    def close(self):
+        """提交未写入的更新并关闭存储"""
+        if not self.conn:
+            return
+        self.flush()
+        self.conn.close()
+        self.conn = None
+
+    @staticmethod
+    def key(url):
+        """
+        计算URL对应的主键（SQLite整数为有符号64位）
+
+        Args:
+            url: URL
+
+        Returns:
+            int: 主键
+        """
+        url_hash = UrlSeenStore.url_hash(url)
+        return url_hash - (1 << 64) if url_hash >= (1 << 63) else url_hash
+
+    @staticmethod
+    def fingerprint(body):
+        """
+        计算页面内容指纹
+
+        Args:
+            body: 页面内容（字节）
+
+        Returns:
+            str: 内容指纹
+        """
+        return hashlib.blake2b(body, digest_size=16).hexdigest()
+
+    def get(self, url):
+        """
+        获取URL的爬取状态
+
+        Args:
+            url: URL
+
+        Returns:
+            dict: 爬取状态，不存在时返回None
+        """
+        key = self.key(url)
+        if key in self.pending:
+            return self.pending[key]
+
+        row = self.conn.execute(
+            'SELECT etag, last_modified, fingerprint FROM crawl_state WHERE url_hash = ?', (key,)
+        ).fetchone()
+        if not row:
+            return None
+        return {'etag': row[0], 'last_modified': row[1], 'fingerprint': row[2]}
+
+    def set(self, url, etag=None, last_modified=None, fingerprint=None):
+        """
+        更新URL的爬取状态
+
+        Args:
+            url: URL
+            etag: ETag
+            last_modified: Last-Modified
+            fingerprint: 内容指纹
+        """
+        self.pending[self.key(url)] = {
+            'etag': etag,
+            'last_modified': last_modified,
+            'fingerprint': fingerprint,
+        }
+        if len(self.pending) >= self.commit_every:
+            self.flush()
+
+    def flush(self):
+        """批量写入未提交的更新"""
+        if not self.pending:
+            return
+        now = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        self.conn.executemany(
+            'INSERT OR REPLACE INTO crawl_state (url_hash, etag, last_modified, fingerprint, update_time) '
+            'VALUES (?, ?, ?, ?, ?)',
+            [
+                (key, state['etag'], state['last_modified'], state['fingerprint'], now)
+                for key, state in self.pending.items()
+            ]
+        )
+        self.conn.commit()
+        self.pending.clear()
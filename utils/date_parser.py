@@ -0,0 +1,185 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+发布时间解析模块
+使用一个预编译正则识别网易新闻常见的时间格式，直接构造datetime
+"""
+
+import re
+import logging
+import datetime
+from functools import lru_cache
+from urllib.parse import urlparse
+
+logger = logging.getLogger(__name__)
+
+# 支持的格式：
+#   2024-05-01 10:20:30 / 2024/05/01 10:20 / 2024-05-01T10:20:30+08:00 / 2024-05-01T02:20:30Z / 2024-05-01
+#   2024年05月01日 10:20
+#   3小时前 / 5分钟前 / 2天前 / 刚刚
+#   1714530030 / 1714530030000（Unix时间戳）
+#   https://news.163.com/24/0501/10/J0ABCDEF.html（URL中的 年/月日/时）
+_DATE_PATTERN = re.compile(r'''
+    (?P<year>\d{4})\s*[-/.年]\s*(?P<month>\d{1,2})\s*[-/.月]\s*(?P<day>\d{1,2})\s*日?
+        (?:\s*T?\s*(?P<hour>\d{1,2})\s*[:：时]\s*(?P<minute>\d{1,2})(?:\s*[:：分]\s*(?P<second>\d{1,2})(?:\.\d+)?)?
+            (?P<tz>Z|\s?[+-]\d{2}:?\d{2}(?!\d))?)?
+    |(?P<amount>\d+)\s*(?P<unit>秒|分钟|小时|天)前
+    |(?P<just>刚刚)
+    |/(?P<url_year>\d{2})/(?P<url_date>\d{4})/(?P<url_hour>\d{2})/
+    |(?<![\dA-Za-z])(?P<timestamp>\d{10})(?P<millis>\d{3})?(?!\d)
+''', re.VERBOSE)
+
+# URL路径中的日期片段：
+#   /24/0501/10/（年/月日/时）、/2024/0501/、/2024/05/01/、/240501/
+_URL_DATE_PATTERN = re.compile(r'''
+    /(?P<short_year>\d{2})/(?P<short_date>\d{4})/(?P<hour>\d{2})/
+    |/(?P<year>20\d{2})/(?P<month_day>\d{4})/
+    |/(?P<full_year>20\d{2})/(?P<month>\d{2})/(?P<day>\d{2})/
+    |/(?P<compact>\d{6})/
+''', re.VERBOSE)
+
+_UNIT_SECONDS = {
+    '秒': 1,
+    '分钟': 60,
+    '小时': 3600,
+    '天': 86400,
+}
+
+
+@lru_cache(maxsize=8192)
+def _parse_cached(text):
+    """
+    解析时间文本（结果与当前时间无关，可缓存）
+
+    Args:
+        text: 时间文本
+
+    Returns:
+        datetime.datetime | datetime.timedelta | None:
+            绝对时间返回datetime，相对时间返回距当前的时间差，无法识别返回None
+    """
+    match = _DATE_PATTERN.search(text)
+    if not match:
+        return None
+
+    groups = match.groupdict()
+    try:
+        if groups['year']:
+            result = datetime.datetime(
+                int(groups['year']), int(groups['month']), int(groups['day']),
+                int(groups['hour'] or 0), int(groups['minute'] or 0), int(groups['second'] or 0)
+            )
+            if groups['tz']:
+                result = _to_local(result, groups['tz'].strip())
+            return result
+        if groups['amount']:
+            return datetime.timedelta(seconds=int(groups['amount']) * _UNIT_SECONDS[groups['unit']])
+        if groups['just']:
+            return datetime.timedelta(0)
+        if groups['url_year']:
+            url_date = groups['url_date']
+            return datetime.datetime(
+                2000 + int(groups['url_year']), int(url_date[:2]), int(url_date[2:]), int(groups['url_hour'])
+            )
+        return datetime.datetime.fromtimestamp(int(groups['timestamp']))
+    except (ValueError, OverflowError, OSError):
+        return None
+
+
+def _to_local(value, tz):
+    """
+    将带时区偏移的时间转换为本地时间（与 datetime.now() 的爬取时间一致，不带时区）
+
+    Args:
+        value: 不带时区的时间
+        tz: 时区偏移，Z 或 +08:00 / +0800
+
+    Returns:
+        datetime.datetime: 本地时间
+    """
+    if tz == 'Z':
+        offset = datetime.timedelta(0)
+    else:
+        sign = -1 if tz[0] == '-' else 1
+        digits = tz[1:].replace(':', '')
+        offset = sign * datetime.timedelta(hours=int(digits[:2]), minutes=int(digits[2:]))
+    return value.replace(tzinfo=datetime.timezone(offset)).astimezone().replace(tzinfo=None)
+
+
+def parse_datetime(text, now=None):
+    """
+    解析发布时间
+
+    Args:
+        text: 时间文本或包含时间的URL
+        now: 计算相对时间使用的当前时间，默认为当前时间
+
+    Returns:
+        datetime.datetime: 发布时间，无法识别时返回None
+    """
+    if not text:
+        return None
+
+    result = _parse_cached(text.strip())
+    if isinstance(result, datetime.timedelta):
+        return (now or datetime.datetime.now()) - result
+    return result
+
+
+@lru_cache(maxsize=8192)
+def _parse_url_path(path):
+    """
+    解析URL路径中的日期片段（结果可缓存）
+
+    Args:
+        path: URL路径
+
+    Returns:
+        datetime.datetime: 发布时间，无法识别时返回None
+    """
+    for match in _URL_DATE_PATTERN.finditer(path):
+        groups = match.groupdict()
+        try:
+            if groups['short_year']:
+                date = groups['short_date']
+                return datetime.datetime(
+                    2000 + int(groups['short_year']), int(date[:2]), int(date[2:]), int(groups['hour'])
+                )
+            if groups['year']:
+                date = groups['month_day']
+                return datetime.datetime(int(groups['year']), int(date[:2]), int(date[2:]))
+            if groups['full_year']:
+                return datetime.datetime(int(groups['full_year']), int(groups['month']), int(groups['day']))
+            date = groups['compact']
+            return datetime.datetime(2000 + int(date[:2]), int(date[2:4]), int(date[4:]))
+        except ValueError:
+            continue
+    return None
+
+
+def parse_url_datetime(url):
+    """
+    从新闻URL中解析发布时间，只识别路径中形如日期的片段，
+    不会把路径中的其他数字（如10位文章ID）当作时间戳
+
+    Args:
+        url: 新闻URL
+
+    Returns:
+        datetime.datetime: 发布时间，无法识别时返回None
+    """
+    if not url:
+        return None
+    # 片段前后都需要 /，路径末尾补 / 以便匹配最后一段
+    return _parse_url_path(urlparse(url).path + '/')
+
+
+def cache_info():
+    """
+    获取解析缓存统计
+
+    Returns:
+        functools._CacheInfo: 缓存统计
+    """
+    return _parse_cached.cache_info()
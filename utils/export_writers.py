@@ -0,0 +1,658 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+导出写入器模块
+各导出格式逐条写入新闻数据，输出边写边压缩，不生成未压缩的中间文件；
+可选在子进程中压缩，使多种格式的压缩分摊到多个CPU核心；
+Parquet列式格式依赖可选的 pyarrow
+"""
+
+import os
+import re
+import csv
+import json
+import gzip
+import bz2
+import logging
+import textwrap
+import zipfile
+import datetime
+import multiprocessing
+
+from utils.parallel_compress import ParallelGzipWriter, ParallelBz2Writer, open_zstd_writer
+
+logger = logging.getLogger(__name__)
+
+# 压缩格式对应的文件后缀
+COMPRESS_SUFFIXES = {
+    None: '',
+    'zip': '.zip',
+    'gz': '.gz',
+    'bz2': '.bz2',
+    'zstd': '.zst',
+}
+
+# 缓冲区达到该大小时写入压缩流（字节）
+BUFFER_SIZE = 1 << 20
+
+# XML 1.0 不允许出现的控制字符
+_INVALID_XML_CHARS = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+# CSV表头
+CSV_FIELDNAMES = [
+    'id', 'title', 'subtitle', 'url', 'source', 'author', 'publish_time', 'crawl_time',
+    'is_top', 'is_hot', 'is_recommend', 'view_count', 'comment_count', 'like_count',
+    'category_id', 'category_name', 'content_summary', 'content_keywords', 'tags', 'cover_image'
+]
+
+
+def compressed_path(file_path, compress_format=None):
+    """
+    获取压缩后的文件路径
+
+    Args:
+        file_path: 未压缩的文件路径
+        compress_format: 压缩格式，None表示不压缩
+
+    Returns:
+        str: 文件路径
+    """
+    if compress_format not in COMPRESS_SUFFIXES:
+        raise ValueError(f"不支持的压缩格式: {compress_format}")
+    return f"{file_path}{COMPRESS_SUFFIXES[compress_format]}"
+
+
+class CompressedSink:
+    """边写边压缩的二进制输出，先写入临时文件，完成后再重命名"""
+
+    def __init__(self, file_path, compress_format=None, workers=1):
+        """
+        初始化
+
+        Args:
+            file_path: 未压缩的文件路径（压缩包内的文件名取其文件名部分）
+            compress_format: 压缩格式（zip, gz, bz2, zstd），None表示不压缩
+            workers: 压缩线程数，大于1时 gz、bz2 分块并行压缩，zstd 使用多线程压缩
+        """
+        self.path = compressed_path(file_path, compress_format)
+        self.tmp_path = f"{self.path}.tmp"
+        self.buffer = bytearray()
+        self.archive = None
+        self.raw = open(self.tmp_path, 'wb')
+        arcname = os.path.basename(file_path)
+
+        if compress_format == 'zip':
+            self.archive = zipfile.ZipFile(self.raw, 'w', zipfile.ZIP_DEFLATED)
+            self.stream = self.archive.open(arcname, 'w', force_zip64=True)
+        elif compress_format == 'gz' and workers > 1:
+            self.stream = ParallelGzipWriter(self.raw, arcname, workers)
+        elif compress_format == 'gz':
+            self.stream = gzip.GzipFile(filename=arcname, mode='wb', fileobj=self.raw)
+        elif compress_format == 'bz2' and workers > 1:
+            self.stream = ParallelBz2Writer(self.raw, workers)
+        elif compress_format == 'bz2':
+            self.stream = bz2.BZ2File(self.raw, 'wb')
+        elif compress_format == 'zstd':
+            self.stream = open_zstd_writer(self.raw, workers)
+        else:
+            self.stream = None
+
+    def write(self, data):
+        """
+        写入数据
+
+        Args:
+            data: 字节串
+        """
+        self.buffer += data
+        if len(self.buffer) >= BUFFER_SIZE:
+            self._flush_buffer()
+
+    def _flush_buffer(self):
+        """将缓冲区写入压缩流"""
+        if self.buffer:
+            (self.stream or self.raw).write(self.buffer)
+            self.buffer.clear()
+
+    def close(self):
+        """
+        完成写入
+
+        Returns:
+            str: 文件路径
+        """
+        self._flush_buffer()
+        if self.stream:
+            self.stream.close()
+        if self.archive:
+            self.archive.close()
+        self.raw.close()
+        os.replace(self.tmp_path, self.path)
+        return self.path
+
+    def abort(self):
+        """放弃写入并删除临时文件"""
+        try:
+            self.raw.close()
+        finally:
+            if os.path.exists(self.tmp_path):
+                os.remove(self.tmp_path)
+
+
+def _compress_worker(conn, file_path, compress_format, workers):
+    """
+    子进程：从管道接收数据并压缩写入文件，收到空数据时结束
+
+    Args:
+        conn: 管道接收端
+        file_path: 未压缩的文件路径
+        compress_format: 压缩格式
+        workers: 压缩线程数
+    """
+    sink = CompressedSink(file_path, compress_format, workers)
+    try:
+        while True:
+            data = conn.recv_bytes()
+            if not data:
+                break
+            sink.write(data)
+        sink.close()
+    except BaseException:
+        sink.abort()
+        raise
+    finally:
+        conn.close()
+
+
+class ProcessSink:
+    """在子进程中压缩的二进制输出，主进程只负责编码和发送数据"""
+
+    def __init__(self, file_path, compress_format=None, workers=1):
+        """
+        初始化
+
+        Args:
+            file_path: 未压缩的文件路径
+            compress_format: 压缩格式（zip, gz, bz2, zstd），None表示不压缩
+            workers: 子进程中的压缩线程数
+        """
+        self.path = compressed_path(file_path, compress_format)
+        self.tmp_path = f"{self.path}.tmp"
+        self.buffer = bytearray()
+        receiver, self.conn = multiprocessing.Pipe(duplex=False)
+        self.process = multiprocessing.Process(
+            target=_compress_worker,
+            args=(receiver, file_path, compress_format, workers),
+            daemon=True,
+        )
+        self.process.start()
+        receiver.close()
+
+    def write(self, data):
+        """
+        写入数据
+
+        Args:
+            data: 字节串
+        """
+        self.buffer += data
+        if len(self.buffer) >= BUFFER_SIZE:
+            self._flush_buffer()
+
+    def _flush_buffer(self):
+        """将缓冲区发送给子进程"""
+        if self.buffer:
+            self.conn.send_bytes(self.buffer)
+            self.buffer.clear()
+
+    def close(self):
+        """
+        完成写入并等待子进程结束
+
+        Returns:
+            str: 文件路径
+        """
+        self._flush_buffer()
+        self.conn.send_bytes(b'')
+        self.conn.close()
+        self.process.join()
+        if self.process.exitcode != 0:
+            raise RuntimeError(f"压缩进程异常退出，退出码: {self.process.exitcode}")
+        return self.path
+
+    def abort(self):
+        """放弃写入，结束子进程并删除临时文件"""
+        self.conn.close()
+        self.process.terminate()
+        self.process.join()
+        if os.path.exists(self.tmp_path):
+            os.remove(self.tmp_path)
+
+
+def open_sink(file_path, compress_format=None, use_process=False, workers=1):
+    """
+    打开导出输出
+
+    Args:
+        file_path: 未压缩的文件路径
+        compress_format: 压缩格式，None表示不压缩
+        use_process: 是否在子进程中压缩
+        workers: 压缩线程数
+
+    Returns:
+        CompressedSink | ProcessSink: 二进制输出
+    """
+    if use_process:
+        return ProcessSink(file_path, compress_format, workers)
+    return CompressedSink(file_path, compress_format, workers)
+
+
+def xml_text(value):
+    """
+    转换为XML文本：统一换行符、去除XML不允许的控制字符并转义
+
+    Args:
+        value: 字段值
+
+    Returns:
+        str: 转义后的文本
+    """
+    text = _INVALID_XML_CHARS.sub('', str(value).replace('\r\n', '\n').replace('\r', '\n'))
+    return text.replace('&', '&amp;').replace('<', '&lt;').replace('"', '&quot;').replace('>', '&gt;')
+
+
+class TextOutput:
+    """将文本按编码写入二进制输出"""
+
+    def __init__(self, sink, encoding='utf-8', errors='strict'):
+        """
+        初始化
+
+        Args:
+            sink: 二进制输出
+            encoding: 文件编码
+            errors: 编码错误处理方式
+        """
+        self.sink = sink
+        self.encoding = encoding
+        self.errors = errors
+
+    def write(self, text):
+        """写入文本"""
+        self.sink.write(text.encode(self.encoding, self.errors))
+
+
+class ExportWriter:
+    """导出写入器基类，子类实现 write_news 和 finish"""
+
+    def __init__(self, sink, encoding='utf-8'):
+        """
+        初始化
+
+        Args:
+            sink: 二进制输出
+            encoding: 文件编码
+        """
+        self.sink = sink
+        self.encoding = encoding
+        self.output = TextOutput(sink, encoding)
+        self.count = 0
+        # 除主文件外的其他输出文件 {名称: 路径}
+        self.extra_files = {}
+
+    @classmethod
+    def open(cls, file_path, compress_format=None, use_process=False, workers=1, **options):
+        """
+        创建写入器
+
+        Args:
+            file_path: 未压缩的文件路径
+            compress_format: 压缩格式，None表示不压缩
+            use_process: 是否在子进程中压缩
+            workers: 压缩线程数
+            **options: 写入器参数
+
+        Returns:
+            ExportWriter: 写入器
+        """
+        return cls(open_sink(file_path, compress_format, use_process, workers), **options)
+
+    def write(self, news):
+        """
+        写入一条新闻
+
+        Args:
+            news: 新闻数据
+        """
+        self.write_news(news)
+        self.count += 1
+
+    def write_news(self, news):
+        """写入一条新闻的内容"""
+        raise NotImplementedError
+
+    def finish(self):
+        """写入结尾内容"""
+
+    def close(self):
+        """
+        完成导出
+
+        Returns:
+            str: 文件路径
+        """
+        self.finish()
+        return self.sink.close()
+
+    def abort(self):
+        """放弃导出"""
+        self.sink.abort()
+
+
+class JsonExportWriter(ExportWriter):
+    """JSON写入器，输出格式与 json.dump(indent=2) 一致"""
+
+    def write_news(self, news):
+        self.output.write('[\n' if self.count == 0 else ',\n')
+        self.output.write(textwrap.indent(json.dumps(news, ensure_ascii=False, indent=2), '  '))
+
+    def finish(self):
+        self.output.write('[]' if self.count == 0 else '\n]')
+
+
+class CsvExportWriter(ExportWriter):
+    """CSV写入器"""
+
+    def __init__(self, sink, encoding='utf-8', delimiter=',', include_header=True):
+        """
+        初始化
+
+        Args:
+            sink: 二进制输出
+            encoding: 文件编码
+            delimiter: 分隔符
+            include_header: 是否包含表头
+        """
+        super().__init__(sink, encoding)
+        self.writer = csv.DictWriter(self.output, fieldnames=CSV_FIELDNAMES, delimiter=delimiter)
+        if include_header:
+            self.writer.writeheader()
+
+    def write_news(self, news):
+        # 处理标签
+        tags = ','.join([tag['name'] for tag in news.get('tags', [])])
+
+        # 处理封面图
+        cover_image = ''
+        for image in news.get('images', []):
+            if image.get('is_cover'):
+                cover_image = image.get('url', '')
+                break
+
+        self.writer.writerow({
+            'id': news.get('id', ''),
+            'title': news.get('title', ''),
+            'subtitle': news.get('subtitle', ''),
+            'url': news.get('url', ''),
+            'source': news.get('source', ''),
+            'author': news.get('author', ''),
+            'publish_time': news.get('publish_time', ''),
+            'crawl_time': news.get('crawl_time', ''),
+            'is_top': news.get('is_top', ''),
+            'is_hot': news.get('is_hot', ''),
+            'is_recommend': news.get('is_recommend', ''),
+            'view_count': news.get('view_count', ''),
+            'comment_count': news.get('comment_count', ''),
+            'like_count': news.get('like_count', ''),
+            'category_id': news.get('category', {}).get('id', ''),
+            'category_name': news.get('category', {}).get('name', ''),
+            'content_summary': news.get('content', {}).get('summary', ''),
+            'content_keywords': news.get('content', {}).get('keywords', ''),
+            'tags': tags,
+            'cover_image': cover_image
+        })
+
+
+class XmlExportWriter(ExportWriter):
+    """
+    XML写入器，逐条输出 <news> 元素，内存占用与数据量无关；
+    缩进、空元素和转义规则与 minidom.toprettyxml(indent='  ') 的输出一致
+    """
+
+    def __init__(self, sink, encoding='utf-8'):
+        super().__init__(sink, encoding)
+        # 无法编码的字符输出为字符引用
+        self.output = TextOutput(sink, encoding, errors='xmlcharrefreplace')
+
+    def _declaration(self):
+        """XML声明"""
+        return f'<?xml version="1.0" encoding="{self.encoding}"?>\n'
+
+    @staticmethod
+    def _element(parts, indent, tag, value):
+        """添加只包含文本的元素"""
+        text = xml_text(value)
+        parts.append(f"{indent}<{tag}>{text}</{tag}>\n" if text else f"{indent}<{tag}/>\n")
+
+    @classmethod
+    def _fields(cls, parts, indent, tag, fields):
+        """添加由多个字段组成的元素"""
+        if not fields:
+            parts.append(f"{indent}<{tag}/>\n")
+            return
+        parts.append(f"{indent}<{tag}>\n")
+        for key, value in fields.items():
+            cls._element(parts, indent + '  ', key, value)
+        parts.append(f"{indent}</{tag}>\n")
+
+    @classmethod
+    def _list(cls, parts, indent, tag, item_tag, items):
+        """添加由多个子元素组成的列表元素"""
+        if not items:
+            parts.append(f"{indent}<{tag}/>\n")
+            return
+        parts.append(f"{indent}<{tag}>\n")
+        for item in items:
+            cls._fields(parts, indent + '  ', item_tag, item)
+        parts.append(f"{indent}</{tag}>\n")
+
+    def write_news(self, news):
+        parts = [self._declaration() + '<news_data>\n'] if self.count == 0 else []
+        parts.append('  <news>\n')
+
+        # 基本信息
+        for key, value in news.items():
+            if key not in ['content', 'images', 'tags', 'category']:
+                self._element(parts, '    ', key, value)
+
+        # 分类和内容信息
+        if news.get('category'):
+            self._fields(parts, '    ', 'category', news['category'])
+        if news.get('content'):
+            self._fields(parts, '    ', 'content', news['content'])
+
+        # 图片和标签信息
+        self._list(parts, '    ', 'images', 'image', news.get('images', []))
+        self._list(parts, '    ', 'tags', 'tag', news.get('tags', []))
+
+        parts.append('  </news>\n')
+        self.output.write(''.join(parts))
+
+    def finish(self):
+        self.output.write(self._declaration() + '<news_data/>\n' if self.count == 0 else '</news_data>\n')
+
+
+def _import_pyarrow():
+    """导入可选依赖 pyarrow"""
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise ImportError("Parquet导出需要安装 pyarrow: pip install pyarrow")
+    return pyarrow, pyarrow.parquet
+
+
+def _parse_time(value):
+    """将导出数据中的时间字符串转换为datetime，空值返回None"""
+    return datetime.datetime.fromisoformat(value) if value else None
+
+
+class ParquetExportWriter(ExportWriter):
+    """
+    Parquet列式写入器（依赖 pyarrow）
+    新闻元数据和正文分别写入两个文件，分析任务只读取需要的列；
+    分类、来源和标签使用字典编码，每积累 row_group_size 条写入一个行组
+    """
+
+    # 字典编码的列
+    DICTIONARY_COLUMNS = ['source', 'category_name', 'category_code', 'tags.list.element']
+
+    def __init__(self, file_path, encoding='utf-8', row_group_size=10000, compression='zstd'):
+        """
+        初始化
+
+        Args:
+            file_path: 新闻元数据文件路径，正文写入同目录下的 <文件名>.content.parquet
+            encoding: 未使用，Parquet字符串统一为UTF-8
+            row_group_size: 每个行组的新闻条数
+            compression: Parquet列压缩算法
+        """
+        self.pa, self.pq = _import_pyarrow()
+        self.encoding = encoding
+        self.row_group_size = row_group_size
+        self.count = 0
+        self.path = file_path
+        self.content_path = f"{os.path.splitext(file_path)[0]}.content.parquet"
+        self.extra_files = {}
+        self.rows = []
+        self.content_rows = []
+
+        pa = self.pa
+        dictionary = pa.dictionary(pa.int32(), pa.string())
+        self.schema = pa.schema([
+            ('id', pa.int64()),
+            ('title', pa.string()),
+            ('subtitle', pa.string()),
+            ('url', pa.string()),
+            ('source', dictionary),
+            ('author', pa.string()),
+            ('publish_time', pa.timestamp('s')),
+            ('crawl_time', pa.timestamp('s')),
+            ('is_top', pa.bool_()),
+            ('is_hot', pa.bool_()),
+            ('is_recommend', pa.bool_()),
+            ('view_count', pa.int64()),
+            ('comment_count', pa.int64()),
+            ('like_count', pa.int64()),
+            ('category_id', pa.int32()),
+            ('category_name', dictionary),
+            ('category_code', dictionary),
+            ('summary', pa.string()),
+            ('keywords', pa.string()),
+            ('tags', pa.list_(dictionary)),
+            ('images', pa.list_(pa.struct([
+                ('id', pa.int64()),
+                ('url', pa.string()),
+                ('local_path', pa.string()),
+                ('title', pa.string()),
+                ('description', pa.string()),
+                ('width', pa.int32()),
+                ('height', pa.int32()),
+                ('size', pa.int64()),
+                ('format', pa.string()),
+                ('is_cover', pa.bool_()),
+            ]))),
+        ])
+        self.content_schema = pa.schema([
+            ('id', pa.int64()),
+            ('text', pa.string()),
+            ('html', pa.string()),
+        ])
+
+        self.writer = self.pq.ParquetWriter(
+            f"{self.path}.tmp", self.schema,
+            compression=compression, use_dictionary=self.DICTIONARY_COLUMNS,
+        )
+        self.content_writer = self.pq.ParquetWriter(
+            f"{self.content_path}.tmp", self.content_schema,
+            compression=compression, use_dictionary=False,
+        )
+
+    @classmethod
+    def open(cls, file_path, compress_format=None, use_process=False, workers=1, **options):
+        """创建写入器，Parquet自带列压缩，不再整体压缩"""
+        return cls(file_path, **options)
+
+    def write_news(self, news):
+        category = news.get('category') or {}
+        content = news.get('content') or {}
+        self.rows.append({
+            'id': news['id'],
+            'title': news.get('title'),
+            'subtitle': news.get('subtitle'),
+            'url': news.get('url'),
+            'source': news.get('source'),
+            'author': news.get('author'),
+            'publish_time': _parse_time(news.get('publish_time')),
+            'crawl_time': _parse_time(news.get('crawl_time')),
+            'is_top': news.get('is_top'),
+            'is_hot': news.get('is_hot'),
+            'is_recommend': news.get('is_recommend'),
+            'view_count': news.get('view_count'),
+            'comment_count': news.get('comment_count'),
+            'like_count': news.get('like_count'),
+            'category_id': category.get('id'),
+            'category_name': category.get('name'),
+            'category_code': category.get('code'),
+            'summary': content.get('summary'),
+            'keywords': content.get('keywords'),
+            'tags': [tag['name'] for tag in news.get('tags', [])],
+            'images': news.get('images', []),
+        })
+        if content:
+            self.content_rows.append({'id': news['id'], 'text': content.get('text'), 'html': content.get('html')})
+        if len(self.rows) >= self.row_group_size:
+            self._write_row_group()
+
+    def _write_row_group(self):
+        """将缓冲的新闻写入一个行组"""
+        if self.rows:
+            self.writer.write_table(self.pa.Table.from_pylist(self.rows, schema=self.schema))
+            self.rows = []
+        if self.content_rows:
+            self.content_writer.write_table(self.pa.Table.from_pylist(self.content_rows, schema=self.content_schema))
+            self.content_rows = []
+
+    def close(self):
+        """
+        完成导出
+
+        Returns:
+            str: 新闻元数据文件路径
+        """
+        self._write_row_group()
+        self.writer.close()
+        self.content_writer.close()
+        os.replace(f"{self.path}.tmp", self.path)
+        os.replace(f"{self.content_path}.tmp", self.content_path)
+        self.extra_files = {'content': self.content_path}
+        return self.path
+
+    def abort(self):
+        """放弃导出并删除临时文件"""
+        for writer, path in ((self.writer, self.path), (self.content_writer, self.content_path)):
+            try:
+                writer.close()
+            finally:
+                if os.path.exists(f"{path}.tmp"):
+                    os.remove(f"{path}.tmp")
+
+
+# 导出格式对应的写入器
+EXPORT_WRITERS = {
+    'json': JsonExportWriter,
+    'xml': XmlExportWriter,
+    'csv': CsvExportWriter,
+    'parquet': ParquetExportWriter,
+}
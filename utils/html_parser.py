@@ -5,28 +5,63 @@
 HTML解析工具模块
 """
 
-import re
 import logging
 from urllib.parse import urljoin, urlparse
 from bs4 import BeautifulSoup
 
+from utils.selector_cache import template_key
+from utils.date_parser import parse_datetime
+
 logger = logging.getLogger(__name__)
 
 
 class HtmlParser:
     """HTML解析器"""
     
-    def __init__(self, html, base_url=None):
+    def __init__(self, html, base_url=None, selector_cache=None):
         """
         初始化
         
         Args:
             html: HTML内容
             base_url: 基础URL，用于处理相对URL
+            selector_cache: 选择器学习缓存，需同时提供base_url
         """
         self.html = html
         self.base_url = base_url
         self.soup = BeautifulSoup(html, 'lxml')
+        self.selector_cache = selector_cache if base_url else None
+        self.template = template_key(base_url) if self.selector_cache else None
+    
+    def _select_first_text(self, field, selectors, validator=None):
+        """
+        按顺序尝试选择器，返回第一个非空且通过校验的元素文本，优先使用已学习的选择器
+        
+        Args:
+            field: 字段名
+            selectors: 候选选择器列表
+            validator: 文本校验函数，返回假值的文本会被跳过，不计为命中
+            
+        Returns:
+            str: 元素文本
+        """
+        if self.selector_cache:
+            selectors = self.selector_cache.order(self.template, field, selectors)
+            learned = self.selector_cache.get(self.template, field)
+        else:
+            learned = None
+        
+        for selector in selectors:
+            for element in self.soup.select(selector):
+                text = element.get_text(strip=True)
+                if text and (validator is None or validator(text)):
+                    if self.selector_cache:
+                        self.selector_cache.record(self.template, field, selector, hit=(selector == learned))
+                    return text
+        
+        if self.selector_cache:
+            self.selector_cache.record(self.template, field, None, hit=False)
+        return ''
     
     def get_title(self):
         """
@@ -279,6 +314,12 @@ class HtmlParser:
                 'div.main-content'
             ]
         
+        # 优先尝试同一站点模板上次命中的选择器
+        learned = None
+        if self.selector_cache:
+            content_selectors = self.selector_cache.order(self.template, 'content', content_selectors)
+            learned = self.selector_cache.get(self.template, 'content')
+        
         # 尝试使用选择器提取正文
         content_html = None
         for selector in content_selectors:
@@ -286,8 +327,13 @@ class HtmlParser:
             if element:
                 content_html = str(element)
                 content_text = element.get_text(strip=True)
+                if self.selector_cache:
+                    self.selector_cache.record(self.template, 'content', selector, hit=(selector == learned))
                 break
         
+        if not content_html and self.selector_cache:
+            self.selector_cache.record(self.template, 'content', None, hit=False)
+        
         # 如果没有找到正文，尝试使用启发式方法
         if not content_html:
             # 移除无用元素
@@ -355,33 +401,16 @@ class HtmlParser:
                 tags.append(tag_text)
         
         # 提取发布时间
-        publish_time = ''
-        time_elements = self.soup.select('div.post_info span.post_time, div.article-info span.time, time')
-        for time_elem in time_elements:
-            time_text = time_elem.get_text(strip=True)
-            if time_text:
-                # 尝试匹配常见的时间格式
-                if re.search(r'\d{4}[-/]\d{1,2}[-/]\d{1,2}', time_text):
-                    publish_time = time_text
-                    break
+        publish_time = self._select_first_text(
+            'publish_time', ['div.post_info span.post_time', 'div.article-info span.time', 'time'], parse_datetime
+        )
+        publish_datetime = parse_datetime(publish_time)
         
         # 提取作者
-        author = ''
-        author_elements = self.soup.select('div.post_author, div.article-info span.author, span.byline')
-        for author_elem in author_elements:
-            author_text = author_elem.get_text(strip=True)
-            if author_text:
-                author = author_text
-                break
+        author = self._select_first_text('author', ['div.post_author', 'div.article-info span.author', 'span.byline'])
         
         # 提取来源
-        source = ''
-        source_elements = self.soup.select('div.post_info a.source, div.post_info span.source, div.article-info span.source')
-        for source_elem in source_elements:
-            source_text = source_elem.get_text(strip=True)
-            if source_text:
-                source = source_text
-                break
+        source = self._select_first_text('source', ['div.post_info a.source', 'div.post_info span.source', 'div.article-info span.source'])
         
         # 返回结果
         return {
@@ -391,6 +420,7 @@ class HtmlParser:
             'images': images,
             'tags': tags,
             'publish_time': publish_time,
+            'publish_datetime': publish_datetime,
             'author': author,
             'source': source,
             'description': self.get_meta_description(),
@@ -0,0 +1,268 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+关键词提取模块
+基于语料库文档频率的TF-IDF关键词提取，批量打分使用NumPy向量化计算
+"""
+
+import os
+import re
+import logging
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# 中文连续字符和英文单词
+_TOKEN_PATTERN = re.compile(r'[一-鿿]+|[A-Za-z][A-Za-z0-9]+')
+
+# 常见虚词，包含这些字的二元组不作为关键词
+STOP_CHARS = frozenset('的了和是在也就都而及与着或一不这那个有为以于上中把被对从到让向将等其之')
+
+# 分词前将虚词替换为空格，使n元组不跨越虚词
+_STOP_TABLE = str.maketrans({char: ' ' for char in STOP_CHARS})
+
+
+def ngram_tokenize(text, n=2):
+    """
+    分词：中文按字符n元组切分，英文按单词切分
+
+    Args:
+        text: 文本
+        n: 中文n元组长度
+
+    Returns:
+        list: 词列表
+    """
+    tokens = []
+    for run in _TOKEN_PATTERN.findall(text.translate(_STOP_TABLE)):
+        if run[0] < '一':
+            tokens.append(run.lower())
+        elif n == 2:
+            tokens.extend(map(str.__add__, run[:-1], run[1:]))
+        else:
+            tokens.extend(run[i:i + n] for i in range(len(run) - n + 1))
+    return tokens
+
+
+class KeywordExtractor:
+    """TF-IDF关键词提取器，维护可增量更新的文档频率统计"""
+
+    def __init__(self, tokenizer=None, top_n=10, max_terms=500000, prune_factor=2):
+        """
+        初始化
+
+        Args:
+            tokenizer: 分词函数，输入文本返回词列表，默认使用中文二元组切分
+            top_n: 每篇文章提取的关键词数量
+            max_terms: 保留的最大词数（按文档频率）
+            prune_factor: 词数超过 max_terms 的多少倍时在批次结束后裁剪词表
+        """
+        self.tokenizer = tokenizer or ngram_tokenize
+        self.top_n = top_n
+        self.max_terms = max_terms
+        self.prune_factor = prune_factor
+        # 词表
+        self.vocab = {}
+        self.terms = []
+        # 文档频率
+        self.df = np.zeros(0, dtype=np.int64)
+        self.n_docs = 0
+        # 已统计的最大内容ID
+        self.watermark = 0
+
+    def load(self, path):
+        """
+        从磁盘加载文档频率统计
+
+        Args:
+            path: 统计文件路径（.npz）
+        """
+        if not os.path.exists(path):
+            return self
+        with np.load(path) as data:
+            self.terms = data['terms'].tolist()
+            self.df = data['df'].astype(np.int64)
+            self.n_docs = int(data['n_docs'])
+            self.watermark = int(data['watermark'])
+        self.vocab = {term: i for i, term in enumerate(self.terms)}
+        logger.info(f"加载文档频率统计: {path}，文档数: {self.n_docs}，词数: {len(self.terms)}")
+        return self
+
+    def save(self, path):
+        """
+        保存文档频率统计，词数超过上限时只保留文档频率最高的词
+
+        Args:
+            path: 统计文件路径（.npz）
+        """
+        self.prune(self.max_terms)
+
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        tmp_path = f"{path}.tmp.npz"
+        np.savez(
+            tmp_path,
+            terms=np.array(self.terms, dtype=str),
+            df=self.df,
+            n_docs=self.n_docs,
+            watermark=self.watermark
+        )
+        os.replace(tmp_path, path)
+        logger.info(f"保存文档频率统计: {path}，文档数: {self.n_docs}，词数: {len(self.terms)}")
+
+    def prune(self, max_terms):
+        """
+        只保留文档频率最高的词，被裁剪的词再次出现时重新计数
+
+        Args:
+            max_terms: 保留的最大词数
+
+        Returns:
+            int: 裁剪的词数
+        """
+        removed = len(self.terms) - max_terms
+        if removed <= 0:
+            return 0
+        keep = np.sort(np.argsort(-self.df, kind='stable')[:max_terms])
+        self.terms = [self.terms[i] for i in keep]
+        self.df = self.df[keep]
+        self.vocab = {term: i for i, term in enumerate(self.terms)}
+        logger.info(f"裁剪词表，移除低频词 {removed} 个，保留 {len(self.terms)} 个")
+        return removed
+
+    def _prune_if_needed(self):
+        """词数超过上限的 prune_factor 倍时裁剪到上限，使内存占用有界"""
+        if len(self.terms) > self.max_terms * self.prune_factor:
+            self.prune(self.max_terms)
+
+    def reset(self):
+        """清空统计"""
+        self.vocab = {}
+        self.terms = []
+        self.df = np.zeros(0, dtype=np.int64)
+        self.n_docs = 0
+        self.watermark = 0
+
+    def _term_ids(self, tokens, add):
+        """
+        将词列表转换为词ID数组
+
+        Args:
+            tokens: 词列表
+            add: 是否将新词加入词表
+
+        Returns:
+            np.ndarray: 词ID数组，add为False时忽略未登录词
+        """
+        vocab = self.vocab
+        if add:
+            terms = self.terms
+            ids = []
+            for token in tokens:
+                term_id = vocab.get(token)
+                if term_id is None:
+                    term_id = vocab[token] = len(terms)
+                    terms.append(token)
+                ids.append(term_id)
+        else:
+            ids = [vocab[token] for token in tokens if token in vocab]
+        return np.fromiter(ids, dtype=np.int64, count=len(ids))
+
+    def _batch_matrix(self, texts, add):
+        """
+        构建批量稀疏词频矩阵（COO格式）
+
+        Args:
+            texts: 文本列表
+            add: 是否将新词加入词表
+
+        Returns:
+            tuple: (文档下标数组, 词ID数组, 词频数组, 各文档词数数组)
+        """
+        term_ids = [self._term_ids(self.tokenizer(text or ''), add) for text in texts]
+        doc_lens = np.fromiter((len(ids) for ids in term_ids), dtype=np.int64, count=len(term_ids))
+        if not doc_lens.sum():
+            empty = np.zeros(0, dtype=np.int64)
+            return empty, empty, empty, doc_lens
+
+        vocab_size = max(len(self.terms), 1)
+        doc_index = np.repeat(np.arange(len(texts), dtype=np.int64), doc_lens)
+        keys = doc_index * vocab_size + np.concatenate(term_ids)
+        unique_keys, counts = np.unique(keys, return_counts=True)
+        return unique_keys // vocab_size, unique_keys % vocab_size, counts, doc_lens
+
+    def update(self, texts):
+        """
+        使用一批文档增量更新文档频率
+
+        Args:
+            texts: 文本列表
+        """
+        self._update(self._batch_matrix(texts, add=True), len(texts))
+        self._prune_if_needed()
+
+    def _update(self, matrix, n_texts):
+        """将批量词频矩阵累加到文档频率"""
+        _, terms, _, _ = matrix
+        if len(self.df) < len(self.terms):
+            self.df = np.concatenate([self.df, np.zeros(len(self.terms) - len(self.df), dtype=np.int64)])
+        self.df += np.bincount(terms, minlength=len(self.df))
+        self.n_docs += n_texts
+
+    def extract(self, texts, update=True):
+        """
+        批量提取关键词
+
+        Args:
+            texts: 文本列表
+            update: 是否先用这批文档更新文档频率
+
+        Returns:
+            list: 每篇文档的关键词列表
+        """
+        matrix = self._batch_matrix(texts, add=update)
+        if update:
+            self._update(matrix, len(texts))
+
+        docs, terms, counts, doc_lens = matrix
+        result = [[] for _ in texts]
+        if not len(docs):
+            return result
+
+        # TF-IDF = 词频 / 文档词数 * (log((1 + N) / (1 + df)) + 1)
+        idf = np.log((1.0 + self.n_docs) / (1.0 + self.df[terms])) + 1.0
+        scores = counts / doc_lens[docs] * idf
+
+        # 按文档分组、组内按分数降序，取每组前N个
+        order = np.lexsort((-scores, docs))
+        sorted_docs = docs[order]
+        starts = np.searchsorted(sorted_docs, np.arange(len(texts)))
+        rank = np.arange(len(order)) - starts[sorted_docs]
+        selected = order[rank < self.top_n]
+
+        for doc, term in zip(docs[selected].tolist(), terms[selected].tolist()):
+            result[doc].append(self.terms[term])
+        if update:
+            self._prune_if_needed()
+        return result
+
+
+def join_keywords(keywords, max_length=255):
+    """
+    拼接关键词，确保不超过字段长度
+
+    Args:
+        keywords: 关键词列表
+        max_length: 最大长度
+
+    Returns:
+        str: 逗号分隔的关键词
+    """
+    result = ''
+    for keyword in keywords:
+        candidate = f"{result},{keyword}" if result else keyword
+        if len(candidate) > max_length:
+            break
+        result = candidate
+    return result
@@ -0,0 +1,176 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+并行压缩模块
+将数据切分为固定大小的块，由线程池并行压缩后按顺序写出：
+gzip 采用 pigz 的做法，各块压缩为以同步标记结尾的原始deflate数据并以前一块末尾32KB作为预设字典，
+拼接后仍是单个标准gzip成员；bz2 各块压缩为独立的bz2流后拼接（与 pbzip2 相同的多流格式）。
+zlib 和 bz2 压缩时会释放GIL，线程池即可利用多核，且无需在进程间复制数据块；
+zstd 依赖可选的 zstandard 库，使用其内置的多线程压缩
+"""
+
+import bz2
+import zlib
+import struct
+import logging
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+# 默认块大小（字节）
+BLOCK_SIZE = 4 << 20
+
+# deflate 窗口大小，用作下一块的预设字典
+DEFLATE_WINDOW = 32 << 10
+
+
+def _deflate_block(data, dictionary, level):
+    """
+    将一块数据压缩为以同步标记结尾的原始deflate数据
+
+    Args:
+        data: 数据块
+        dictionary: 前一块末尾的数据（预设字典），首块为None
+        level: 压缩级别
+
+    Returns:
+        bytes: 压缩数据
+    """
+    if dictionary:
+        compressor = zlib.compressobj(level, zlib.DEFLATED, -zlib.MAX_WBITS, zdict=dictionary)
+    else:
+        compressor = zlib.compressobj(level, zlib.DEFLATED, -zlib.MAX_WBITS)
+    return compressor.compress(data) + compressor.flush(zlib.Z_SYNC_FLUSH)
+
+
+class BlockCompressor:
+    """分块并行压缩写入器基类，子类实现 _submit_block 和 _finish"""
+
+    def __init__(self, fileobj, workers=4, block_size=BLOCK_SIZE, level=6):
+        """
+        初始化
+
+        Args:
+            fileobj: 输出的二进制文件对象
+            workers: 压缩线程数
+            block_size: 块大小（字节）
+            level: 压缩级别
+        """
+        self.fileobj = fileobj
+        self.workers = workers
+        self.block_size = block_size
+        self.level = level
+        self.buffer = bytearray()
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+        # 按提交顺序排列的压缩任务，数量有上限，内存占用不随数据量增长
+        self.pending = deque()
+
+    def write(self, data):
+        """
+        写入数据
+
+        Args:
+            data: 字节串
+        """
+        self.buffer += data
+        while len(self.buffer) >= self.block_size:
+            block = bytes(self.buffer[:self.block_size])
+            del self.buffer[:self.block_size]
+            self._submit(block)
+
+    def _submit(self, block):
+        """提交一个数据块，等待中的任务过多时先写出最早的结果"""
+        self.pending.append(self._submit_block(block))
+        while len(self.pending) > self.workers * 2:
+            self.fileobj.write(self.pending.popleft().result())
+
+    def _submit_block(self, block):
+        """提交压缩任务，返回 Future"""
+        raise NotImplementedError
+
+    def _finish(self):
+        """写入结尾数据"""
+
+    def close(self):
+        """压缩剩余数据并写出全部结果"""
+        try:
+            if self.buffer:
+                self._submit(bytes(self.buffer))
+                self.buffer.clear()
+            while self.pending:
+                self.fileobj.write(self.pending.popleft().result())
+            self._finish()
+        finally:
+            self.executor.shutdown(wait=True, cancel_futures=True)
+
+
+class ParallelGzipWriter(BlockCompressor):
+    """并行gzip写入器，输出单个标准gzip成员"""
+
+    def __init__(self, fileobj, filename='', workers=4, block_size=BLOCK_SIZE, level=9):
+        """
+        初始化
+
+        Args:
+            fileobj: 输出的二进制文件对象
+            filename: 写入gzip头的原始文件名
+            workers: 压缩线程数
+            block_size: 块大小（字节）
+            level: 压缩级别，默认与 gzip 模块一致
+        """
+        super().__init__(fileobj, workers, block_size, level)
+        self.crc = 0
+        self.size = 0
+        self.dictionary = None
+
+        # gzip头：魔数、deflate、FNAME标志、修改时间0、额外标志、操作系统未知
+        name = filename.encode('latin-1', 'replace') if filename else b''
+        flags = 0x08 if name else 0
+        xfl = 2 if level == 9 else (4 if level == 1 else 0)
+        fileobj.write(struct.pack('<BBBBIBB', 0x1f, 0x8b, 8, flags, 0, xfl, 255))
+        if name:
+            fileobj.write(name + b'\0')
+
+    def _submit_block(self, block):
+        self.crc = zlib.crc32(block, self.crc)
+        self.size += len(block)
+        future = self.executor.submit(_deflate_block, block, self.dictionary, self.level)
+        self.dictionary = block[-DEFLATE_WINDOW:]
+        return future
+
+    def _finish(self):
+        # 结束块，以及CRC32和原始长度
+        self.fileobj.write(zlib.compressobj(self.level, zlib.DEFLATED, -zlib.MAX_WBITS).flush(zlib.Z_FINISH))
+        self.fileobj.write(struct.pack('<II', self.crc & 0xffffffff, self.size & 0xffffffff))
+
+
+class ParallelBz2Writer(BlockCompressor):
+    """并行bz2写入器，每块一个bz2流"""
+
+    def __init__(self, fileobj, workers=4, block_size=BLOCK_SIZE, level=9):
+        super().__init__(fileobj, workers, block_size, level)
+
+    def _submit_block(self, block):
+        return self.executor.submit(bz2.compress, block, self.level)
+
+
+def open_zstd_writer(fileobj, workers=4, level=3):
+    """
+    创建zstd写入器（依赖 zstandard）
+
+    Args:
+        fileobj: 输出的二进制文件对象
+        workers: 压缩线程数，1表示单线程
+        level: 压缩级别
+
+    Returns:
+        zstandard.ZstdCompressionWriter: 写入器，关闭时不会关闭 fileobj
+    """
+    try:
+        import zstandard
+    except ImportError:
+        raise ImportError("zstd压缩需要安装 zstandard: pip install zstandard")
+    compressor = zstandard.ZstdCompressor(level=level, threads=workers if workers > 1 else 0)
+    return compressor.stream_writer(fileobj, closefd=False)
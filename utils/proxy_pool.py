@@ -0,0 +1,316 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+代理池模块
+使用树状数组（Fenwick树）维护代理权重，按权重随机选择代理的复杂度为 O(log n)，
+代理成功、失败及响应延迟变化时增量更新权重
+"""
+
+import random
+import logging
+from urllib.parse import urlparse
+
+logger = logging.getLogger(__name__)
+
+
+class FenwickTree:
+    """树状数组，支持单点更新、前缀和及按前缀和查找"""
+
+    def __init__(self, size=0):
+        """
+        初始化
+
+        Args:
+            size: 元素个数
+        """
+        self.size = size
+        self.tree = [0.0] * (size + 1)
+
+    @classmethod
+    def build(cls, values):
+        """
+        以 O(n) 构建树状数组
+
+        Args:
+            values: 初始值列表
+
+        Returns:
+            FenwickTree: 树状数组
+        """
+        fenwick = cls(len(values))
+        tree = fenwick.tree
+        for i, value in enumerate(values, 1):
+            tree[i] += value
+            parent = i + (i & -i)
+            if parent <= fenwick.size:
+                tree[parent] += tree[i]
+        return fenwick
+
+    def add(self, index, delta):
+        """
+        单点增加
+
+        Args:
+            index: 下标（从0开始）
+            delta: 增量
+        """
+        i = index + 1
+        while i <= self.size:
+            self.tree[i] += delta
+            i += i & -i
+
+    def total(self):
+        """
+        所有元素之和
+
+        Returns:
+            float: 总和
+        """
+        result = 0.0
+        i = self.size
+        while i > 0:
+            result += self.tree[i]
+            i -= i & -i
+        return result
+
+    def find(self, target):
+        """
+        查找前缀和首次超过 target 的下标
+
+        Args:
+            target: 目标值（0 <= target < 总和）
+
+        Returns:
+            int: 下标（从0开始）
+        """
+        position = 0
+        step = 1 << self.size.bit_length()
+        while step:
+            next_position = position + step
+            if next_position <= self.size and self.tree[next_position] <= target:
+                position = next_position
+                target -= self.tree[next_position]
+            step >>= 1
+        return min(position, self.size - 1)
+
+
+def proxy_label(proxy):
+    """
+    获取不含认证信息的代理标识，用于日志和统计
+
+    Args:
+        proxy: 代理地址
+
+    Returns:
+        str: 代理标识，如 http://1.2.3.4:8080
+    """
+    parsed = urlparse(proxy)
+    host = parsed.hostname or ''
+    port = f":{parsed.port}" if parsed.port else ''
+    return f"{parsed.scheme}://{host}{port}"
+
+
+class ProxyPool:
+    """按成功率和响应延迟加权的代理池"""
+
+    # 累计多少次更新后重建树状数组，消除浮点误差
+    REBUILD_INTERVAL = 10000
+
+    def __init__(self, proxies=None, latency_reference=2.0, min_weight=0.01, latency_alpha=0.2):
+        """
+        初始化
+
+        Args:
+            proxies: 代理地址列表
+            latency_reference: 参考延迟（秒），延迟等于该值时权重减半
+            min_weight: 最小权重，避免代理完全不被选中而无法恢复
+            latency_alpha: 延迟指数移动平均系数
+        """
+        self.latency_reference = latency_reference
+        self.min_weight = min_weight
+        self.latency_alpha = latency_alpha
+        # 槽位：代理地址列表，已移除的代理槽位为None
+        self.slots = []
+        self.index = {}
+        self.free_slots = []
+        self.weights = []
+        self.stats = {}
+        self.tree = FenwickTree()
+        self.updates = 0
+        self.update(proxies or [])
+
+    def __len__(self):
+        return len(self.index)
+
+    def __contains__(self, proxy):
+        return proxy in self.index
+
+    def proxies(self):
+        """
+        获取当前所有代理
+
+        Returns:
+            list: 代理地址列表
+        """
+        return list(self.index)
+
+    def _new_stats(self):
+        """新代理的初始统计"""
+        return {'success': 0, 'fail': 0, 'fail_times': 0, 'latency': None, 'selected': 0}
+
+    def _weight(self, stats):
+        """
+        计算代理权重：平滑后的成功率乘以延迟系数
+
+        Args:
+            stats: 代理统计
+
+        Returns:
+            float: 权重
+        """
+        success_rate = (stats['success'] + 1) / (stats['success'] + stats['fail'] + 2)
+        latency = stats['latency']
+        latency_factor = 1.0 if latency is None else self.latency_reference / (self.latency_reference + latency)
+        return max(success_rate * latency_factor, self.min_weight)
+
+    def _rebuild(self):
+        """重建树状数组"""
+        self.tree = FenwickTree.build(self.weights)
+        self.updates = 0
+
+    def _set_weight(self, slot, weight):
+        """更新槽位权重"""
+        delta = weight - self.weights[slot]
+        if delta:
+            self.weights[slot] = weight
+            self.tree.add(slot, delta)
+            self.updates += 1
+            if self.updates >= self.REBUILD_INTERVAL:
+                self._rebuild()
+
+    def update(self, proxies):
+        """
+        替换代理列表，保留仍存在的代理的统计
+
+        Args:
+            proxies: 代理地址列表
+        """
+        proxies = list(dict.fromkeys(proxy for proxy in proxies if proxy))
+        self.slots = proxies
+        self.index = {proxy: slot for slot, proxy in enumerate(proxies)}
+        self.free_slots = []
+        self.stats = {proxy: self.stats.get(proxy) or self._new_stats() for proxy in proxies}
+        self.weights = [self._weight(self.stats[proxy]) for proxy in proxies]
+        self._rebuild()
+
+    def add(self, proxy):
+        """
+        添加代理
+
+        Args:
+            proxy: 代理地址
+        """
+        if not proxy or proxy in self.index:
+            return
+        stats = self.stats.setdefault(proxy, self._new_stats())
+        if self.free_slots:
+            slot = self.free_slots.pop()
+            self.slots[slot] = proxy
+            self.index[proxy] = slot
+            self._set_weight(slot, self._weight(stats))
+        else:
+            # 没有空闲槽位时追加并重建
+            self.slots.append(proxy)
+            self.index[proxy] = len(self.slots) - 1
+            self.weights.append(self._weight(stats))
+            self._rebuild()
+
+    def remove(self, proxy):
+        """
+        移除代理，保留其统计，重新加入时沿用原来的权重
+
+        Args:
+            proxy: 代理地址
+        """
+        slot = self.index.pop(proxy, None)
+        if slot is None:
+            return
+        self.slots[slot] = None
+        self.free_slots.append(slot)
+        self._set_weight(slot, 0.0)
+
+    def choose(self):
+        """
+        按权重随机选择代理，复杂度 O(log n)
+
+        Returns:
+            str: 代理地址，代理池为空时返回None
+        """
+        if not self.index:
+            return None
+        total = self.tree.total()
+        if total <= 0:
+            self._rebuild()
+            total = self.tree.total()
+        slot = self.tree.find(random.random() * total)
+        proxy = self.slots[slot]
+        if proxy is None:
+            # 浮点误差可能落到已移除的槽位，重建后重新选择
+            self._rebuild()
+            slot = self.tree.find(random.random() * self.tree.total())
+            proxy = self.slots[slot] or next(iter(self.index))
+        self.stats[proxy]['selected'] += 1
+        return proxy
+
+    def record(self, proxy, success, latency=None):
+        """
+        记录一次代理请求结果并更新权重
+
+        Args:
+            proxy: 代理地址
+            success: 是否成功
+            latency: 响应延迟（秒）
+
+        Returns:
+            dict: 代理统计，代理不在池中时返回None
+        """
+        stats = self.stats.get(proxy)
+        if stats is None:
+            return None
+
+        if success:
+            stats['success'] += 1
+            stats['fail_times'] = 0
+        else:
+            stats['fail'] += 1
+            stats['fail_times'] += 1
+        if latency is not None:
+            previous = stats['latency']
+            stats['latency'] = latency if previous is None else \
+                previous + self.latency_alpha * (latency - previous)
+
+        slot = self.index.get(proxy)
+        if slot is not None:
+            self._set_weight(slot, self._weight(stats))
+        return stats
+
+    def get_stats(self):
+        """
+        获取各代理统计
+
+        Returns:
+            dict: {代理标识: 统计信息}
+        """
+        result = {}
+        for proxy, stats in self.stats.items():
+            total = stats['success'] + stats['fail']
+            result[proxy_label(proxy)] = {
+                'success': stats['success'],
+                'fail': stats['fail'],
+                'success_rate': stats['success'] / total if total else 0.0,
+                'latency': stats['latency'],
+                'selected': stats['selected'],
+                'weight': self.weights[self.index[proxy]] if proxy in self.index else 0.0,
+            }
+        return result
@@ -0,0 +1,155 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+选择器学习缓存模块
+按站点模板（域名+路径模式）记录每个字段实际命中的选择器，下次优先尝试
+"""
+
+import os
+import re
+import json
+import logging
+from urllib.parse import urlparse
+
+logger = logging.getLogger(__name__)
+
+# 路径中的纯数字或文章ID片段不参与模板划分
+_VARIABLE_SEGMENT = re.compile(r'^[\d_-]+$|\.s?html?$')
+
+
+def template_key(url):
+    """
+    获取URL对应的站点模板标识
+
+    Args:
+        url: 页面URL
+
+    Returns:
+        str: 模板标识，如 www.163.com/dy
+    """
+    parsed = urlparse(url)
+    for segment in parsed.path.split('/'):
+        if segment and not _VARIABLE_SEGMENT.search(segment):
+            return f"{parsed.netloc}/{segment}"
+    return parsed.netloc
+
+
+def split_selectors(css):
+    """
+    将逗号分隔的组合选择器拆分为单个选择器列表
+
+    Args:
+        css: 组合选择器
+
+    Returns:
+        list: 单个选择器列表
+    """
+    return [selector.strip() for selector in css.split(',') if selector.strip()]
+
+
+class SelectorCache:
+    """按站点模板记录命中选择器的缓存"""
+
+    def __init__(self, path=None):
+        """
+        初始化
+
+        Args:
+            path: 持久化文件路径，为None时不持久化
+        """
+        self.path = path
+        # {模板: {字段: 选择器}}
+        self.winners = {}
+        # {模板: {字段: {'hits': 命中次数, 'misses': 未命中次数}}}
+        self.stats = {}
+
+    def load(self):
+        """从磁盘加载"""
+        if self.path and os.path.exists(self.path):
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                self.winners = data.get('winners', {})
+                logger.info(f"加载选择器缓存: {self.path}，模板数: {len(self.winners)}")
+            except (ValueError, OSError) as e:
+                logger.error(f"加载选择器缓存失败: {str(e)}")
+        return self
+
+    def save(self):
+        """写入磁盘"""
+        if not self.path:
+            return
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'winners': self.winners, 'stats': self.stats}, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.path)
+
+    def get(self, template, field):
+        """
+        获取模板字段已学习的选择器
+
+        Args:
+            template: 模板标识
+            field: 字段名
+
+        Returns:
+            str: 选择器，未学习时返回None
+        """
+        return self.winners.get(template, {}).get(field)
+
+    def order(self, template, field, selectors):
+        """
+        将已学习的选择器排在最前
+
+        Args:
+            template: 模板标识
+            field: 字段名
+            selectors: 候选选择器列表
+
+        Returns:
+            list: 排序后的选择器列表
+        """
+        winner = self.get(template, field)
+        if winner not in selectors:
+            return selectors
+        return [winner] + [selector for selector in selectors if selector != winner]
+
+    def record(self, template, field, selector, hit):
+        """
+        记录一次提取结果
+
+        Args:
+            template: 模板标识
+            field: 字段名
+            selector: 实际命中的选择器，未找到时为None
+            hit: 已学习的选择器是否直接命中
+        """
+        field_stats = self.stats.setdefault(template, {}).setdefault(field, {'hits': 0, 'misses': 0})
+        field_stats['hits' if hit else 'misses'] += 1
+        if selector and not hit:
+            previous = self.get(template, field)
+            if previous and previous != selector:
+                logger.info(f"模板 {template} 字段 {field} 选择器变化: {previous} -> {selector}")
+            self.winners.setdefault(template, {})[field] = selector
+
+    def get_hit_rates(self):
+        """
+        获取各模板各字段的命中率
+
+        Returns:
+            dict: {模板: {字段: 命中率}}
+        """
+        rates = {}
+        for template, fields in self.stats.items():
+            for field, field_stats in fields.items():
+                total = field_stats['hits'] + field_stats['misses']
+                rates.setdefault(template, {})[field] = field_stats['hits'] / total if total else 0.0
+        return rates
+
+    def log_stats(self):
+        """输出命中率统计"""
+        for template, fields in sorted(self.get_hit_rates().items()):
+            summary = ', '.join(f"{field}: {rate:.0%}" for field, rate in sorted(fields.items()))
+            logger.info(f"选择器缓存命中率 [{template}] {summary}")
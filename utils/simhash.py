@@ -0,0 +1,228 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+SimHash近似重复检测模块
+为正文计算64位SimHash指纹，并按4段16位建立分段索引，
+汉明距离不超过3的指纹至少有一段完全相同，查询只需检查4个桶
+"""
+
+import hashlib
+import logging
+from array import array
+from functools import lru_cache
+
+import numpy as np
+
+from utils.keyword_extractor import ngram_tokenize
+
+logger = logging.getLogger(__name__)
+
+# 指纹位数
+FINGERPRINT_BITS = 64
+
+_BIT_SHIFTS = np.arange(FINGERPRINT_BITS, dtype=np.uint64)
+
+
+@lru_cache(maxsize=262144)
+def _token_hash(token):
+    """计算词的64位哈希"""
+    return int.from_bytes(hashlib.blake2b(token.encode('utf-8'), digest_size=8).digest(), 'little')
+
+
+def simhash(text):
+    """
+    计算文本的64位SimHash指纹（以字符二元组为特征，词频为权重）
+
+    Args:
+        text: 正文
+
+    Returns:
+        int: 无符号64位指纹，无有效特征时返回None
+    """
+    counts = {}
+    for token in ngram_tokenize(text or ''):
+        counts[token] = counts.get(token, 0) + 1
+    if not counts:
+        return None
+
+    hashes = np.fromiter((_token_hash(token) for token in counts), dtype=np.uint64, count=len(counts))
+    weights = np.fromiter(counts.values(), dtype=np.int64, count=len(counts))
+
+    # 每一位按权重投票：该位为1加权重，为0减权重
+    bits = ((hashes[:, None] >> _BIT_SHIFTS) & np.uint64(1)).astype(np.int64)
+    votes = weights @ (2 * bits - 1)
+    return int(((votes > 0).astype(np.uint64) << _BIT_SHIFTS).sum())
+
+
+def hamming_distance(a, b):
+    """
+    计算两个指纹的汉明距离
+
+    Args:
+        a: 指纹
+        b: 指纹
+
+    Returns:
+        int: 不同的位数
+    """
+    return (a ^ b).bit_count()
+
+
+def to_signed(fingerprint):
+    """
+    将无符号指纹转换为有符号64位整数（用于数据库 BIGINT 字段）
+
+    Args:
+        fingerprint: 无符号指纹
+
+    Returns:
+        int: 有符号整数
+    """
+    if fingerprint is None:
+        return None
+    return fingerprint - (1 << 64) if fingerprint >= (1 << 63) else fingerprint
+
+
+def to_unsigned(value):
+    """
+    将数据库中的有符号整数还原为无符号指纹
+
+    Args:
+        value: 有符号整数
+
+    Returns:
+        int: 无符号指纹
+    """
+    if value is None:
+        return None
+    return value & ((1 << 64) - 1)
+
+
+class SimHashIndex:
+    """SimHash分段索引"""
+
+    def __init__(self, bands=4, max_distance=3):
+        """
+        初始化
+
+        Args:
+            bands: 分段数，max_distance 需小于分段数才能保证不漏检
+            max_distance: 判定为近似重复的最大汉明距离
+        """
+        if max_distance >= bands:
+            logger.warning(f"最大汉明距离 {max_distance} 不小于分段数 {bands}，可能漏检近似重复")
+        self.bands = bands
+        self.band_bits = FINGERPRINT_BITS // bands
+        self.band_mask = (1 << self.band_bits) - 1
+        self.max_distance = max_distance
+        # 指纹、对应的值和标识，按插入顺序存储
+        self.fingerprints = array('Q')
+        self.values = array('q')
+        self.keys = array('Q')
+        # 每段一个哈希表：{段值: 指纹下标数组}
+        self.tables = [{} for _ in range(bands)]
+        # 标识到指纹下标的映射，同一标识只保留一条记录
+        self.positions = {}
+        self.removed = 0
+
+    def __len__(self):
+        return len(self.fingerprints) - self.removed
+
+    def _band_values(self, fingerprint):
+        """拆分指纹的各段"""
+        return [(fingerprint >> (band * self.band_bits)) & self.band_mask for band in range(self.bands)]
+
+    def add(self, fingerprint, value, key=0):
+        """
+        添加指纹
+
+        Args:
+            fingerprint: 无符号指纹
+            value: 关联的值（如新闻ID）
+            key: 记录标识（如URL哈希），查询时同一标识的记录不视为重复；
+                已存在同一标识的记录时替换该记录
+        """
+        position = self.positions.get(key) if key else None
+        if position is None:
+            position = len(self.fingerprints)
+            self.fingerprints.append(fingerprint)
+            self.values.append(value)
+            self.keys.append(key)
+            if key:
+                self.positions[key] = position
+        else:
+            self._unlink(position)
+            self.fingerprints[position] = fingerprint
+            self.values[position] = value
+        self._link(position, fingerprint)
+
+    def remove(self, key):
+        """
+        删除指定标识的记录
+
+        Args:
+            key: 记录标识
+
+        Returns:
+            bool: 是否存在该记录
+        """
+        position = self.positions.pop(key, None) if key else None
+        if position is None:
+            return False
+        self._unlink(position)
+        self.removed += 1
+        return True
+
+    def _unlink(self, position):
+        """从各段哈希表中移除指纹下标"""
+        for table, band_value in zip(self.tables, self._band_values(self.fingerprints[position])):
+            bucket = table[band_value]
+            bucket.remove(position)
+            if not bucket:
+                del table[band_value]
+
+    def _link(self, position, fingerprint):
+        """将指纹下标加入各段哈希表"""
+        for table, band_value in zip(self.tables, self._band_values(fingerprint)):
+            bucket = table.get(band_value)
+            if bucket is None:
+                table[band_value] = array('I', [position])
+            else:
+                bucket.append(position)
+
+    def find(self, fingerprint, key=None):
+        """
+        查找近似重复的指纹
+
+        Args:
+            fingerprint: 无符号指纹
+            key: 记录标识，同一标识的记录不视为重复
+
+        Returns:
+            int: 汉明距离最小的近似重复记录的值，不存在时返回None
+        """
+        best_value = None
+        best_distance = self.max_distance + 1
+        checked = set()
+        for table, band_value in zip(self.tables, self._band_values(fingerprint)):
+            for position in table.get(band_value, ()):
+                if position in checked:
+                    continue
+                checked.add(position)
+                if key is not None and self.keys[position] == key:
+                    continue
+                distance = hamming_distance(self.fingerprints[position], fingerprint)
+                if distance < best_distance:
+                    best_distance = distance
+                    best_value = self.values[position]
+        return best_value
+
+    def clear(self):
+        """清空索引"""
+        self.fingerprints = array('Q')
+        self.values = array('q')
+        self.keys = array('Q')
+        self.tables = [{} for _ in range(self.bands)]
+        self.positions = {}
+        self.removed = 0
@@ -0,0 +1,386 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+新闻摘要模块
+基于TextRank的抽取式摘要：句子向量为字符二元组词频，相似度与迭代均使用NumPy计算
+摘要按正文内容哈希缓存，内容未变化的文章不会重复计算
+"""
+
+import os
+import re
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from config.settings import SUMMARY_SETTINGS
+from utils.keyword_extractor import ngram_tokenize
+
+logger = logging.getLogger(__name__)
+
+# 句子切分：在句末标点或换行之后断句
+_SENTENCE_PATTERN = re.compile(r'[^。！？!?；;\n]+[。！？!?；;]*')
+
+# 句子最少字符数，过短的句子（如图片说明、署名）不参与打分
+MIN_SENTENCE_LENGTH = 8
+
+# TextRank阻尼系数
+DAMPING = 0.85
+
+
+def split_sentences(text):
+    """
+    切分句子
+
+    Args:
+        text: 正文
+
+    Returns:
+        list: 句子列表
+    """
+    return [sentence.strip() for sentence in _SENTENCE_PATTERN.findall(text) if sentence.strip()]
+
+
+def content_hash(text):
+    """
+    计算正文内容哈希
+
+    Args:
+        text: 正文
+
+    Returns:
+        str: 内容哈希
+    """
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=16).hexdigest()
+
+
+def truncate(text, max_length):
+    """
+    截断文本
+
+    Args:
+        text: 文本
+        max_length: 最大长度
+
+    Returns:
+        str: 截断后的文本
+    """
+    return text[:max_length] + '...' if len(text) > max_length else text
+
+
+class SummaryCache:
+    """按内容哈希缓存摘要，内存LRU加SQLite持久化"""
+
+    def __init__(self, path=None, max_size=10000):
+        """
+        初始化
+
+        Args:
+            path: SQLite数据库文件路径，为None时只缓存在内存中
+            max_size: 内存缓存最大条数
+        """
+        self.path = path
+        self.max_size = max_size
+        self.conn = None
+        self.memory = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _connect(self):
+        """首次使用时打开SQLite存储"""
+        if self.conn is None and self.path:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            self.conn = sqlite3.connect(self.path, check_same_thread=False)
+            self.conn.execute(
+                'CREATE TABLE IF NOT EXISTS summary_cache ('
+                'content_hash TEXT PRIMARY KEY, '
+                'summary TEXT)'
+            )
+            self.conn.commit()
+            logger.info(f"打开摘要缓存: {self.path}")
+        return self.conn
+
+    def _remember(self, key, summary):
+        """写入内存缓存"""
+        self.memory[key] = summary
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.max_size:
+            self.memory.popitem(last=False)
+
+    def get_many(self, keys):
+        """
+        批量获取摘要
+
+        Args:
+            keys: 内容哈希列表
+
+        Returns:
+            dict: 已缓存的内容哈希到摘要的映射
+        """
+        with self.lock:
+            found = {}
+            missing = []
+            for key in keys:
+                if key in self.memory:
+                    self.memory.move_to_end(key)
+                    found[key] = self.memory[key]
+                else:
+                    missing.append(key)
+
+            conn = self._connect()
+            if conn and missing:
+                missing = list(dict.fromkeys(missing))
+                for i in range(0, len(missing), 500):
+                    chunk = missing[i:i + 500]
+                    rows = conn.execute(
+                        f"SELECT content_hash, summary FROM summary_cache "
+                        f"WHERE content_hash IN ({','.join('?' * len(chunk))})",
+                        chunk
+                    ).fetchall()
+                    for key, summary in rows:
+                        found[key] = summary
+                        self._remember(key, summary)
+
+            self.hits += len(found)
+            self.misses += len(set(keys)) - len(found)
+            return found
+
+    def put_many(self, summaries):
+        """
+        批量写入摘要
+
+        Args:
+            summaries: 内容哈希到摘要的映射
+        """
+        if not summaries:
+            return
+        with self.lock:
+            for key, summary in summaries.items():
+                self._remember(key, summary)
+            conn = self._connect()
+            if conn:
+                conn.executemany(
+                    'INSERT OR REPLACE INTO summary_cache (content_hash, summary) VALUES (?, ?)',
+                    list(summaries.items())
+                )
+                conn.commit()
+
+    def close(self):
+        """关闭存储"""
+        with self.lock:
+            if self.conn:
+                self.conn.close()
+                self.conn = None
+
+    def get_stats(self):
+        """
+        获取缓存统计
+
+        Returns:
+            dict: 统计信息
+        """
+        total = self.hits + self.misses
+        return {
+            'size': len(self.memory),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0,
+        }
+
+
+class Summarizer:
+    """TextRank抽取式摘要生成器"""
+
+    def __init__(self, max_length=200, max_sentences=200, cpu_budget=0.05, cache=None):
+        """
+        初始化
+
+        Args:
+            max_length: 摘要最大长度
+            max_sentences: 参与打分的最大句子数（按正文顺序）
+            cpu_budget: 每篇文章摘要计算的CPU时间上限（秒），包含切分句子、构建向量和迭代打分
+            cache: 摘要缓存
+        """
+        self.max_length = max_length
+        self.max_sentences = max_sentences
+        self.cpu_budget = cpu_budget
+        self.cache = cache
+        self.timeouts = 0
+
+    def _sentence_vectors(self, sentences, deadline):
+        """
+        构建句子向量（字符二元组词频，按行归一化）
+
+        Args:
+            sentences: 句子列表
+            deadline: CPU时间截止点（time.thread_time）
+
+        Returns:
+            np.ndarray: 句子向量矩阵，CPU时间超出上限时返回None
+        """
+        vocab = {}
+        rows = []
+        cols = []
+        for i, sentence in enumerate(sentences):
+            if time.thread_time() > deadline:
+                return None
+            for token in ngram_tokenize(sentence):
+                rows.append(i)
+                cols.append(vocab.setdefault(token, len(vocab)))
+
+        vectors = np.zeros((len(sentences), max(len(vocab), 1)), dtype=np.float32)
+        np.add.at(vectors, (rows, cols), 1.0)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return vectors / norms
+
+    def _rank(self, vectors, deadline):
+        """
+        计算句子得分，CPU时间超出上限时提前结束迭代
+
+        Args:
+            vectors: 句子向量矩阵
+            deadline: CPU时间截止点（time.thread_time）
+
+        Returns:
+            np.ndarray: 句子得分
+        """
+        # 与质心的相似度作为初始得分，超时时直接使用
+        scores = vectors @ vectors.mean(axis=0)
+        if time.thread_time() > deadline:
+            self.timeouts += 1
+            return scores
+
+        similarity = vectors @ vectors.T
+        np.fill_diagonal(similarity, 0.0)
+        out_weight = similarity.sum(axis=1, keepdims=True)
+        out_weight[out_weight == 0] = 1.0
+        transition = (similarity / out_weight).T
+
+        count = len(vectors)
+        rank = np.full(count, 1.0 / count, dtype=np.float32)
+        for _ in range(50):
+            updated = (1 - DAMPING) / count + DAMPING * (transition @ rank)
+            converged = np.abs(updated - rank).sum() < 1e-4
+            rank = updated
+            if converged:
+                break
+            if time.thread_time() > deadline:
+                self.timeouts += 1
+                break
+        return rank
+
+    def _summarize(self, text, max_length):
+        """生成单篇文章摘要（不使用缓存）"""
+        if len(text) <= max_length:
+            return text
+
+        # CPU时间上限覆盖整篇文章的计算，包括切分句子和构建向量
+        deadline = time.thread_time() + self.cpu_budget
+        sentences = split_sentences(text)[:self.max_sentences]
+        # 过短和重复的句子不参与打分
+        first_index = {}
+        for i, sentence in enumerate(sentences):
+            if len(sentence) >= MIN_SENTENCE_LENGTH:
+                first_index.setdefault(sentence, i)
+        candidates = sorted(first_index.values())
+        if len(candidates) < 2:
+            return truncate(text, max_length)
+
+        vectors = self._sentence_vectors([sentences[i] for i in candidates], deadline)
+        if vectors is None:
+            # 构建向量时已超时，按原文顺序选取句子
+            self.timeouts += 1
+            scores = -np.arange(len(candidates), dtype=np.float32)
+        else:
+            scores = self._rank(vectors, deadline)
+
+        # 按得分选取句子，直到达到长度上限，再按原文顺序输出
+        selected = []
+        length = 0
+        for index in np.argsort(-scores, kind='stable').tolist():
+            sentence = sentences[candidates[index]]
+            if length + len(sentence) > max_length:
+                continue
+            selected.append(candidates[index])
+            length += len(sentence)
+
+        if not selected:
+            return truncate(sentences[candidates[int(np.argmax(scores))]], max_length)
+        return ''.join(sentences[i] for i in sorted(selected))
+
+    def summarize(self, text, max_length=None):
+        """
+        生成摘要
+
+        Args:
+            text: 正文
+            max_length: 摘要最大长度，默认使用初始化设置
+
+        Returns:
+            str: 摘要
+        """
+        return self.summarize_many([text], max_length)[0]
+
+    def summarize_many(self, texts, max_length=None):
+        """
+        批量生成摘要，已缓存的内容直接返回缓存结果
+
+        Args:
+            texts: 正文列表
+            max_length: 摘要最大长度，默认使用初始化设置
+
+        Returns:
+            list: 摘要列表
+        """
+        max_length = max_length or self.max_length
+        keys = [content_hash(f"{max_length}:{text}") if text else None for text in texts]
+        cached = self.cache.get_many([key for key in keys if key]) if self.cache else {}
+
+        summaries = []
+        computed = {}
+        for text, key in zip(texts, keys):
+            if not key:
+                summaries.append('')
+            elif key in cached:
+                summaries.append(cached[key])
+            elif key in computed:
+                summaries.append(computed[key])
+            else:
+                try:
+                    summary = self._summarize(text, max_length)
+                except Exception as e:
+                    logger.error(f"生成摘要失败: {str(e)}")
+                    summary = truncate(text, max_length)
+                computed[key] = summary
+                summaries.append(summary)
+
+        if self.cache:
+            self.cache.put_many(computed)
+        return summaries
+
+    def summarize_items(self, items):
+        """
+        为一批新闻数据项填充摘要
+
+        Args:
+            items: 新闻数据项列表
+        """
+        summaries = self.summarize_many([item.get('content') or '' for item in items])
+        for item, summary in zip(items, summaries):
+            item['summary'] = summary
+
+
+# 进程内共享的摘要生成器
+summarizer = Summarizer(
+    max_length=SUMMARY_SETTINGS['max_length'],
+    max_sentences=SUMMARY_SETTINGS['max_sentences'],
+    cpu_budget=SUMMARY_SETTINGS['cpu_budget'] / 1000.0,
+    cache=SummaryCache(SUMMARY_SETTINGS['cache_path'], SUMMARY_SETTINGS['cache_size'])
+)
@@ -8,9 +8,21 @@
 import re
 import html
 import logging
+from functools import partial
+from concurrent.futures import ProcessPoolExecutor
 
 logger = logging.getLogger(__name__)
 
+# 预编译的清洗正则
+HTML_TAG_PATTERN = re.compile(r'<[^>]+>')
+URL_PATTERN = re.compile(r'https?://\S+')
+EMAIL_PATTERN = re.compile(r'\S+@\S+\.\S+')
+MOBILE_PATTERN = re.compile(r'1[3-9]\d{9}')
+LANDLINE_PATTERN = re.compile(r'\d{3,4}-\d{7,8}')
+ID_NUMBER_PATTERN = re.compile(r'\d{17}[\dXx]')
+SPACES_PATTERN = re.compile(r'\s+')
+DIGIT_PATTERN = re.compile(r'\d')
+
 
 class TextCleaner:
     """文本清洗器"""
@@ -33,7 +45,7 @@ class TextCleaner:
         text = html.unescape(text)
         
         # 移除HTML标签
-        text = re.sub(r'<[^>]+>', '', text)
+        text = HTML_TAG_PATTERN.sub('', text)
         
         return text.strip()
     
@@ -52,7 +64,7 @@ class TextCleaner:
             return ''
             
         # 替换多个空白字符为单个空格
-        text = re.sub(r'\s+', ' ', text)
+        text = SPACES_PATTERN.sub(' ', text)
         
         return text.strip()
     
@@ -93,7 +105,7 @@ class TextCleaner:
             return ''
             
         # 移除URL
-        text = re.sub(r'https?://\S+', '', text)
+        text = URL_PATTERN.sub('', text)
         
         return text.strip()
     
@@ -112,7 +124,7 @@ class TextCleaner:
             return ''
             
         # 移除邮箱地址
-        text = re.sub(r'\S+@\S+\.\S+', '', text)
+        text = EMAIL_PATTERN.sub('', text)
         
         return text.strip()
     
@@ -131,8 +143,8 @@ class TextCleaner:
             return ''
             
         # 移除电话号码
-        text = re.sub(r'1[3-9]\d{9}', '', text)  # 移除手机号
-        text = re.sub(r'\d{3,4}-\d{7,8}', '', text)  # 移除座机号
+        text = MOBILE_PATTERN.sub('', text)  # 移除手机号
+        text = LANDLINE_PATTERN.sub('', text)  # 移除座机号
         
         return text.strip()
     
@@ -151,7 +163,7 @@ class TextCleaner:
             return ''
             
         # 移除身份证号
-        text = re.sub(r'\d{17}[\dXx]', '', text)
+        text = ID_NUMBER_PATTERN.sub('', text)
         
         return text.strip()
     
@@ -234,14 +246,14 @@ class TextCleaner:
         if not text:
             return []
             
-        # 分词
-        words = text.split()
+        # 分词（中文按二元组切分），语料级TF-IDF见 utils.keyword_extractor
+        from utils.keyword_extractor import ngram_tokenize
+        words = ngram_tokenize(text)
         
         # 统计词频
         word_freq = {}
         for word in words:
-            if len(word) > 1:  # 忽略单字词
-                word_freq[word] = word_freq.get(word, 0) + 1
+            word_freq[word] = word_freq.get(word, 0) + 1
         
         # 按词频排序
         sorted_words = sorted(word_freq.items(), key=lambda x: x[1], reverse=True)
@@ -270,24 +282,9 @@ class TextCleaner:
         text = TextCleaner.clean_html(text)
         text = TextCleaner.clean_spaces(text)
         
-        # 截取摘要
-        if len(text) <= max_length:
-            return text
-        
-        # 尝试在句子边界截断
-        sentences = re.split(r'[。！？!?]', text)
-        summary = ''
-        for sentence in sentences:
-            if len(summary) + len(sentence) + 1 <= max_length:
-                summary += sentence + '。'
-            else:
-                break
-        
-        # 如果没有找到合适的句子边界，直接截断
-        if not summary:
-            summary = text[:max_length] + '...'
-        
-        return summary
+        # 抽取式摘要
+        from utils.summarizer import summarizer
+        return summarizer.summarize(text, max_length)
     
     @staticmethod
     def clean_all(text, stopwords=None):
@@ -296,7 +293,7 @@ class TextCleaner:
         
         Args:
             text: 待清洗文本
-            stopwords: 停用词列表
+            stopwords: 停用词集合（建议传入frozenset）
             
         Returns:
             str: 清洗后的文本
@@ -304,32 +301,67 @@ class TextCleaner:
         if not text:
             return ''
             
+        # 各步骤的顺序与逐步清洗一致：前一步移除的内容可能使后一步的模式相连，
+        # 如 电话<b>138</b>12345678 移除标签后才是完整的手机号；
+        # 文本中不含某步骤的触发字符时跳过该步骤
+        
         # 解码HTML实体
-        text = html.unescape(text)
+        if '&' in text:
+            text = html.unescape(text)
         
         # 移除HTML标签
-        text = re.sub(r'<[^>]+>', '', text)
+        if '<' in text:
+            text = HTML_TAG_PATTERN.sub('', text)
         
         # 移除URL
-        text = re.sub(r'https?://\S+', '', text)
-        
-        # 移除邮箱地址
-        text = re.sub(r'\S+@\S+\.\S+', '', text)
-        
-        # 移除电话号码
-        text = re.sub(r'1[3-9]\d{9}', '', text)
-        text = re.sub(r'\d{3,4}-\d{7,8}', '', text)
+        if 'http' in text:
+            text = URL_PATTERN.sub('', text)
         
-        # 移除身份证号
-        text = re.sub(r'\d{17}[\dXx]', '', text)
+        # 按空白字符切分，合并多余空白（之后的模式都不跨越空白，切分不影响匹配结果）
+        words = text.split()
         
-        # 替换多个空白字符为单个空格
-        text = re.sub(r'\s+', ' ', text)
+        # 移除邮箱地址：邮箱正则的匹配总是覆盖整个以空白分隔的词，
+        # 只对包含 @ 的词做匹配，避免对长文本逐字符回溯
+        if '@' in text:
+            words = [word for word in words if '@' not in word or not EMAIL_PATTERN.search(word)]
+        
+        # 移除电话号码和身份证号
+        text = ' '.join(words)
+        if DIGIT_PATTERN.search(text):
+            text = MOBILE_PATTERN.sub('', text)
+            if '-' in text:
+                text = LANDLINE_PATTERN.sub('', text)
+            text = ID_NUMBER_PATTERN.sub('', text)
+            words = text.split()
         
         # 移除停用词
         if stopwords:
-            words = text.split()
+            if not isinstance(stopwords, (set, frozenset)):
+                stopwords = frozenset(stopwords)
             words = [word for word in words if word not in stopwords]
-            text = ' '.join(words)
         
-        return text.strip() 
\ No newline at end of file
+        return ' '.join(words)
+    
+    @staticmethod
+    def clean_many(texts, stopwords=None, workers=None, chunksize=64):
+        """
+        批量综合清洗
+        
+        Args:
+            texts: 待清洗文本列表
+            stopwords: 停用词集合
+            workers: 进程数，为空或1时在当前进程中执行
+            chunksize: 每次分发给子进程的文本数
+            
+        Returns:
+            list: 清洗后的文本列表
+        """
+        if stopwords and not isinstance(stopwords, frozenset):
+            stopwords = frozenset(stopwords)
+        
+        clean = partial(TextCleaner.clean_all, stopwords=stopwords)
+        if not workers or workers <= 1:
+            return [clean(text) for text in texts]
+        
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(clean, texts, chunksize=chunksize))
@@ -0,0 +1,148 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+URL去重存储模块
+使用有序的64位URL哈希数组持久化已爬取的URL，内存占用约为每个URL 8字节
+"""
+
+import os
+import json
+import hashlib
+import logging
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class UrlSeenStore:
+    """持久化的URL去重存储"""
+
+    def __init__(self, path, merge_threshold=100000):
+        """
+        初始化
+
+        Args:
+            path: 哈希数组文件路径（.npy）
+            merge_threshold: 新增哈希数量达到该值时合并到有序数组
+        """
+        self.path = path
+        self.meta_path = f"{path}.json"
+        self.merge_threshold = merge_threshold
+        # 已持久化的有序哈希数组（加载时使用内存映射）
+        self.hashes = np.empty(0, dtype=np.uint64)
+        # 尚未合并的新增哈希
+        self.pending = set()
+        # 已从数据库导入的最大新闻ID
+        self.seeded_id = 0
+
+    def __len__(self):
+        return len(self.hashes) + len(self.pending)
+
+    def __contains__(self, url):
+        return self.contains_hash(self.url_hash(url))
+
+    @staticmethod
+    def url_hash(url):
+        """
+        计算URL的64位哈希
+
+        Args:
+            url: URL
+
+        Returns:
+            int: 64位哈希值
+        """
+        digest = hashlib.blake2b(url.encode('utf-8'), digest_size=8).digest()
+        return int.from_bytes(digest, 'little')
+
+    def contains_hash(self, url_hash):
+        """
+        检查哈希是否存在
+
+        Args:
+            url_hash: 64位哈希值
+
+        Returns:
+            bool: 是否存在
+        """
+        if url_hash in self.pending:
+            return True
+        if not len(self.hashes):
+            return False
+        value = np.uint64(url_hash)
+        index = int(np.searchsorted(self.hashes, value))
+        return index < len(self.hashes) and self.hashes[index] == value
+
+    def add(self, url):
+        """
+        添加URL
+
+        Args:
+            url: URL
+
+        Returns:
+            bool: 是否为新URL
+        """
+        url_hash = self.url_hash(url)
+        if self.contains_hash(url_hash):
+            return False
+        self.pending.add(url_hash)
+        if len(self.pending) >= self.merge_threshold:
+            self._merge()
+        return True
+
+    def load(self):
+        """从磁盘加载哈希数组"""
+        if os.path.exists(self.path):
+            self.hashes = np.load(self.path, mmap_mode='r')
+        if os.path.exists(self.meta_path):
+            with open(self.meta_path, 'r', encoding='utf-8') as f:
+                self.seeded_id = json.load(f).get('seeded_id', 0)
+        logger.info(f"加载URL去重存储: {self.path}，URL数: {len(self.hashes)}")
+        return self
+
+    def seed_from_db(self, session, chunk_size=10000):
+        """
+        从新闻表导入上次导入后新增的URL
+
+        Args:
+            session: 数据库会话
+            chunk_size: 每批读取的行数
+
+        Returns:
+            int: 导入的URL数量
+        """
+        from database.models import News
+
+        count = 0
+        query = session.query(News.id, News.url).filter(News.id > self.seeded_id).order_by(News.id)
+        for news_id, url in query.yield_per(chunk_size):
+            self.add(url)
+            self.seeded_id = news_id
+            count += 1
+        logger.info(f"从数据库导入URL {count} 个，当前URL总数: {len(self)}")
+        return count
+
+    def save(self):
+        """合并新增哈希并写入磁盘"""
+        self._merge()
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+
+        # 先写临时文件再替换，避免中断导致文件损坏
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            np.save(f, np.asarray(self.hashes))
+        os.replace(tmp_path, self.path)
+        with open(self.meta_path, 'w', encoding='utf-8') as f:
+            json.dump({'seeded_id': self.seeded_id, 'count': len(self.hashes)}, f)
+        logger.info(f"保存URL去重存储: {self.path}，URL数: {len(self.hashes)}")
+
+    def _merge(self):
+        """将新增哈希合并到有序数组"""
+        if not self.pending:
+            return
+        new_hashes = np.fromiter(self.pending, dtype=np.uint64, count=len(self.pending))
+        self.hashes = np.union1d(self.hashes, new_hashes)
+        self.pending.clear()